@@ -2,16 +2,31 @@
 AI Orchestrator - Handles LLM interactions with tool calling
 """
 import json
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+import threading
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from config import settings
 from ai_tools import TOOLS
 
 
-# Initialize OpenAI client
-client = None
-if settings.OPENAI_API_KEY:
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# OpenAI client (created on first use; importing openai is slow)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Get or create the OpenAI client (singleton pattern).
+    
+    Returns:
+        OpenAI client, or None if OPENAI_API_KEY is not set
+    """
+    global _client
+    if _client is None and settings.OPENAI_API_KEY:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    return _client
 
 
 def get_tool_definitions() -> List[Dict[str, Any]]:
@@ -283,6 +298,104 @@ def call_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": f"Tool execution error: {str(e)}"}
 
 
+SYSTEM_PROMPT = """You are an intelligent PDF assistant. You can:
+- Handle PDF operations (upload, split, merge, rotate, extract)
+- Answer questions about PDFs using RAG
+- Summarize PDFs
+- Extract tables, keywords, and data
+
+When users ask you to do something, use the appropriate tools. Always explain what you did in natural language.
+If a user mentions PDFs, try to identify which PDFs they're referring to from context."""
+
+NO_API_KEY_MESSAGE = "AI features require OPENAI_API_KEY to be set in environment variables."
+
+
+def _build_messages(
+    messages: List[Dict[str, str]],
+    context: Optional[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Prepend the system message (with the available PDFs) to the chat history."""
+    system_message = SYSTEM_PROMPT
+    if context:
+        if context.get('uploaded_pdfs'):
+            pdf_list = ', '.join([f"{p['filename']} ({p['pdf_id']})" for p in context['uploaded_pdfs']])
+            system_message += f"\n\nAvailable PDFs: {pdf_list}"
+    
+    return [
+        {"role": "system", "content": system_message}
+    ] + messages
+
+
+def _run_tool_call(tool_call_id: str, tool_name: str, raw_arguments: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Execute one tool call requested by the model.
+    
+    Returns:
+        Tuple of (tool result message for the model, recorded action)
+    """
+    try:
+        arguments = json.loads(raw_arguments)
+    except (json.JSONDecodeError, TypeError):
+        arguments = {}
+    
+    result = call_tool(tool_name, arguments)
+    tool_result = {
+        "tool_call_id": tool_call_id,
+        "role": "tool",
+        "name": tool_name,
+        "content": json.dumps(result)
+    }
+    action = {
+        "type": tool_name,
+        "tool_call_id": tool_call_id,
+        "arguments": arguments,
+        "result": result
+    }
+    return tool_result, action
+
+
+def _assistant_tool_message(content: str, tool_calls: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Assistant message that requested tool calls (each {"id", "name", "arguments"})."""
+    return {
+        "role": "assistant",
+        "content": content,
+        "tool_calls": [
+            {"id": tc["id"], "type": "function", "function": {"name": tc["name"], "arguments": tc["arguments"]}}
+            for tc in tool_calls
+        ]
+    }
+
+
+def _action_outputs(action: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Sources (from Q&A) and file references produced by one tool action."""
+    result = action.get("result", {})
+    sources = list(result.get("sources", []))
+    files = []
+    
+    if "new_pdf_id" in result:
+        files.append({
+            "type": "pdf",
+            "pdf_id": result["new_pdf_id"],
+            "filename": result.get("filename", "unknown.pdf")
+        })
+    elif "uploaded_pdfs" in result:
+        for pdf in result["uploaded_pdfs"]:
+            files.append({
+                "type": "pdf",
+                "pdf_id": pdf["pdf_id"],
+                "filename": pdf["filename"]
+            })
+    elif "extracted_images" in result:
+        for img in result["extracted_images"]:
+            files.append({
+                "type": "image",
+                "image_id": img["image_id"],
+                "filename": img["filename"],
+                "download_url": img["download_url"]
+            })
+    return sources, files
+
+
 def chat_with_ai(
     messages: List[Dict[str, str]],
     context: Optional[Dict[str, Any]] = None
@@ -297,39 +410,23 @@ def chat_with_ai(
     Returns:
         Dict with assistant message, actions, sources, files
     """
+    client = get_client()
     if not client:
         # Fallback: simple response without LLM
         return {
-            "assistant_message": "AI features require OPENAI_API_KEY to be set in environment variables.",
+            "assistant_message": NO_API_KEY_MESSAGE,
             "actions": [],
             "sources": [],
             "files": []
         }
     
-    # Prepare system message
-    system_message = """You are an intelligent PDF assistant. You can:
-- Handle PDF operations (upload, split, merge, rotate, extract)
-- Answer questions about PDFs using RAG
-- Summarize PDFs
-- Extract tables, keywords, and data
-
-When users ask you to do something, use the appropriate tools. Always explain what you did in natural language.
-If a user mentions PDFs, try to identify which PDFs they're referring to from context."""
-    
-    if context:
-        if context.get('uploaded_pdfs'):
-            pdf_list = ', '.join([f"{p['filename']} ({p['pdf_id']})" for p in context['uploaded_pdfs']])
-            system_message += f"\n\nAvailable PDFs: {pdf_list}"
-    
     # Prepare messages for OpenAI
-    openai_messages = [
-        {"role": "system", "content": system_message}
-    ] + messages
+    openai_messages = _build_messages(messages, context)
     
     # Call OpenAI with function calling
     try:
         response = client.chat.completions.create(
-            model="gpt-4o-mini",  # or "gpt-4" for better performance
+            model=settings.OPENAI_CHAT_MODEL,
             messages=openai_messages,
             tools=get_tool_definitions(),
             tool_choice="auto"
@@ -337,48 +434,28 @@ If a user mentions PDFs, try to identify which PDFs they're referring to from co
         
         assistant_message = response.choices[0].message
         content = assistant_message.content or ""
-        tool_calls = assistant_message.tool_calls or []
+        tool_calls = [
+            {"id": tc.id, "name": tc.function.name, "arguments": tc.function.arguments}
+            for tc in assistant_message.tool_calls or []
+        ]
         
         # Execute tool calls
         actions = []
         tool_results = []
         
         for tool_call in tool_calls:
-            tool_name = tool_call.function.name
-            try:
-                arguments = json.loads(tool_call.function.arguments)
-            except:
-                arguments = {}
-            
-            # Call the tool
-            result = call_tool(tool_name, arguments)
-            tool_results.append({
-                "tool_call_id": tool_call.id,
-                "role": "tool",
-                "name": tool_name,
-                "content": json.dumps(result)
-            })
-            
-            # Record action
-            actions.append({
-                "type": tool_name,
-                "tool_call_id": tool_call.id,
-                "arguments": arguments,
-                "result": result
-            })
+            tool_result, action = _run_tool_call(tool_call["id"], tool_call["name"], tool_call["arguments"])
+            tool_results.append(tool_result)
+            actions.append(action)
         
         # If tools were called, get final response
         if tool_results:
-            openai_messages.append({
-                "role": "assistant",
-                "content": content,
-                "tool_calls": [{"id": tc.id, "type": "function", "function": {"name": tc.function.name, "arguments": tc.function.arguments}} for tc in tool_calls]
-            })
+            openai_messages.append(_assistant_tool_message(content, tool_calls))
             openai_messages.extend(tool_results)
             
             # Get final response
             final_response = client.chat.completions.create(
-                model="gpt-4o-mini",
+                model=settings.OPENAI_CHAT_MODEL,
                 messages=openai_messages
             )
             content = final_response.choices[0].message.content or content
@@ -388,34 +465,9 @@ If a user mentions PDFs, try to identify which PDFs they're referring to from co
         files = []
         
         for action in actions:
-            result = action.get("result", {})
-            
-            # Extract sources (from Q&A)
-            if "sources" in result:
-                sources.extend(result["sources"])
-            
-            # Extract file references
-            if "new_pdf_id" in result:
-                files.append({
-                    "type": "pdf",
-                    "pdf_id": result["new_pdf_id"],
-                    "filename": result.get("filename", "unknown.pdf")
-                })
-            elif "uploaded_pdfs" in result:
-                for pdf in result["uploaded_pdfs"]:
-                    files.append({
-                        "type": "pdf",
-                        "pdf_id": pdf["pdf_id"],
-                        "filename": pdf["filename"]
-                    })
-            elif "extracted_images" in result:
-                for img in result["extracted_images"]:
-                    files.append({
-                        "type": "image",
-                        "image_id": img["image_id"],
-                        "filename": img["filename"],
-                        "download_url": img["download_url"]
-                    })
+            action_sources, action_files = _action_outputs(action)
+            sources.extend(action_sources)
+            files.extend(action_files)
         
         return {
             "assistant_message": content,
@@ -432,3 +484,125 @@ If a user mentions PDFs, try to identify which PDFs they're referring to from co
             "files": []
         }
 
+
+def _stream_completion(client, openai_messages: List[Dict[str, Any]], tools: Optional[List[Dict]] = None):
+    """
+    Run a streaming chat completion.
+    
+    Yields ("token", text) for content deltas as they arrive, then one
+    ("completion", {"content": str, "tool_calls": [{"id", "name", "arguments"}]})
+    with the full message once the stream ends.
+    """
+    kwargs = {"tools": tools, "tool_choice": "auto"} if tools else {}
+    stream = client.chat.completions.create(
+        model=settings.OPENAI_CHAT_MODEL,
+        messages=openai_messages,
+        stream=True,
+        **kwargs
+    )
+    
+    content = []
+    tool_calls: Dict[int, Dict[str, str]] = {}  # Stream index -> call being assembled
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content.append(delta.content)
+            yield "token", delta.content
+        for tc in delta.tool_calls or []:
+            call = tool_calls.setdefault(tc.index, {"id": "", "name": "", "arguments": ""})
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function is not None:
+                call["name"] += tc.function.name or ""
+                call["arguments"] += tc.function.arguments or ""
+    
+    yield "completion", {
+        "content": "".join(content),
+        "tool_calls": [tool_calls[i] for i in sorted(tool_calls)]
+    }
+
+
+def stream_chat_with_ai(
+    messages: List[Dict[str, str]],
+    context: Optional[Dict[str, Any]] = None
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Chat with AI assistant using tool calling, streaming progress.
+    
+    Same conversation as chat_with_ai, but both model calls stream and
+    events are yielded as soon as they happen:
+        ("token", text)              assistant text as it is generated
+        ("tool_call", {...})         a tool is about to run (tool_call_id, name, arguments)
+        ("tool_result", {...})       it finished (tool_call_id, name, result)
+        ("sources", [...])           sources produced by a Q&A tool
+        ("files", [...])             files produced by a tool
+        ("done", {...})              final assistant_message, actions, sources, files
+    
+    Args:
+        messages: Chat history (list of {"role": "user"/"assistant", "content": "..."})
+        context: Optional context (e.g., uploaded PDFs)
+    
+    Yields:
+        (event name, payload) tuples
+    """
+    client = get_client()
+    if not client:
+        yield "token", NO_API_KEY_MESSAGE
+        yield "done", {"assistant_message": NO_API_KEY_MESSAGE, "actions": [], "sources": [], "files": []}
+        return
+    
+    openai_messages = _build_messages(messages, context)
+    actions = []
+    sources = []
+    files = []
+    
+    completion = None
+    for event, payload in _stream_completion(client, openai_messages, tools=get_tool_definitions()):
+        if event == "completion":
+            completion = payload
+        else:
+            yield event, payload
+    content = completion["content"]
+    
+    if completion["tool_calls"]:
+        tool_results = []
+        for tool_call in completion["tool_calls"]:
+            yield "tool_call", {
+                "tool_call_id": tool_call["id"],
+                "name": tool_call["name"],
+                "arguments": tool_call["arguments"]
+            }
+            tool_result, action = _run_tool_call(tool_call["id"], tool_call["name"], tool_call["arguments"])
+            tool_results.append(tool_result)
+            actions.append(action)
+            yield "tool_result", {
+                "tool_call_id": tool_call["id"],
+                "name": tool_call["name"],
+                "result": action["result"]
+            }
+            
+            action_sources, action_files = _action_outputs(action)
+            if action_sources:
+                sources.extend(action_sources)
+                yield "sources", action_sources
+            if action_files:
+                files.extend(action_files)
+                yield "files", action_files
+        
+        openai_messages.append(_assistant_tool_message(content, completion["tool_calls"]))
+        openai_messages.extend(tool_results)
+        
+        for event, payload in _stream_completion(client, openai_messages):
+            if event == "completion":
+                content = payload["content"] or content
+            else:
+                yield event, payload
+    
+    yield "done", {
+        "assistant_message": content,
+        "actions": actions,
+        "sources": sources,
+        "files": files
+    }
@@ -10,14 +10,16 @@ import io
 from PIL import Image
 
 from config import settings
+from doc_pool import shared_document, page_count, fitz_lock
 from pdf_utils import (
     get_pdf_path,
     generate_pdf_id,
-    save_uploaded_pdf,
+    save_uploaded_pdf_chunks,
+    iter_base64_chunks,
     extract_text_from_pdf,
     get_generated_pdf_path,
 )
-from rag_utils import answer_question_from_pdf, create_index_for_pdf
+from rag_utils import answer_question_from_pdfs, create_index_for_pdf, index_exists
 
 
 # ==================== PDF HANDLING TOOLS ====================
@@ -37,19 +39,23 @@ def upload_pdfs_tool(files_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         pdf_id = generate_pdf_id()
         filename = file_data.get('filename', f'{pdf_id}.pdf')
         
-        # Handle base64 or bytes
+        # Handle base64 or bytes (base64 is decoded incrementally while streaming to disk)
         content = file_data.get('content')
         if isinstance(content, str):
-            import base64
-            content = base64.b64decode(content)
+            chunks = iter_base64_chunks(content)
+        else:
+            step = settings.UPLOAD_CHUNK_SIZE
+            chunks = (content[start:start + step] for start in range(0, len(content), step))
+        storage_id, pdf_path = save_uploaded_pdf_chunks(chunks, pdf_id)
         
-        pdf_path = save_uploaded_pdf(content, pdf_id)
-        create_index_for_pdf(pdf_id, pdf_path)
+        # Identical content uploaded before shares its existing index
+        if not index_exists(storage_id):
+            create_index_for_pdf(storage_id, pdf_path)
         
         uploaded.append({
             'pdf_id': pdf_id,
             'filename': filename,
-            'page_count': len(fitz.open(pdf_path))
+            'page_count': page_count(pdf_path)
         })
     
     return {
@@ -70,20 +76,17 @@ def get_pdf_pages_tool(pdf_id: str) -> Dict[str, Any]:
     if not pdf_path:
         return {'error': f'PDF {pdf_id} not found'}
     
-    doc = fitz.open(pdf_path)
-    total_pages = len(doc)
     pages_info = []
-    
-    for page_num in range(total_pages):
-        page = doc[page_num]
-        text = page.get_text()[:200]  # First 200 chars as preview
-        pages_info.append({
-            'page_number': page_num + 1,
-            'preview_text': text.strip()[:100] if text.strip() else '(No text)',
-            'has_images': len(page.get_images()) > 0
-        })
-    
-    doc.close()
+    with shared_document(pdf_path) as doc:
+        total_pages = len(doc)
+        for page_num in range(total_pages):
+            page = doc[page_num]
+            text = page.get_text()[:200]  # First 200 chars as preview
+            pages_info.append({
+                'page_number': page_num + 1,
+                'preview_text': text.strip()[:100] if text.strip() else '(No text)',
+                'has_images': len(page.get_images()) > 0
+            })
     
     return {
         'pdf_id': pdf_id,
@@ -107,27 +110,29 @@ def split_pdf_tool(pdf_id: str, ranges: List[Dict[str, int]]) -> Dict[str, Any]:
     if not pdf_path:
         return {'error': f'PDF {pdf_id} not found'}
     
-    doc = fitz.open(pdf_path)
-    total_pages = len(doc)
     new_pdfs = []
     
     for i, range_info in enumerate(ranges):
-        start = range_info.get('start', 1) - 1  # Convert to 0-indexed
-        end = min(range_info.get('end', total_pages), total_pages) - 1
-        
-        if start < 0 or end < start:
-            continue
-        
-        # Create new PDF with selected pages
-        new_doc = fitz.open()
-        new_doc.insert_pdf(doc, from_page=start, to_page=end)
-        
-        new_pdf_id = generate_pdf_id()
-        new_path = settings.UPLOAD_DIR / f"{new_pdf_id}.pdf"
-        new_doc.save(new_path)
-        new_doc.close()
+        # Create new PDF with selected pages (PyMuPDF calls hold fitz_lock, see doc_pool)
+        with fitz_lock:
+            new_doc = fitz.open()
+            with shared_document(pdf_path) as doc:
+                total_pages = len(doc)
+                start = range_info.get('start', 1) - 1  # Convert to 0-indexed
+                end = min(range_info.get('end', total_pages), total_pages) - 1
+                if start >= 0 and end >= start:
+                    new_doc.insert_pdf(doc, from_page=start, to_page=end)
+            
+            if len(new_doc) == 0:
+                new_doc.close()
+                continue
+            
+            new_pdf_id = generate_pdf_id()
+            new_path = settings.UPLOAD_DIR / f"{new_pdf_id}.pdf"
+            new_doc.save(new_path)
+            new_doc.close()
         
-        create_index_for_pdf(new_pdf_id, new_path)
+        create_index_for_pdf(new_pdf_id, new_path, base_pdf_ids=[pdf_id])
         
         new_pdfs.append({
             'pdf_id': new_pdf_id,
@@ -135,8 +140,6 @@ def split_pdf_tool(pdf_id: str, ranges: List[Dict[str, int]]) -> Dict[str, Any]:
             'pages': f'{start+1}-{end+1}'
         })
     
-    doc.close()
-    
     return {
         'success': True,
         'original_pdf_id': pdf_id,
@@ -165,18 +168,17 @@ def merge_pdfs_tool(pdf_ids: List[str]) -> Dict[str, Any]:
         return {'error': 'No valid PDFs found to merge'}
     
     # Merge using PyMuPDF
-    merged_doc = fitz.open()
-    for pdf_path in pdf_paths:
-        src_doc = fitz.open(pdf_path)
-        merged_doc.insert_pdf(src_doc)
-        src_doc.close()
-    
     new_pdf_id = generate_pdf_id()
     new_path = settings.UPLOAD_DIR / f"{new_pdf_id}.pdf"
-    merged_doc.save(new_path)
-    merged_doc.close()
+    with fitz_lock:
+        merged_doc = fitz.open()
+        for pdf_path in pdf_paths:
+            with shared_document(pdf_path) as src_doc:
+                merged_doc.insert_pdf(src_doc)
+        merged_doc.save(new_path)
+        merged_doc.close()
     
-    create_index_for_pdf(new_pdf_id, new_path)
+    create_index_for_pdf(new_pdf_id, new_path, base_pdf_ids=pdf_ids)
     
     return {
         'success': True,
@@ -202,26 +204,23 @@ def reorder_pages_tool(pdf_id: str, new_order: List[int]) -> Dict[str, Any]:
     if not pdf_path:
         return {'error': f'PDF {pdf_id} not found'}
     
-    doc = fitz.open(pdf_path)
-    total_pages = len(doc)
-    
-    # Validate order
-    if len(new_order) != total_pages or set(new_order) != set(range(1, total_pages + 1)):
-        doc.close()
-        return {'error': 'Invalid page order'}
-    
-    # Create new PDF with reordered pages
-    new_doc = fitz.open()
-    for page_num in new_order:
-        new_doc.insert_pdf(doc, from_page=page_num-1, to_page=page_num-1)
-    
     new_pdf_id = generate_pdf_id()
     new_path = settings.UPLOAD_DIR / f"{new_pdf_id}.pdf"
-    new_doc.save(new_path)
-    new_doc.close()
-    doc.close()
+    with shared_document(pdf_path) as doc:
+        total_pages = len(doc)
+        
+        # Validate order
+        if len(new_order) != total_pages or set(new_order) != set(range(1, total_pages + 1)):
+            return {'error': 'Invalid page order'}
+        
+        # Create new PDF with reordered pages
+        new_doc = fitz.open()
+        for page_num in new_order:
+            new_doc.insert_pdf(doc, from_page=page_num-1, to_page=page_num-1)
+        new_doc.save(new_path)
+        new_doc.close()
     
-    create_index_for_pdf(new_pdf_id, new_path)
+    create_index_for_pdf(new_pdf_id, new_path, base_pdf_ids=[pdf_id])
     
     return {
         'success': True,
@@ -250,20 +249,23 @@ def rotate_pages_tool(pdf_id: str, pages: List[int], angle: int) -> Dict[str, An
     if not pdf_path:
         return {'error': f'PDF {pdf_id} not found'}
     
-    doc = fitz.open(pdf_path)
-    total_pages = len(doc)
-    
-    # Rotate specified pages
-    for page_num in pages:
-        if 1 <= page_num <= total_pages:
-            doc[page_num - 1].set_rotation(angle)
-    
     new_pdf_id = generate_pdf_id()
     new_path = settings.UPLOAD_DIR / f"{new_pdf_id}.pdf"
-    doc.save(new_path)
-    doc.close()
+    with shared_document(pdf_path) as src_doc:
+        # Rotate a copy: the pooled document is shared and must stay unchanged
+        doc = fitz.open()
+        doc.insert_pdf(src_doc)
+        total_pages = len(doc)
+        
+        # Rotate specified pages
+        for page_num in pages:
+            if 1 <= page_num <= total_pages:
+                doc[page_num - 1].set_rotation(angle)
+        
+        doc.save(new_path)
+        doc.close()
     
-    create_index_for_pdf(new_pdf_id, new_path)
+    create_index_for_pdf(new_pdf_id, new_path, base_pdf_ids=[pdf_id])
     
     return {
         'success': True,
@@ -290,22 +292,19 @@ def extract_pages_tool(pdf_id: str, pages: List[int]) -> Dict[str, Any]:
     if not pdf_path:
         return {'error': f'PDF {pdf_id} not found'}
     
-    doc = fitz.open(pdf_path)
-    total_pages = len(doc)
-    
     # Create new PDF with extracted pages
-    new_doc = fitz.open()
-    for page_num in sorted(set(pages)):
-        if 1 <= page_num <= total_pages:
-            new_doc.insert_pdf(doc, from_page=page_num-1, to_page=page_num-1)
-    
     new_pdf_id = generate_pdf_id()
     new_path = settings.UPLOAD_DIR / f"{new_pdf_id}.pdf"
-    new_doc.save(new_path)
-    new_doc.close()
-    doc.close()
+    with shared_document(pdf_path) as doc:
+        total_pages = len(doc)
+        new_doc = fitz.open()
+        for page_num in sorted(set(pages)):
+            if 1 <= page_num <= total_pages:
+                new_doc.insert_pdf(doc, from_page=page_num-1, to_page=page_num-1)
+        new_doc.save(new_path)
+        new_doc.close()
     
-    create_index_for_pdf(new_pdf_id, new_path)
+    create_index_for_pdf(new_pdf_id, new_path, base_pdf_ids=[pdf_id])
     
     return {
         'success': True,
@@ -370,35 +369,32 @@ def extract_images_tool(pdf_id: str, pages: Optional[List[int]] = None) -> Dict[
     if not pdf_path:
         return {'error': f'PDF {pdf_id} not found'}
     
-    doc = fitz.open(pdf_path)
     images = []
-    
-    for page_num in range(len(doc)):
-        if pages and (page_num + 1) not in pages:
-            continue
-        
-        page = doc[page_num]
-        image_list = page.get_images()
-        
-        for img_idx, img in enumerate(image_list):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
+    with shared_document(pdf_path) as doc:
+        for page_num in range(len(doc)):
+            if pages and (page_num + 1) not in pages:
+                continue
             
-            # Save image
-            image_id = f"{pdf_id}_p{page_num+1}_i{img_idx}"
-            image_path = settings.UPLOAD_DIR / f"{image_id}.png"
-            image_path.write_bytes(image_bytes)
+            page = doc[page_num]
+            image_list = page.get_images()
             
-            images.append({
-                'image_id': image_id,
-                'page_number': page_num + 1,
-                'filename': f"{image_id}.png",
-                'size_bytes': len(image_bytes),
-                'download_url': f"/api/pdf/download/{image_id}.png"
-            })
-    
-    doc.close()
+            for img_idx, img in enumerate(image_list):
+                xref = img[0]
+                base_image = doc.extract_image(xref)
+                image_bytes = base_image["image"]
+                
+                # Save image
+                image_id = f"{pdf_id}_p{page_num+1}_i{img_idx}"
+                image_path = settings.UPLOAD_DIR / f"{image_id}.png"
+                image_path.write_bytes(image_bytes)
+                
+                images.append({
+                    'image_id': image_id,
+                    'page_number': page_num + 1,
+                    'filename': f"{image_id}.png",
+                    'size_bytes': len(image_bytes),
+                    'download_url': f"/api/pdf/download/{image_id}.png"
+                })
     
     return {
         'pdf_id': pdf_id,
@@ -417,30 +413,18 @@ def qa_over_pdfs_tool(query: str, pdf_ids: List[str], max_chunks: int = 5) -> Di
     Returns:
         Dict with answer and sources
     """
-    all_sources = []
-    answers = []
+    available = [pdf_id for pdf_id in pdf_ids if get_pdf_path(pdf_id)]
     
-    for pdf_id in pdf_ids:
-        pdf_path = get_pdf_path(pdf_id)
-        if not pdf_path:
-            continue
-        
-        try:
-            result = answer_question_from_pdf(pdf_id, query, max_chunks=max_chunks)
-            if result:
-                answers.append(f"From {pdf_id}: {result.get('answer', '')}")
-                sources = result.get('sources', [])
-                for src in sources:
-                    src['pdf_id'] = pdf_id
-                    all_sources.append(src)
-        except Exception as e:
-            print(f"Error answering question for {pdf_id}: {e}")
-    
-    combined_answer = '\n\n'.join(answers) if answers else "I couldn't find relevant information in the provided PDFs."
+    try:
+        # One query embedding and (with the global index) one search for all PDFs
+        answer, sources = answer_question_from_pdfs(available, query, max_chunks=max_chunks)
+    except Exception as e:
+        print(f"Error answering question for {pdf_ids}: {e}")
+        answer, sources = "I couldn't find relevant information in the provided PDFs.", []
     
     return {
-        'answer': combined_answer,
-        'sources': all_sources[:max_chunks * len(pdf_ids)],
+        'answer': answer,
+        'sources': sources,
         'pdf_ids': pdf_ids
     }
 
@@ -501,34 +485,31 @@ def extract_tables_tool(pdf_id: str, pages: Optional[List[int]] = None) -> Dict[
     if not pdf_path:
         return {'error': f'PDF {pdf_id} not found'}
     
-    doc = fitz.open(pdf_path)
     tables = []
-    
-    for page_num in range(len(doc)):
-        if pages and (page_num + 1) not in pages:
-            continue
-        
-        page = doc[page_num]
-        # PyMuPDF table extraction (basic)
-        # In production, use more advanced table extraction
-        text = page.get_text()
-        
-        # Simple table detection (look for tab-separated or structured text)
-        lines = text.split('\n')
-        potential_tables = []
-        
-        for line in lines:
-            if '\t' in line or '|' in line:
-                potential_tables.append(line)
-        
-        if potential_tables:
-            tables.append({
-                'page_number': page_num + 1,
-                'table_data': potential_tables[:10],  # Limit to first 10 rows
-                'row_count': len(potential_tables)
-            })
-    
-    doc.close()
+    with shared_document(pdf_path) as doc:
+        for page_num in range(len(doc)):
+            if pages and (page_num + 1) not in pages:
+                continue
+            
+            page = doc[page_num]
+            # PyMuPDF table extraction (basic)
+            # In production, use more advanced table extraction
+            text = page.get_text()
+            
+            # Simple table detection (look for tab-separated or structured text)
+            lines = text.split('\n')
+            potential_tables = []
+            
+            for line in lines:
+                if '\t' in line or '|' in line:
+                    potential_tables.append(line)
+            
+            if potential_tables:
+                tables.append({
+                    'page_number': page_num + 1,
+                    'table_data': potential_tables[:10],  # Limit to first 10 rows
+                    'row_count': len(potential_tables)
+                })
     
     return {
         'pdf_id': pdf_id,
@@ -0,0 +1,88 @@
+"""
+Throughput/accuracy report for the embedding backends (EMBEDDING_BACKEND).
+
+Embeds the same chunks with each backend and reports chunks/sec plus the
+min/mean cosine similarity of every backend's vectors to PyTorch's, marked
+pass/fail against EMBEDDING_BACKEND_MIN_COSINE.
+
+Usage (from the backend folder):
+    python benchmarks/embedding_benchmark.py                   # chunks of indexed PDFs
+    python benchmarks/embedding_benchmark.py --pdf-ids ID1 ID2
+    python benchmarks/embedding_benchmark.py --backends torch onnx-int8 --chunks 2000
+    python benchmarks/embedding_benchmark.py --text-file chunks.txt
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings  # noqa: E402
+from chunk_metadata import load_chunk_metadata  # noqa: E402
+from embedding_backends import (  # noqa: E402
+    available_backends,
+    load_embedding_model,
+    compare_with_reference,
+    BACKEND_TORCH,
+)
+
+
+def load_chunks(args):
+    """Chunk texts from --text-file (one per line) or from stored chunk metadata."""
+    if args.text_file:
+        return [line.strip() for line in open(args.text_file, encoding='utf-8') if line.strip()]
+
+    if args.pdf_ids:
+        paths = [settings.INDEX_DIR / f"{pdf_id}_meta.chunks" for pdf_id in args.pdf_ids]
+    else:
+        paths = sorted(settings.INDEX_DIR.glob("*_meta.chunks"))
+    chunks = []
+    for path in paths:
+        metadata = load_chunk_metadata(path)
+        chunks.extend(metadata.text(i) for i in range(len(metadata)))
+    if not chunks:
+        raise SystemExit("No chunks found - upload some PDFs or use --text-file")
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-ids", nargs="*", help="Indexes to take chunks from (default: all in INDEX_DIR)")
+    parser.add_argument("--text-file", help="Text file with one chunk per line")
+    parser.add_argument("--chunks", type=int, default=1000, help="Maximum chunks to embed")
+    parser.add_argument("--backends", nargs="*", default=available_backends())
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args)[:args.chunks]
+    print(f"Model: {settings.EMBEDDING_MODEL}, {len(chunks)} chunks, batch size {args.batch_size}, "
+          f"min cosine {settings.EMBEDDING_BACKEND_MIN_COSINE}\n")
+
+    reference = load_embedding_model(BACKEND_TORCH)
+    backends = [BACKEND_TORCH] + [b for b in args.backends if b != BACKEND_TORCH]
+
+    print(f"{'backend':<10} {'load s':>7} {'chunks/s':>9} {'speedup':>8} {'min cos':>8} {'mean cos':>9} {'result':>7}")
+    baseline = None
+    for backend in backends:
+        start = time.perf_counter()
+        model = reference if backend == BACKEND_TORCH else load_embedding_model(backend)
+        load_s = time.perf_counter() - start
+
+        model.encode(chunks[:args.batch_size], batch_size=args.batch_size, show_progress_bar=False)  # Warm up
+        start = time.perf_counter()
+        model.encode(chunks, batch_size=args.batch_size, show_progress_bar=False)
+        rate = len(chunks) / (time.perf_counter() - start)
+        if baseline is None:
+            baseline = rate
+
+        similarity = compare_with_reference(model, reference, chunks[:min(len(chunks), 256)])
+        passed = similarity['min_cosine'] >= settings.EMBEDDING_BACKEND_MIN_COSINE
+        print(f"{backend:<10} {load_s:>7.1f} {rate:>9.1f} {rate / baseline:>7.2f}x "
+              f"{similarity['min_cosine']:>8.4f} {similarity['mean_cosine']:>9.4f} {'pass' if passed else 'FAIL':>7}")
+
+
+if __name__ == "__main__":
+    main()
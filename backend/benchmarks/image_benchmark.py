@@ -0,0 +1,107 @@
+"""
+Output size and CPU time of image insertion.
+
+Inserts each image into a one-page PDF the way add_image_to_pdf does and
+compares the previous pipeline (decode with PIL, composite alpha onto
+white, re-encode as PNG, save) with the current one (JPEG/JPEG 2000
+passed through, native alpha, image streams deflated on save), optionally
+downsampled to --dpi for the placement.
+
+Usage (from the backend folder):
+    python benchmarks/image_benchmark.py                         # generated photo and logo
+    python benchmarks/image_benchmark.py --images photo.jpg logo.png --dpi 150
+    python benchmarks/image_benchmark.py --width 200 --height 150 --repeat 10
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings  # noqa: E402
+from pdf_utils import _image_stream  # noqa: E402
+
+
+def legacy_image_stream(image_data):
+    """The previous pipeline: always decode, flatten alpha and re-encode as PNG."""
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode == 'RGBA':
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[3])
+        img = rgb_img
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='PNG')
+    return img_bytes.getvalue()
+
+
+def sample_images():
+    """A noisy 3000x2000 photo-like JPEG and a 1200x1200 RGBA PNG logo."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:2000, 0:3000]
+    photo = np.stack([x * 255 // 3000, y * 255 // 2000, (x + y) * 255 // 5000], axis=-1)
+    photo = np.clip(photo + rng.normal(0, 12, photo.shape), 0, 255).astype(np.uint8)
+    jpeg = io.BytesIO()
+    Image.fromarray(photo).save(jpeg, format='JPEG', quality=90)
+
+    logo = np.zeros((1200, 1200, 4), dtype=np.uint8)
+    yy, xx = np.mgrid[0:1200, 0:1200]
+    circle = (xx - 600) ** 2 + (yy - 600) ** 2 < 500 ** 2
+    logo[circle] = (200, 30, 60, 255)
+    png = io.BytesIO()
+    Image.fromarray(logo).save(png, format='PNG')
+    return {'photo.jpg': jpeg.getvalue(), 'logo.png': png.getvalue()}
+
+
+def run(image_data, make_stream, width, height, repeat, deflate_images):
+    """CPU seconds per insertion (stream preparation + insert + save) and PDF size."""
+    start = time.process_time()
+    for _ in range(repeat):
+        doc = fitz.open()
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(fitz.Rect(50, 50, 50 + width, 50 + height), stream=make_stream(image_data))
+        pdf_bytes = doc.tobytes(deflate_images=deflate_images)
+        doc.close()
+    return (time.process_time() - start) / repeat, len(pdf_bytes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", nargs="*", help="Image files (default: generated photo and logo)")
+    parser.add_argument("--width", type=float, default=400, help="Placement width in points")
+    parser.add_argument("--height", type=float, default=300, help="Placement height in points")
+    parser.add_argument("--dpi", type=int, default=150, help="Target DPI for the downsampled variant")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.images:
+        images = {Path(path).name: Path(path).read_bytes() for path in args.images}
+    else:
+        images = sample_images()
+
+    def fast(data):
+        return _image_stream(data, args.width, args.height)
+
+    print(f"Placement {args.width:g}x{args.height:g} pt, {args.repeat} runs each\n")
+    print(f"{'image':<20} {'pipeline':<16} {'CPU ms':>8} {'PDF KB':>9} {'vs legacy':>9}")
+    for name, data in images.items():
+        variants = [("legacy PNG", legacy_image_stream), ("passthrough", fast)]
+        if args.dpi > 0:
+            variants.append((f"{args.dpi} dpi", fast))
+        baseline = None
+        for label, make_stream in variants:
+            settings.IMAGE_TARGET_DPI = args.dpi if label.endswith("dpi") else 0
+            legacy = make_stream is legacy_image_stream
+            cpu_s, size = run(data, make_stream, args.width, args.height, args.repeat, not legacy)
+            if baseline is None:
+                baseline = size
+            print(f"{name:<20} {label:<16} {cpu_s * 1000:>8.1f} {size / 1024:>9.1f} {size / baseline:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Recall/latency report for the FAISS index types in vector_index.
+
+Compares HNSW (several efSearch values) and IVF-PQ (several nprobe values)
+against exact Flat search on our own embeddings, so INDEX_* settings can
+be picked from data.
+
+Usage (from the backend folder):
+    python benchmarks/index_benchmark.py                  # all indexes in INDEX_DIR
+    python benchmarks/index_benchmark.py --pdf-ids ID1 ID2
+    python benchmarks/index_benchmark.py --synthetic 200000
+    python benchmarks/index_benchmark.py --query-file questions.txt
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings  # noqa: E402
+from vector_index import build_index, normalize_for_index, INDEX_FLAT, INDEX_HNSW, INDEX_IVFPQ  # noqa: E402
+
+
+def load_corpus(pdf_ids):
+    """Reconstruct stored vectors from per-PDF indexes (exact for Flat/HNSW indexes)."""
+    if pdf_ids:
+        paths = [settings.INDEX_DIR / f"{pdf_id}_index.faiss" for pdf_id in pdf_ids]
+    else:
+        paths = sorted(settings.INDEX_DIR.glob("*_index.faiss"))
+
+    blocks = []
+    for path in paths:
+        index = faiss.read_index(str(path))
+        if hasattr(index, 'id_map'):
+            index = faiss.downcast_index(index.index)  # Vectors in storage order
+        try:
+            blocks.append(index.reconstruct_n(0, index.ntotal))
+        except RuntimeError:
+            print(f"Skipping {path.name}: vectors cannot be reconstructed")
+    if not blocks:
+        raise SystemExit("No vectors found - upload some PDFs or use --synthetic N")
+    return np.vstack(blocks).astype('float32')
+
+
+def make_queries(corpus, args):
+    """Encode --query-file questions, or perturb a sample of corpus vectors."""
+    if args.query_file:
+        from rag_utils import encode_queries
+        lines = [line.strip() for line in open(args.query_file, encoding='utf-8') if line.strip()]
+        return encode_queries(lines)
+
+    rng = np.random.default_rng(1)
+    sample = corpus[rng.choice(len(corpus), min(args.queries, len(corpus)), replace=False)]
+    noise = rng.normal(scale=0.05 * float(np.abs(corpus).mean()), size=sample.shape)
+    return (sample + noise).astype('float32')
+
+
+def serialized_mb(index):
+    return faiss.serialize_index(index).nbytes / 1e6
+
+
+def measure(index, queries, k, truth):
+    """Recall@k against exact results plus per-query latency (batch size 1)."""
+    prepared = normalize_for_index(index, queries)
+    latencies = []
+    found = []
+    for row in prepared:
+        start = time.perf_counter()
+        _, ids = index.search(row.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    recall = hits / (len(truth) * k)
+    return recall, float(np.mean(latencies)), float(np.percentile(latencies, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-ids", nargs="*", help="Index IDs to combine (default: all in INDEX_DIR)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N random 384-d vectors instead")
+    parser.add_argument("--query-file", help="Text file with one question per line (needs the embedding model)")
+    parser.add_argument("--queries", type=int, default=200, help="Sampled queries when no query file is given")
+    parser.add_argument("-k", type=int, default=settings.DEFAULT_MAX_CHUNKS)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        corpus = np.random.default_rng(0).normal(size=(args.synthetic, 384)).astype('float32')
+    else:
+        corpus = load_corpus(args.pdf_ids)
+    queries = make_queries(corpus, args)
+    k = min(args.k, len(corpus))
+    print(f"Corpus: {len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries, k={k}, "
+          f"metric={settings.INDEX_METRIC}\n")
+
+    exact = build_index(corpus, INDEX_FLAT)
+    _, truth = exact.search(normalize_for_index(exact, queries), k)
+
+    rows = []
+    recall, mean_ms, p95_ms = measure(exact, queries, k, truth)
+    rows.append(("flat", "-", 0.0, serialized_mb(exact), recall, mean_ms, p95_ms))
+
+    start = time.perf_counter()
+    hnsw = build_index(corpus, INDEX_HNSW)
+    build_s = time.perf_counter() - start
+    for ef in (16, 32, 64, 128, 256):
+        hnsw.hnsw.efSearch = ef
+        recall, mean_ms, p95_ms = measure(hnsw, queries, k, truth)
+        rows.append(("hnsw", f"efSearch={ef}", build_s, serialized_mb(hnsw), recall, mean_ms, p95_ms))
+
+    if len(corpus) >= 1000:
+        start = time.perf_counter()
+        ivfpq = build_index(corpus, INDEX_IVFPQ)
+        build_s = time.perf_counter() - start
+        ivf = faiss.extract_index_ivf(ivfpq)
+        for nprobe in (1, 4, 8, 16, 32, 64):
+            if nprobe > ivf.nlist:
+                break
+            ivf.nprobe = nprobe
+            recall, mean_ms, p95_ms = measure(ivfpq, queries, k, truth)
+            rows.append(("ivfpq", f"nprobe={nprobe}", build_s, serialized_mb(ivfpq), recall, mean_ms, p95_ms))
+
+    print(f"{'index':<7} {'params':<14} {'build s':>8} {'size MB':>9} {'recall@' + str(k):>10} {'mean ms':>9} {'p95 ms':>8}")
+    for name, params, build_s, size_mb, recall, mean_ms, p95_ms in rows:
+        print(f"{name:<7} {params:<14} {build_s:>8.2f} {size_mb:>9.2f} {recall:>10.3f} {mean_ms:>9.3f} {p95_ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
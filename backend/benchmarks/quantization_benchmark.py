@@ -0,0 +1,95 @@
+"""
+Memory/recall report for quantized vector storage (INDEX_QUANTIZATION).
+
+Builds the same index with float32, float16, int8 (sq8) and PQ storage and
+reports index size, memory saved and recall@k against exact float32
+search - both straight from the quantized index and after re-ranking
+k * INDEX_RERANK_FACTOR candidates against full-precision vectors, as
+rag_utils does at query time.
+
+Usage (from the backend folder):
+    python benchmarks/quantization_benchmark.py                  # all indexes in INDEX_DIR
+    python benchmarks/quantization_benchmark.py --pdf-ids ID1 ID2
+    python benchmarks/quantization_benchmark.py --synthetic 100000 --index-type hnsw
+    python benchmarks/quantization_benchmark.py --query-file questions.txt
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings  # noqa: E402
+from vector_index import build_index, normalize_for_index, QUANTIZATIONS, INDEX_FLAT, INDEX_HNSW  # noqa: E402
+from index_benchmark import load_corpus, make_queries, serialized_mb  # noqa: E402
+
+
+def rerank(index, queries, corpus, candidates, k):
+    """Re-score candidate IDs with full-precision vectors (same rule as rag_utils._rerank_exact)."""
+    results = []
+    for query, ids in zip(queries, candidates):
+        ids = np.unique(ids[ids >= 0])
+        if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            scores = corpus[ids] @ query
+        else:
+            scores = -((corpus[ids] - query) ** 2).sum(axis=1)
+        results.append(ids[np.argsort(-scores, kind='stable')[:k]])
+    return results
+
+
+def recall(found, truth, k):
+    return sum(len(set(f) & set(t)) for f, t in zip(found, truth)) / (len(truth) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-ids", nargs="*", help="Index IDs to combine (default: all in INDEX_DIR)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N random 384-d vectors instead")
+    parser.add_argument("--query-file", help="Text file with one question per line (needs the embedding model)")
+    parser.add_argument("--queries", type=int, default=200, help="Sampled queries when no query file is given")
+    parser.add_argument("--index-type", choices=(INDEX_FLAT, INDEX_HNSW), default=INDEX_FLAT)
+    parser.add_argument("--rerank-factor", type=int, default=settings.INDEX_RERANK_FACTOR)
+    parser.add_argument("-k", type=int, default=settings.DEFAULT_MAX_CHUNKS)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        corpus = np.random.default_rng(0).normal(size=(args.synthetic, 384)).astype('float32')
+    else:
+        corpus = load_corpus(args.pdf_ids)
+    queries = make_queries(corpus, args)
+    k = min(args.k, len(corpus))
+    depth = min(k * max(1, args.rerank_factor), len(corpus))
+
+    exact = build_index(corpus, INDEX_FLAT, quantization="none")
+    corpus = normalize_for_index(exact, corpus)  # As stored in the *_vectors.npy files
+    prepared = normalize_for_index(exact, queries)
+    _, truth = exact.search(prepared, k)
+    print(f"Corpus: {len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries, k={k}, "
+          f"index={args.index_type}, re-rank depth={depth}, metric={settings.INDEX_METRIC}\n")
+
+    baseline_mb = None
+    print(f"{'storage':<8} {'size MB':>9} {'saved':>7} {'recall@' + str(k):>10} {'reranked':>9} {'ms/query':>9}")
+    for quantization in QUANTIZATIONS:
+        index = build_index(corpus, args.index_type, quantization=quantization)
+        size_mb = serialized_mb(index)
+        if baseline_mb is None:
+            baseline_mb = size_mb
+
+        start = time.perf_counter()
+        _, found = index.search(prepared, depth)
+        reranked = rerank(index, prepared, corpus, found, k)
+        ms = (time.perf_counter() - start) * 1000 / len(prepared)
+
+        print(f"{quantization:<8} {size_mb:>9.2f} {baseline_mb / size_mb:>6.1f}x "
+              f"{recall(found[:, :k], truth, k):>10.3f} {recall(reranked, truth, k):>9.3f} {ms:>9.3f}")
+
+    print(f"\nFull-precision vectors for re-ranking: {corpus.nbytes / 1e6:.2f} MB on disk "
+          f"(memory-mapped; only candidate rows are read)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Cold-start report for the API process.
+
+Imports main in fresh interpreters and reports the import time (median
+over several runs) plus the slowest modules from python -X importtime.
+With --warmup it also times the startup warmup (embedding model load and
+first encode) and the first query embedding before and after it.
+
+openai, the AI tool modules and sentence_transformers are imported on
+first use. faiss and fitz (PyMuPDF) stay eager: every PDF route (upload,
+indexing, chat, edits) needs them on its first request, and they are used
+in type annotations and at module level across rag_utils, vector_index,
+global_index, pdf_utils, edit_sessions, doc_pool and ai_tools. Deferring
+them would only move their import time from startup onto the first upload
+or question each worker serves. Their share of "import main" is reported
+separately below.
+
+Usage (from the backend folder):
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 10 --top 25
+    python benchmarks/startup_benchmark.py --warmup
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Timed in a fresh interpreter; prints the seconds spent importing main
+_IMPORT_SCRIPT = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+
+_WARMUP_SCRIPT = """
+import time
+import main
+from rag_utils import encode_queries
+
+start = time.perf_counter()
+encode_queries(["first question before warmup?"])
+print("cold_first_query", time.perf_counter() - start)
+"""
+
+_WARMED_SCRIPT = """
+import time
+import main
+from rag_utils import encode_queries
+from warmup import run_warmup, get_warmup_status
+
+run_warmup()
+state = get_warmup_status()
+print("warmup", state['finished_at'] - state['started_at'])
+for step, seconds in state['steps'].items():
+    print("step_" + step, seconds)
+start = time.perf_counter()
+encode_queries(["first question after warmup?"])
+print("warm_first_query", time.perf_counter() - start)
+"""
+
+
+def run_python(args, script):
+    return subprocess.run(
+        [sys.executable, *args, "-c", script],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+
+
+# Imported eagerly on purpose (see module docstring)
+EAGER_MODULES = ("faiss", "fitz")
+
+
+def import_times():
+    """(cumulative us, self us, module) of every module imported by main (python -X importtime)."""
+    stderr = run_python(["-X", "importtime"], "import main").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def parse(stdout):
+    values = {}
+    for line in stdout.splitlines():
+        key, _, value = line.partition(" ")
+        try:
+            values[key] = float(value)
+        except ValueError:
+            pass
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time 'import main' in")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--warmup", action="store_true", help="Also time warmup and the first query embedding")
+    args = parser.parse_args()
+
+    times = [float(run_python([], _IMPORT_SCRIPT).stdout.split()[-1]) for _ in range(args.runs)]
+    print(f"import main: median {statistics.median(times) * 1000:.0f} ms "
+          f"(min {min(times) * 1000:.0f}, max {max(times) * 1000:.0f}, {args.runs} runs)\n")
+
+    rows = import_times()
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>13.1f} {self_us / 1000:>8.1f}  {name}")
+
+    eager = {name.strip(): cumulative_us for cumulative_us, _, name in rows if name.strip() in EAGER_MODULES}
+    print(f"\nKept eager (needed by every PDF route): "
+          + ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in eager.items()))
+
+    if args.warmup:
+        cold = parse(run_python([], _WARMUP_SCRIPT).stdout)
+        warmed = parse(run_python([], _WARMED_SCRIPT).stdout)
+        print(f"\nFirst query embedding without warmup: {cold['cold_first_query'] * 1000:.0f} ms")
+        print(f"Warmup: {warmed['warmup'] * 1000:.0f} ms "
+              f"({', '.join(f'{k[5:]} {v * 1000:.0f} ms' for k, v in warmed.items() if k.startswith('step_'))})")
+        print(f"First query embedding after warmup: {warmed['warm_first_query'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
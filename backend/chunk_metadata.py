@@ -0,0 +1,223 @@
+"""
+Compact columnar storage for chunk metadata.
+Replaces pickled lists of {'page_number', 'text_chunk'} dicts with a single
+memory-mappable file, so queries only touch the rows they return and
+loading never executes pickle.
+
+File layout (little endian):
+    magic        8 bytes   b"PDFCHNK2"
+    count        uint64    number of chunks (n)
+    page_numbers int32[n]  1-indexed page number of each chunk (padded to 8 bytes)
+    chunk_ids    int64[n]  vector ID of each chunk in the FAISS index, ascending
+    offsets      int64[n+1] byte offsets of each chunk in the text blob
+    text         bytes     UTF-8 chunk texts, concatenated
+
+Version 1 files (b"PDFCHNK1") have no chunk_ids column; their vector IDs
+are the row numbers.
+"""
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+MAGIC = b"PDFCHNK2"
+MAGIC_V1 = b"PDFCHNK1"
+_HEADER_SIZE = len(MAGIC) + 8
+
+
+def _padded(size: int) -> int:
+    """Round a byte size up to a multiple of 8 (keeps int64 columns aligned)."""
+    return (size + 7) & ~7
+
+
+class ChunkMetadata(Sequence):
+    """
+    Read-only view of a chunk metadata file.
+
+    Behaves like the old list of dicts: len(metadata) and
+    metadata[i] -> {'page_number': int, 'text_chunk': str}, decoding only
+    the requested row.
+    """
+
+    def __init__(
+        self,
+        page_numbers: np.ndarray,
+        offsets: np.ndarray,
+        text: Union[np.ndarray, bytes],
+        chunk_ids: Optional[np.ndarray] = None
+    ):
+        self.page_numbers = page_numbers
+        self.offsets = offsets
+        self._text = text
+        self._chunk_ids = chunk_ids  # None: vector IDs are row numbers
+
+    def __len__(self) -> int:
+        return len(self.page_numbers)
+
+    def __getitem__(self, idx: int) -> Dict[str, Union[int, str]]:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Chunk index {idx} out of range")
+        return {
+            'page_number': int(self.page_numbers[idx]),
+            'text_chunk': self.text(idx),
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Union[int, str]]]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def text(self, idx: int) -> str:
+        """Decode the text of one chunk."""
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return bytes(self._text[start:end]).decode('utf-8')
+
+    @property
+    def chunk_ids(self) -> np.ndarray:
+        """Vector ID of each row in the FAISS index."""
+        if self._chunk_ids is None:
+            return np.arange(len(self), dtype='int64')
+        return self._chunk_ids
+
+    def rows_for_ids(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Map FAISS vector IDs to metadata rows.
+
+        Args:
+            ids: Vector IDs (FAISS pads missing results with -1)
+
+        Returns:
+            Row of each ID, or -1 for IDs not in this document
+        """
+        ids = np.asarray(ids, dtype='int64')
+        if self._chunk_ids is None:
+            return np.where((ids >= 0) & (ids < len(self)), ids, -1)
+        rows = np.searchsorted(self._chunk_ids, ids)
+        found = rows < len(self)
+        found[found] = self._chunk_ids[rows[found]] == ids[found]
+        return np.where(found, rows, -1)
+
+    @property
+    def text_bytes(self) -> int:
+        """Size of the UTF-8 text blob."""
+        return len(self._text)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes of the per-row columns (the text blob is paged in on demand)."""
+        ids_bytes = self._chunk_ids.nbytes if self._chunk_ids is not None else 0
+        return self.page_numbers.nbytes + self.offsets.nbytes + ids_bytes
+
+
+def write_chunk_metadata(
+    path: Path,
+    page_numbers: List[int],
+    chunks: List[str],
+    chunk_ids: Optional[Sequence[int]] = None
+):
+    """
+    Write chunk metadata atomically (temp file + rename).
+
+    Args:
+        path: Destination file
+        page_numbers: 1-indexed page number of each chunk
+        chunks: Chunk texts, same length as page_numbers
+        chunk_ids: Strictly ascending vector ID of each chunk (default: row numbers)
+
+    Raises:
+        ValueError: If chunk_ids are not strictly ascending
+    """
+    encoded = [chunk.encode('utf-8') for chunk in chunks]
+    count = len(encoded)
+    pages = np.asarray(page_numbers, dtype='<i4')
+    if chunk_ids is None:
+        ids = np.arange(count, dtype='<i8')
+    else:
+        ids = np.asarray(chunk_ids, dtype='<i8')
+        if count > 1 and not np.all(ids[1:] > ids[:-1]):
+            raise ValueError("chunk_ids must be strictly ascending")
+    offsets = np.zeros(count + 1, dtype='<i8')
+    if count:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(count).astype('<u8').tobytes())
+        f.write(pages.tobytes())
+        f.write(b"\0" * (_padded(pages.nbytes) - pages.nbytes))
+        f.write(ids.tobytes())
+        f.write(offsets.tobytes())
+        for b in encoded:
+            f.write(b)
+    os.replace(tmp_path, path)
+
+
+def load_chunk_metadata(path: Path, mmap: bool = True) -> ChunkMetadata:
+    """
+    Load chunk metadata.
+
+    Args:
+        path: Metadata file written by write_chunk_metadata
+        mmap: Memory-map the file (default) instead of reading it into RAM
+
+    Returns:
+        ChunkMetadata view
+
+    Raises:
+        ValueError: If the file is not a chunk metadata file
+    """
+    if mmap:
+        data = np.memmap(path, dtype='uint8', mode='r')
+    else:
+        data = np.fromfile(path, dtype='uint8')
+
+    magic = bytes(data[:len(MAGIC)])
+    if magic not in (MAGIC, MAGIC_V1):
+        raise ValueError(f"{path} is not a chunk metadata file")
+
+    count = int(data[len(MAGIC):_HEADER_SIZE].view('<u8')[0])
+    pages_start = _HEADER_SIZE
+    ids_start = pages_start + _padded(count * 4)
+    offsets_start = ids_start + (count * 8 if magic == MAGIC else 0)
+    text_start = offsets_start + (count + 1) * 8
+
+    page_numbers = data[pages_start:pages_start + count * 4].view('<i4')
+    chunk_ids = data[ids_start:offsets_start].view('<i8') if magic == MAGIC else None
+    offsets = data[offsets_start:text_start].view('<i8')
+    text = data[text_start:]
+    return ChunkMetadata(page_numbers, offsets, text, chunk_ids)
+
+
+def migrate_pickled_metadata(pkl_path: Path, path: Path, remove_legacy: bool = True) -> int:
+    """
+    Convert a legacy pickled metadata file to the columnar format.
+
+    Only use this on .pkl files this application wrote itself - unpickling
+    untrusted files can execute arbitrary code.
+
+    Args:
+        pkl_path: Legacy {pdf_id}_meta.pkl file
+        path: Destination columnar metadata file
+        remove_legacy: Delete the .pkl file after a successful conversion
+
+    Returns:
+        Number of chunks migrated
+    """
+    with open(pkl_path, 'rb') as f:
+        rows = pickle.load(f)
+
+    write_chunk_metadata(
+        path,
+        [row['page_number'] for row in rows],
+        [row['text_chunk'] for row in rows]
+    )
+    if remove_legacy:
+        pkl_path.unlink(missing_ok=True)
+    return len(rows)
@@ -18,9 +18,52 @@ class Settings(BaseSettings):
     UPLOAD_DIR: Path = BASE_DIR / "data" / "uploads"
     GENERATED_DIR: Path = BASE_DIR / "data" / "generated"
     INDEX_DIR: Path = BASE_DIR / "data" / "indexes"
+    EDIT_SESSION_DIR: Path = BASE_DIR / "data" / "sessions"  # Working copies of documents being edited
+    
+    # Content-hash registry used to deduplicate identical uploads
+    REGISTRY_DB_PATH: Path = BASE_DIR / "data" / "registry.sqlite3"
     
     # Embedding model
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"  # torch, onnx or onnx-int8 (dynamically quantized, CPU)
+    EMBEDDING_ONNX_QUANTIZATION: str = "avx2"  # onnx-int8 config: arm64, avx2, avx512 or avx512_vnni
+    EMBEDDING_MODEL_DIR: Path = BASE_DIR / "data" / "models"  # Exported ONNX models
+    EMBEDDING_BACKEND_VALIDATE: bool = False  # Compare against torch at load; fall back if out of tolerance
+    EMBEDDING_BACKEND_MIN_COSINE: float = 0.99  # Minimum cosine similarity to torch embeddings
+    EMBEDDING_SERVER_SOCKET: Optional[Path] = None  # Shared model server (embedding_server.py); None encodes in-process
+    EMBEDDING_SERVER_AUTHKEY: str = ""  # Optional shared secret between server and workers
+    EMBEDDING_SERVER_TIMEOUT: float = 30.0  # Seconds to wait for an encode reply before falling back
+    EMBEDDING_SERVER_RETRY_SECONDS: float = 10.0  # Delay before retrying an unreachable server
+    WARMUP_ON_STARTUP: bool = False  # Load and warm up the embedding model in the background at startup (see GET /ready)
+    
+    # Text extraction settings
+    EXTRACT_WORKERS: int = min(4, os.cpu_count() or 1)  # Processes for parallel page extraction
+    PARALLEL_EXTRACT_MIN_PAGES: int = 64  # Smaller documents are extracted serially
+    
+    # Persistent chunk embedding store (reused across split/merge/re-uploads)
+    EMBEDDING_STORE_ENABLED: bool = True
+    EMBEDDING_STORE_PATH: Path = BASE_DIR / "data" / "embeddings.sqlite3"
+    EMBEDDING_STORE_MAX_ENTRIES: int = 500_000  # ~750 MB at 384 dimensions
+    EMBEDDING_STORE_TOUCH_SECONDS: float = 3600  # Lookups refresh an entry's LRU time at most this often
+    
+    # Vector index settings
+    INDEX_TYPE: str = "auto"  # auto, flat, hnsw or ivfpq
+    INDEX_METRIC: str = "cosine"  # cosine (normalized inner product) or l2
+    INDEX_HNSW_MIN_VECTORS: int = 20_000  # auto: HNSW from this many chunks
+    INDEX_IVFPQ_MIN_VECTORS: int = 200_000  # auto: IVF-PQ from this many chunks
+    INDEX_HNSW_M: int = 32
+    INDEX_HNSW_EF_CONSTRUCTION: int = 80
+    INDEX_HNSW_EF_SEARCH: int = 64  # Search-time: higher = better recall, slower
+    INDEX_IVF_NLIST: int = 0  # 0 = about 4 * sqrt(n)
+    INDEX_IVF_NPROBE: int = 16  # Search-time: lists scanned per query
+    INDEX_PQ_M: int = 48  # PQ sub-quantizers (reduced to a divisor of the dimension)
+    INDEX_MAX_TRAINING_VECTORS: int = 100_000
+    INDEX_QUANTIZATION: str = "none"  # Flat/HNSW vector storage: none (float32), fp16, sq8 (int8) or pq
+    INDEX_RERANK_FACTOR: int = 4  # Quantized indexes: re-rank k * factor candidates with exact vectors
+    
+    # Global multi-document index (one filtered search for cross-document questions)
+    GLOBAL_INDEX_ENABLED: bool = False
+    GLOBAL_INDEX_NAME: str = "global"  # Use one name per tenant to keep their vectors apart
     
     # Chunking settings
     CHUNK_SIZE: int = 400  # Characters per chunk
@@ -28,6 +71,52 @@ class Settings(BaseSettings):
     
     # RAG settings
     DEFAULT_MAX_CHUNKS: int = 5
+    CHAT_BATCH_MAX_QUERIES: int = 256  # Questions per /api/pdf/chat/batch request
+    
+    # Hybrid retrieval: BM25 and vector rankings fused with reciprocal rank fusion
+    RETRIEVAL_MODE: str = "hybrid"  # hybrid, vector or lexical (lexical never loads the embedding model)
+    HYBRID_CANDIDATE_FACTOR: int = 4  # Each ranking contributes max_chunks * factor candidates
+    RRF_K: int = 60  # Rank offset in 1 / (RRF_K + rank)
+    BM25_K1: float = 1.2  # Term frequency saturation
+    BM25_B: float = 0.75  # Chunk length normalization
+    LEXICAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Memory budget for loaded BM25 indexes
+    METADATA_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Memory budget for chunk metadata of global/lexical hits
+    INDEX_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # Memory budget for loaded indexes (0 disables)
+    
+    # Index residency tiers: hot = read into RAM, warm = memory-mapped, cold = on disk only
+    INDEX_MMAP_ENABLED: bool = True  # Load non-hot indexes with mmap (shared page cache across workers)
+    INDEX_MMAP_MIN_BYTES: int = 16 * 1024 * 1024  # Smaller indexes are always read into RAM
+    INDEX_HOT_MIN_HITS: int = 3  # Queries within the window that make an index hot
+    INDEX_HOT_WINDOW_SECONDS: int = 300
+    INDEX_HOT_IDLE_SECONDS: int = 600  # Idle hot indexes are demoted to warm (mmapped)
+    INDEX_WARM_IDLE_SECONDS: int = 3600  # Idle warm indexes are unloaded (cold)
+    INDEX_TIER_SWEEP_SECONDS: int = 30  # Minimum interval between tier demotion sweeps
+    
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0  # Concurrent query embeddings are coalesced within this window (0 disables)
+    EMBEDDING_BATCH_MAX_SIZE: int = 64  # Maximum queries per coalesced model call
+    QUERY_CACHE_MAX_ENTRIES: int = 4096  # Cached query embeddings (0 disables)
+    QUERY_CACHE_CASEFOLD: bool = True  # Match queries case-insensitively (default model is uncased)
+    
+    # Editing settings
+    EDIT_BATCH_MAX_OPERATIONS: int = 1000  # Operations per /api/pdf/edit/batch request
+    EDIT_SESSION_MAX_OPEN: int = 16  # Open documents kept in memory; least recently used are checkpointed and closed
+    EDIT_SESSION_IDLE_SECONDS: int = 300  # Idle open documents are checkpointed and closed
+    EDIT_SESSION_EXPIRE_SECONDS: int = 24 * 3600  # Sessions untouched this long are deleted
+    IMAGE_TARGET_DPI: int = 0  # Downsample inserted images above this resolution at their placed size (0 keeps originals)
+    IMAGE_JPEG_QUALITY: int = 85  # Quality of JPEGs re-encoded when downsampling
+    
+    # Upload settings
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes read/written per upload chunk
+    
+    # Shared pool of open documents for read-only use (AI tools, text extraction)
+    DOC_POOL_MAX_DOCUMENTS: int = 32  # Open documents kept; least recently used are closed
+    DOC_POOL_IDLE_SECONDS: int = 300  # Documents unused this long are closed
+    
+    # Background ingestion settings
+    INGEST_WORKERS: int = 2  # Concurrent indexing jobs
+    INGEST_MAX_PENDING: int = 64  # Queued + running jobs before uploads are rejected
+    INGEST_JOB_RETENTION_SECONDS: int = 3600  # Keep finished job records this long
+    EMBEDDING_PROGRESS_BATCH: int = 256  # Chunks embedded between progress updates
     
     # CORS settings
     CORS_ORIGINS: list[str] = [
@@ -39,6 +128,7 @@ class Settings(BaseSettings):
     
     # API keys (for future LLM integration)
     OPENAI_API_KEY: Optional[str] = None
+    OPENAI_CHAT_MODEL: str = "gpt-4o-mini"  # Model used by /api/ai/chat
     
     class Config:
         env_file = ".env"
@@ -54,6 +144,7 @@ def ensure_directories():
     settings.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
     settings.GENERATED_DIR.mkdir(parents=True, exist_ok=True)
     settings.INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    settings.EDIT_SESSION_DIR.mkdir(parents=True, exist_ok=True)
 
 
 # Initialize directories on import
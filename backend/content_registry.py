@@ -0,0 +1,182 @@
+"""
+Content-addressed registry for uploaded PDFs.
+Maps the SHA-256 of an upload to the stored file/index it shares, so
+re-uploading identical bytes creates an alias instead of redoing work.
+Stored in SQLite so every worker process sees the same reference counts.
+"""
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from config import settings
+
+
+_local = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    sha256 TEXT PRIMARY KEY,
+    storage_id TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    pdf_id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL REFERENCES documents(sha256)
+);
+CREATE INDEX IF NOT EXISTS aliases_by_sha ON aliases(sha256);
+"""
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Get this thread's registry connection (created on first use)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(
+            settings.REGISTRY_DB_PATH,
+            timeout=30,
+            isolation_level=None  # Explicit transactions below
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def find_storage_id(sha256: str) -> Optional[str]:
+    """
+    Look up the stored document for a content hash.
+
+    Args:
+        sha256: Hex SHA-256 of the PDF bytes
+
+    Returns:
+        Storage ID (the pdf_id whose file and index are shared), or None
+    """
+    row = _get_connection().execute(
+        "SELECT storage_id FROM documents WHERE sha256 = ?", (sha256,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def register_upload(pdf_id: str, sha256: str, size: int = 0) -> str:
+    """
+    Register a new pdf_id for the given content.
+
+    The first pdf_id seen for a hash becomes its storage ID; later ones are
+    aliases that share its file and index.
+
+    Args:
+        pdf_id: Newly generated PDF identifier
+        sha256: Hex SHA-256 of the PDF bytes
+        size: Size of the PDF in bytes
+
+    Returns:
+        Storage ID whose artifacts this pdf_id should use
+    """
+    conn = _get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT storage_id FROM documents WHERE sha256 = ?", (sha256,)
+        ).fetchone()
+        if row:
+            storage_id = row[0]
+        else:
+            storage_id = pdf_id
+            conn.execute(
+                "INSERT INTO documents (sha256, storage_id, size, created_at) VALUES (?, ?, ?, ?)",
+                (sha256, storage_id, size, time.time())
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO aliases (pdf_id, sha256) VALUES (?, ?)",
+            (pdf_id, sha256)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return storage_id
+
+
+def resolve_pdf_id(pdf_id: str) -> Optional[str]:
+    """
+    Resolve a pdf_id to the ID its file and index are stored under.
+
+    PDFs that were never registered (e.g. derived by split/merge tools)
+    resolve to themselves.
+
+    Args:
+        pdf_id: PDF identifier
+
+    Returns:
+        Storage ID, or None if the pdf_id was deleted while aliases of its
+        content still exist
+    """
+    conn = _get_connection()
+    row = conn.execute(
+        "SELECT d.storage_id FROM aliases a JOIN documents d ON a.sha256 = d.sha256 "
+        "WHERE a.pdf_id = ?",
+        (pdf_id,)
+    ).fetchone()
+    if row:
+        return row[0]
+
+    # A storage ID whose own alias was released is no longer addressable
+    released = conn.execute(
+        "SELECT 1 FROM documents WHERE storage_id = ?", (pdf_id,)
+    ).fetchone()
+    return None if released else pdf_id
+
+
+def release_pdf_id(pdf_id: str) -> Optional[str]:
+    """
+    Drop a pdf_id's reference to its stored content.
+
+    Args:
+        pdf_id: PDF identifier being deleted
+
+    Returns:
+        Storage ID whose artifacts should now be deleted (no references
+        remain), or None if other aliases still use them
+    """
+    conn = _get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT a.sha256, d.storage_id FROM aliases a JOIN documents d ON a.sha256 = d.sha256 "
+            "WHERE a.pdf_id = ?",
+            (pdf_id,)
+        ).fetchone()
+        if not row:
+            conn.execute("COMMIT")
+            # Unregistered PDFs own their artifacts outright
+            return resolve_pdf_id(pdf_id)
+
+        sha256, storage_id = row
+        conn.execute("DELETE FROM aliases WHERE pdf_id = ?", (pdf_id,))
+        remaining = conn.execute(
+            "SELECT COUNT(*) FROM aliases WHERE sha256 = ?", (sha256,)
+        ).fetchone()[0]
+        if remaining == 0:
+            conn.execute("DELETE FROM documents WHERE sha256 = ?", (sha256,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return storage_id if remaining == 0 else None
+
+
+def forget_content(sha256: str):
+    """Remove a content hash whose stored file has gone missing."""
+    conn = _get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM aliases WHERE sha256 = ?", (sha256,))
+        conn.execute("DELETE FROM documents WHERE sha256 = ?", (sha256,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
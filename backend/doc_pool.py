@@ -0,0 +1,175 @@
+"""
+Shared pool of open PDF documents.
+Read-only users (AI tools, text extraction) borrow a fitz.Document from
+this pool instead of opening and re-parsing the file on every call, so
+several tools run in one chat turn parse it once.
+
+Handles are keyed by stored file; pdf_ids of identical uploads share one
+stored file and so one handle. Each handle is reference counted. The pool
+holds at most DOC_POOL_MAX_DOCUMENTS documents and closes those idle for
+DOC_POOL_IDLE_SECONDS; a handle evicted while borrowed is closed when its
+last borrower returns it.
+
+PyMuPDF does not support concurrent use from several threads, not even of
+different documents (they share MuPDF's global context). Every PyMuPDF
+call in the API process - pooled or not - must therefore be made while
+holding fitz_lock; borrowing a pooled document holds it. Work that needs
+parallelism runs in worker processes (see pdf_utils._extract_text_parallel).
+
+Borrowed documents must not be modified: copy pages into a new document
+(insert_pdf) instead.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+import fitz  # PyMuPDF
+
+from config import settings
+
+
+# Serializes all PyMuPDF use in this process (reentrant, so locked code may nest).
+# Other locks (e.g. an edit session's) may be held when acquiring it; while it is
+# held only the pool's own lock may be taken, so waits cannot form a cycle.
+fitz_lock = threading.RLock()
+
+
+def fitz_locked(func: Callable) -> Callable:
+    """Decorator: run the whole function while holding fitz_lock."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with fitz_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class _PooledDocument:
+    """An open document plus its borrow count."""
+
+    def __init__(self, path: Path, signature: Tuple[int, int]):
+        self.doc = fitz.open(path)
+        self.signature = signature  # (mtime_ns, size) of the file when opened
+        self.refs = 0
+        self.last_used = time.monotonic()
+        self.retired = False  # Dropped from the pool; close once no longer borrowed
+
+
+_documents: "OrderedDict[str, _PooledDocument]" = OrderedDict()
+_pool_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'idle_closes': 0, 'invalidations': 0}
+
+
+def _retire(key: str):
+    """Remove an entry from the pool (call with _pool_lock held)."""
+    entry = _documents.pop(key)
+    entry.retired = True
+    if entry.refs == 0:
+        entry.doc.close()
+
+
+def _evict():
+    """Close idle documents and trim the pool to its size (call with _pool_lock held)."""
+    now = time.monotonic()
+    for key, entry in list(_documents.items()):
+        if entry.refs == 0 and now - entry.last_used >= settings.DOC_POOL_IDLE_SECONDS:
+            _retire(key)
+            _stats['idle_closes'] += 1
+    # Least recently used first; borrowed documents are closed when returned
+    while len(_documents) > max(1, settings.DOC_POOL_MAX_DOCUMENTS):
+        _retire(next(iter(_documents)))
+        _stats['evictions'] += 1
+
+
+def _acquire(pdf_path: Path) -> _PooledDocument:
+    """Get (opening if needed) and reference a pooled document (call with fitz_lock held)."""
+    key = str(Path(pdf_path).resolve())
+    stat = Path(pdf_path).stat()  # Raises FileNotFoundError for missing files
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _pool_lock:
+        entry = _documents.get(key)
+        if entry is not None and entry.signature != signature:
+            _retire(key)  # File replaced on disk
+            _stats['invalidations'] += 1
+            entry = None
+        if entry is None:
+            entry = _PooledDocument(pdf_path, signature)
+            _documents[key] = entry
+            _stats['misses'] += 1
+        else:
+            _documents.move_to_end(key)
+            _stats['hits'] += 1
+        entry.refs += 1
+        entry.last_used = time.monotonic()
+        _evict()
+    return entry
+
+
+def _return(entry: _PooledDocument):
+    """Drop a reference, closing a retired document (call with fitz_lock held)."""
+    with _pool_lock:
+        entry.refs -= 1
+        entry.last_used = time.monotonic()
+        if entry.retired and entry.refs == 0:
+            entry.doc.close()
+
+
+@contextmanager
+def shared_document(pdf_path: Path) -> Iterator[fitz.Document]:
+    """
+    Borrow the pooled document for a PDF file.
+
+    fitz_lock is held until the block exits; do not modify the document
+    or keep references to it (or its pages) afterwards.
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Yields:
+        Open fitz.Document
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    with fitz_lock:
+        entry = _acquire(pdf_path)
+        try:
+            yield entry.doc
+        finally:
+            _return(entry)
+
+
+def page_count(pdf_path: Path) -> int:
+    """Number of pages of a PDF, using the pooled document."""
+    with shared_document(pdf_path) as doc:
+        return len(doc)
+
+
+def evict_document(pdf_path: Path):
+    """Close a PDF's pooled document (e.g. before its file is deleted)."""
+    key = str(Path(pdf_path).resolve())
+    with fitz_lock, _pool_lock:
+        if key in _documents:
+            _retire(key)
+            _stats['invalidations'] += 1
+
+
+def close_all_documents():
+    """Close every pooled document (borrowed ones once returned)."""
+    with fitz_lock, _pool_lock:
+        for key in list(_documents):
+            _retire(key)
+
+
+def get_doc_pool_stats() -> Dict[str, Any]:
+    """Pool occupancy and hit/eviction counters."""
+    with _pool_lock:
+        return dict(
+            _stats,
+            open_documents=len(_documents),
+            borrowed=sum(1 for entry in _documents.values() if entry.refs > 0),
+            max_documents=settings.DOC_POOL_MAX_DOCUMENTS,
+        )
@@ -0,0 +1,402 @@
+"""
+Editing sessions.
+A session keeps a working copy of an uploaded PDF open as a fitz.Document
+so successive edits mutate it in place instead of re-opening and
+re-saving the original for every change. Checkpoints use PyMuPDF
+incremental saves, which append only the changed objects to the working
+file.
+
+Open documents live in an LRU pool (EDIT_SESSION_MAX_OPEN) with an idle
+TTL (EDIT_SESSION_IDLE_SECONDS); evicted documents are checkpointed and
+closed, and reopened from their working file on next use. Sessions are
+held in this process, so multi-worker deployments need sticky routing.
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from config import settings
+from doc_pool import fitz_lock, fitz_locked
+from pdf_utils import apply_edit_operations, get_pdf_path
+
+
+class EditSessionNotFoundError(Exception):
+    """Raised when a session ID is unknown or has expired."""
+
+
+@fitz_locked
+def _page_count(path: Path) -> int:
+    with fitz.open(path) as doc:
+        return len(doc)
+
+
+class EditSession:
+    """One document being edited: its working file and, while in the pool, its open Document."""
+
+    def __init__(self, session_id: str, pdf_id: str, path: Path):
+        self.session_id = session_id
+        self.pdf_id = pdf_id
+        self.path = path
+        self.doc: Optional[fitz.Document] = None
+        self.lock = threading.RLock()  # Serializes edits, checkpoints and closing
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.edits = 0
+        self.checkpoints = 0
+        self.dirty = False  # Edits not yet written to the working file
+        self.closed = False  # Deleted; no further use
+
+    @fitz_locked
+    def open(self) -> fitz.Document:
+        """The session's document, reopened from the working file if needed (call with lock held)."""
+        if self.closed:
+            raise EditSessionNotFoundError(f"Edit session {self.session_id} not found")
+        if self.doc is None:
+            self.doc = fitz.open(self.path)
+        return self.doc
+
+    @fitz_locked
+    def checkpoint(self) -> int:
+        """
+        Write pending edits to the working file (call with lock held).
+
+        Uses an incremental save when possible, so only changed objects are
+        appended; falls back to a full rewrite (e.g. for repaired files).
+        The working file keeps every earlier revision, so it is never
+        published as is (see save_session).
+
+        Returns:
+            Bytes written
+        """
+        if self.doc is None or not self.dirty:
+            return 0
+        size_before = self.path.stat().st_size
+        if self.doc.can_save_incrementally():
+            # Images PyMuPDF decoded on insert would otherwise be appended uncompressed
+            self.doc.save(
+                self.path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP,
+                deflate=True, deflate_images=True
+            )
+            written = self.path.stat().st_size - size_before
+        else:
+            tmp_path = self.path.with_suffix(".tmp")
+            self.doc.save(tmp_path, garbage=1, deflate=True, deflate_images=True)
+            self.doc.close()
+            os.replace(tmp_path, self.path)
+            self.doc = fitz.open(self.path)
+            written = self.path.stat().st_size
+        self.dirty = False
+        self.checkpoints += 1
+        return written
+
+    @fitz_locked
+    def release(self):
+        """Checkpoint and close the open document, keeping the session (call with lock held)."""
+        if self.doc is not None:
+            self.checkpoint()
+            self.doc.close()
+            self.doc = None
+
+    @fitz_locked
+    def info(self) -> Dict[str, Any]:
+        """Session state for API responses (call with lock held)."""
+        return {
+            'session_id': self.session_id,
+            'pdf_id': self.pdf_id,
+            'page_count': len(self.doc) if self.doc is not None else _page_count(self.path),
+            'edits': self.edits,
+            'checkpoints': self.checkpoints,
+            'dirty': self.dirty,
+            'size_bytes': self.path.stat().st_size,
+            'in_memory': self.doc is not None,
+        }
+
+
+# All sessions of this process, and the subset with an open document (LRU order)
+_sessions: Dict[str, EditSession] = {}
+_open_pool: "OrderedDict[str, EditSession]" = OrderedDict()
+_pool_lock = threading.Lock()
+_stats = {'opened': 0, 'reopened': 0, 'evictions': 0, 'idle_closes': 0, 'expired': 0}
+_SWEEP_SECONDS = 30  # Minimum interval between idle/expiry sweeps
+_last_sweep = 0.0
+
+
+def _release(sessions: List[EditSession]):
+    """
+    Checkpoint and close documents dropped from the pool.
+
+    Call without holding any session lock: two threads evicting each
+    other's sessions would otherwise deadlock.
+    """
+    for session in sessions:
+        with session.lock:
+            if session.session_id not in _open_pool:  # Not reused meanwhile
+                session.release()
+
+
+def _touch(session: EditSession) -> List[EditSession]:
+    """
+    Mark a session used and keep its document in the pool.
+
+    Returns:
+        Least recently used sessions evicted to make room (pass to _release)
+    """
+    evicted = []
+    with _pool_lock:
+        session.last_used = time.monotonic()
+        if session.session_id in _open_pool:
+            _open_pool.move_to_end(session.session_id)
+        else:
+            _open_pool[session.session_id] = session
+        while len(_open_pool) > max(1, settings.EDIT_SESSION_MAX_OPEN):
+            _, oldest = _open_pool.popitem(last=False)
+            evicted.append(oldest)
+            _stats['evictions'] += 1
+    return evicted
+
+
+def sweep_sessions(force: bool = False):
+    """
+    Close idle open documents and delete expired sessions and working files.
+
+    Runs at most once every 30 seconds unless forced.
+    """
+    global _last_sweep
+    now = time.monotonic()
+    with _pool_lock:
+        if not force and now - _last_sweep < _SWEEP_SECONDS:
+            return
+        _last_sweep = now
+        idle = [
+            s for s in _open_pool.values()
+            if now - s.last_used >= settings.EDIT_SESSION_IDLE_SECONDS
+        ]
+        for session in idle:
+            del _open_pool[session.session_id]
+        expired = [
+            s for s in _sessions.values()
+            if now - s.last_used >= settings.EDIT_SESSION_EXPIRE_SECONDS
+        ]
+        _stats['idle_closes'] += len(idle)
+        _stats['expired'] += len(expired)
+
+    _release(idle)
+    for session in expired:
+        delete_session(session.session_id)
+    _remove_orphaned_files()
+
+
+def _remove_orphaned_files():
+    """Delete expired working files of sessions this process does not know (e.g. from before a restart)."""
+    if not settings.EDIT_SESSION_DIR.exists():
+        return
+    cutoff = time.time() - settings.EDIT_SESSION_EXPIRE_SECONDS
+    for path in settings.EDIT_SESSION_DIR.glob("*.pdf"):
+        with _pool_lock:
+            known = path.stem in _sessions
+        try:
+            if not known and path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _get_session(session_id: str) -> EditSession:
+    sweep_sessions()
+    with _pool_lock:
+        session = _sessions.get(session_id)
+    if session is None:
+        raise EditSessionNotFoundError(f"Edit session {session_id} not found")
+    return session
+
+
+def _use(session: EditSession) -> List[EditSession]:
+    """
+    Open the session's document (call with session lock held) and mark it used.
+
+    Returns:
+        Evicted sessions, to pass to _release once the session lock is dropped
+    """
+    if session.doc is None:
+        with _pool_lock:
+            _stats['reopened'] += 1
+    session.open()
+    return _touch(session)
+
+
+def open_session(pdf_id: str) -> Dict[str, Any]:
+    """
+    Start an editing session on an uploaded PDF.
+
+    The upload is copied to a working file (uploads are shared between
+    identical files, so they are never modified in place).
+
+    Args:
+        pdf_id: Identifier of the source PDF
+
+    Returns:
+        Session info (see EditSession.info)
+
+    Raises:
+        FileNotFoundError: If the PDF does not exist
+    """
+    sweep_sessions()
+    source_path = get_pdf_path(pdf_id)
+    if not source_path:
+        raise FileNotFoundError(f"PDF with id {pdf_id} not found")
+
+    session_id = uuid.uuid4().hex
+    settings.EDIT_SESSION_DIR.mkdir(parents=True, exist_ok=True)
+    path = settings.EDIT_SESSION_DIR / f"{session_id}.pdf"
+    shutil.copyfile(source_path, path)
+
+    session = EditSession(session_id, pdf_id, path)
+    evicted = []
+    try:
+        with session.lock:
+            session.open()
+            with _pool_lock:
+                _sessions[session_id] = session
+                _stats['opened'] += 1
+            evicted = _touch(session)
+            return session.info()
+    finally:
+        _release(evicted)
+
+
+def apply_session_edits(
+    session_id: str,
+    operations: List[Dict[str, Any]],
+    images: Optional[List[bytes]] = None
+) -> Dict[str, Any]:
+    """
+    Apply edit operations to a session's document in memory.
+
+    Args:
+        session_id: Session identifier
+        operations: Ordered edit operations (see pdf_utils.apply_edit_operations)
+        images: Image file contents referenced by add_image operations
+
+    Returns:
+        Session info
+
+    Raises:
+        EditSessionNotFoundError: If the session does not exist
+        ValueError: If an operation is invalid (earlier operations stay applied)
+    """
+    session = _get_session(session_id)
+    evicted = []
+    try:
+        with session.lock:
+            evicted = _use(session)
+            # Operations before a failing one have already changed the document
+            session.dirty = True
+            with fitz_lock:
+                apply_edit_operations(session.doc, operations, images)
+            session.edits += len(operations)
+            return session.info()
+    finally:
+        _release(evicted)  # After the session lock is dropped
+
+
+def checkpoint_session(session_id: str) -> Dict[str, Any]:
+    """
+    Write a session's pending edits to its working file (incremental save).
+
+    Returns:
+        Session info plus bytes_written by this checkpoint
+    """
+    session = _get_session(session_id)
+    evicted = []
+    try:
+        with session.lock:
+            evicted = _use(session)
+            written = session.checkpoint()
+            return dict(session.info(), bytes_written=written)
+    finally:
+        _release(evicted)
+
+
+def save_session(session_id: str) -> str:
+    """
+    Checkpoint a session and write its document to GENERATED_DIR.
+
+    The output is a full, garbage-collected save: the incrementally saved
+    working file still contains earlier revisions, including deleted pages.
+    The session stays open for further edits.
+
+    Returns:
+        Filename of the generated PDF
+    """
+    session = _get_session(session_id)
+    evicted = []
+    try:
+        with session.lock:
+            evicted = _use(session)
+            session.checkpoint()
+            output_filename = f"{session.pdf_id}_edited_{uuid.uuid4().hex[:8]}.pdf"
+            with fitz_lock:
+                session.doc.save(
+                    settings.GENERATED_DIR / output_filename,
+                    garbage=3, deflate=True, deflate_images=True
+                )
+            return output_filename
+    finally:
+        _release(evicted)
+
+
+def get_session_info(session_id: str) -> Dict[str, Any]:
+    """Session info (does not reopen a closed document)."""
+    session = _get_session(session_id)
+    with session.lock:
+        if session.closed:
+            raise EditSessionNotFoundError(f"Edit session {session_id} not found")
+        return session.info()
+
+
+def delete_session(session_id: str) -> bool:
+    """
+    Discard a session, its open document and working file.
+
+    Returns:
+        True if the session existed
+    """
+    with _pool_lock:
+        session = _sessions.pop(session_id, None)
+        _open_pool.pop(session_id, None)
+    if session is None:
+        return False
+    with session.lock:
+        if session.doc is not None:
+            with fitz_lock:
+                session.doc.close()
+            session.doc = None
+        session.closed = True
+        session.path.unlink(missing_ok=True)
+    return True
+
+
+def close_all_sessions():
+    """Checkpoint and close every open document (sessions stay usable)."""
+    with _pool_lock:
+        sessions = list(_open_pool.values())
+        _open_pool.clear()
+    _release(sessions)
+
+
+def get_session_stats() -> Dict[str, Any]:
+    """Pool occupancy and eviction counters."""
+    with _pool_lock:
+        return dict(
+            _stats,
+            sessions=len(_sessions),
+            open_documents=len(_open_pool),
+            max_open=settings.EDIT_SESSION_MAX_OPEN,
+        )
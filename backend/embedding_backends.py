@@ -0,0 +1,176 @@
+"""
+Embedding model backends.
+Loads the configured embedding model on PyTorch, ONNX Runtime, or ONNX
+Runtime with a dynamically quantized int8 model (fastest on CPU-only
+nodes), and checks alternative backends against PyTorch.
+
+ONNX backends need the optional extras: pip install "sentence-transformers[onnx]"
+"""
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Protocol
+
+import numpy as np
+
+from config import settings
+
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+BACKEND_ONNX_INT8 = "onnx-int8"
+
+
+class EmbeddingModel(Protocol):
+    """What the rest of the backend needs from an embedding model (SentenceTransformer-compatible)."""
+
+    def encode(self, sentences: List[str], batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        ...
+
+
+# Backend name -> loader(model name) returning an EmbeddingModel
+_backends: Dict[str, Callable[[str], EmbeddingModel]] = {}
+
+
+def register_backend(name: str, loader: Callable[[str], EmbeddingModel]):
+    """
+    Register an embedding backend.
+
+    Args:
+        name: Value of EMBEDDING_BACKEND that selects it
+        loader: Callable taking the model name and returning a model
+    """
+    _backends[name] = loader
+
+
+def available_backends() -> List[str]:
+    return list(_backends)
+
+
+def load_embedding_model(backend: Optional[str] = None, model_name: Optional[str] = None) -> EmbeddingModel:
+    """
+    Load an embedding model on the given backend.
+
+    Args:
+        backend: Backend name (default EMBEDDING_BACKEND)
+        model_name: Model name or path (default EMBEDDING_MODEL)
+
+    Returns:
+        Loaded model
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend not in _backends:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}' (expected {', '.join(_backends)})")
+    return _backends[backend](model_name or settings.EMBEDDING_MODEL)
+
+
+def embedding_model_key(backend: Optional[str] = None, model_name: Optional[str] = None) -> str:
+    """
+    Identifier of the vectors a model/backend produces, used to key cached embeddings.
+
+    PyTorch keeps the bare model name so existing cached embeddings stay
+    valid; other backends get their own key space.
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    model_name = model_name or settings.EMBEDDING_MODEL
+    if backend == BACKEND_TORCH:
+        return model_name
+    if backend == BACKEND_ONNX_INT8:
+        return f"{model_name}#{backend}-{settings.EMBEDDING_ONNX_QUANTIZATION}"
+    return f"{model_name}#{backend}"
+
+
+# ==================== Built-in backends ====================
+
+def _load_torch(model_name: str) -> EmbeddingModel:
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _load_onnx(model_name: str) -> EmbeddingModel:
+    from sentence_transformers import SentenceTransformer
+    # Uses the model's published ONNX export, or exports it on first load
+    return SentenceTransformer(model_name, backend="onnx")
+
+
+def _onnx_model_dir(model_name: str) -> Path:
+    """Local directory for the exported and quantized ONNX model."""
+    return settings.EMBEDDING_MODEL_DIR / re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name)
+
+
+def _load_onnx_int8(model_name: str) -> EmbeddingModel:
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    config = settings.EMBEDDING_ONNX_QUANTIZATION
+    file_name = f"onnx/model_qint8_{config}.onnx"
+    model_dir = _onnx_model_dir(model_name)
+
+    if not (model_dir / file_name).exists():
+        # Export once: ONNX model plus tokenizer/config, then an int8 copy next to it
+        print(f"Exporting int8 ONNX model ({config}) for {model_name} to {model_dir}")
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save(str(model_dir))
+        export_dynamic_quantized_onnx_model(model, config, str(model_dir))
+
+    return SentenceTransformer(str(model_dir), backend="onnx", model_kwargs={"file_name": file_name})
+
+
+register_backend(BACKEND_TORCH, _load_torch)
+register_backend(BACKEND_ONNX, _load_onnx)
+register_backend(BACKEND_ONNX_INT8, _load_onnx_int8)
+
+
+# ==================== Validation ====================
+
+VALIDATION_SENTENCES = [
+    "What is the termination notice period in section 4.2?",
+    "The invoice total includes VAT at the standard rate.",
+    "Error code E-1042 indicates the sensor is disconnected.",
+    "Quarterly revenue grew 12% compared with the previous year.",
+    "Patients should take the medication twice daily with food.",
+    "SKU-88310 ships in packs of twelve units.",
+]
+
+
+def compare_with_reference(
+    model: EmbeddingModel,
+    reference: EmbeddingModel,
+    texts: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """
+    Cosine similarity between a model's embeddings and a reference model's.
+
+    Args:
+        model: Model under test (e.g. ONNX int8)
+        reference: Reference model (PyTorch)
+        texts: Texts to embed (default: a few representative sentences)
+
+    Returns:
+        Dict with min_cosine and mean_cosine over the texts
+    """
+    texts = texts or VALIDATION_SENTENCES
+    a = np.asarray(model.encode(texts, show_progress_bar=False), dtype='float32')
+    b = np.asarray(reference.encode(texts, show_progress_bar=False), dtype='float32')
+    cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1) + 1e-12)
+    return {'min_cosine': float(cosine.min()), 'mean_cosine': float(cosine.mean())}
+
+
+def validate_backend(model: EmbeddingModel, backend: str, model_name: Optional[str] = None) -> bool:
+    """
+    Check a non-PyTorch backend against PyTorch (EMBEDDING_BACKEND_MIN_COSINE).
+
+    Loads the PyTorch model temporarily, so only call this at startup or
+    from benchmarks.
+
+    Returns:
+        True if every validation sentence is within tolerance
+    """
+    if backend == BACKEND_TORCH:
+        return True
+    result = compare_with_reference(model, _load_torch(model_name or settings.EMBEDDING_MODEL))
+    ok = result['min_cosine'] >= settings.EMBEDDING_BACKEND_MIN_COSINE
+    print(f"Embedding backend {backend} vs torch: min cosine {result['min_cosine']:.4f}, "
+          f"mean {result['mean_cosine']:.4f} ({'ok' if ok else 'below tolerance'})")
+    return ok
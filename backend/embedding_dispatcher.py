@@ -0,0 +1,160 @@
+"""
+Cross-request micro-batching of query embeddings.
+Concurrent chat requests each embed one short query; encoding them one by
+one wastes most of a forward pass. The dispatcher queues encode requests
+from all threads and a single worker encodes whatever arrived within a
+short window (EMBEDDING_BATCH_WINDOW_MS, up to EMBEDDING_BATCH_MAX_SIZE
+texts) in one model call, then hands each caller its rows.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_backends import EmbeddingModel
+
+
+# Recent requests kept for queueing-delay percentiles
+_RECENT_REQUESTS = 1024
+
+
+class EmbeddingDispatcher:
+    """Coalesces concurrent encode() calls into batched model calls."""
+
+    def __init__(
+        self,
+        get_model: Callable[[], EmbeddingModel],
+        window_ms: float,
+        max_batch_size: int
+    ):
+        """
+        Args:
+            get_model: Returns the embedding model (called on the worker thread)
+            window_ms: How long the first request of a batch waits for company
+            max_batch_size: Maximum texts per model call
+        """
+        self._get_model = get_model
+        self.window = max(0.0, window_ms) / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        # Items: (texts, future, enqueue time); None stops the worker
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future, float]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self._batches = 0
+        self._requests = 0
+        self._texts = 0
+        self._max_batch_texts = 0
+        self._recent_delays = deque(maxlen=_RECENT_REQUESTS)  # Queueing delay (s) per request
+        self._encode_time = 0.0
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts as part of the next batch (blocks until done).
+
+        Args:
+            texts: Texts to embed (one caller's texts stay in one batch)
+
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            raise ValueError("No texts to encode")
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((list(texts), future, time.perf_counter()))
+        return future.result()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._run, name="embedding-dispatcher", daemon=True
+                    )
+                    self._worker.start()
+
+    def _run(self):
+        carry = None  # Request that did not fit in the previous batch
+        stopping = False
+        while not stopping:
+            item = carry if carry is not None else self._queue.get()
+            carry = None
+            if item is None:
+                return
+
+            batch = [item]
+            size = len(item[0])
+            deadline = item[2] + self.window
+            while size < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                if size + len(item[0]) > self.max_batch_size:
+                    carry = item
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch: List[Tuple[List[str], Future, float]]):
+        """Run one model call for a batch and resolve its futures."""
+        start = time.perf_counter()
+        texts = [text for texts, _, _ in batch for text in texts]
+        try:
+            embeddings = np.asarray(
+                self._get_model().encode(texts, batch_size=len(texts), show_progress_bar=False),
+                dtype='float32'
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._texts += len(texts)
+            self._max_batch_texts = max(self._max_batch_texts, len(texts))
+            self._recent_delays.extend(start - enqueued for _, _, enqueued in batch)
+            self._encode_time += elapsed
+
+        offset = 0
+        for request_texts, future, _ in batch:
+            future.set_result(embeddings[offset:offset + len(request_texts)])
+            offset += len(request_texts)
+
+    def close(self):
+        """Stop the worker after the queued requests are served."""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+
+    def stats(self) -> Dict:
+        """Batch size and queueing delay metrics."""
+        with self._lock:
+            delays_ms = np.array(self._recent_delays) * 1000
+            return {
+                'window_ms': self.window * 1000,
+                'max_batch_size': self.max_batch_size,
+                'batches': self._batches,
+                'requests': self._requests,
+                'texts': self._texts,
+                'avg_requests_per_batch': round(self._requests / self._batches, 2) if self._batches else 0.0,
+                'avg_texts_per_batch': round(self._texts / self._batches, 2) if self._batches else 0.0,
+                'max_texts_per_batch': self._max_batch_texts,
+                'avg_queue_delay_ms': round(float(delays_ms.mean()), 3) if len(delays_ms) else 0.0,
+                'p95_queue_delay_ms': round(float(np.percentile(delays_ms, 95)), 3) if len(delays_ms) else 0.0,
+                'avg_encode_ms': round(self._encode_time * 1000 / self._batches, 3) if self._batches else 0.0,
+            }
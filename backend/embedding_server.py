@@ -0,0 +1,238 @@
+"""
+Shared embedding model server.
+With several uvicorn/gunicorn workers each worker would load its own copy
+of the embedding model. This process owns the only copy and serves encode
+requests from all workers over a Unix socket, batching concurrent requests
+with the same dispatcher the API uses in-process.
+
+Run it next to the API (same .env, so the same model and backend):
+    python embedding_server.py                      # listens on EMBEDDING_SERVER_SOCKET
+    python embedding_server.py --socket /run/pdf-genie/embed.sock
+
+Workers use it when EMBEDDING_SERVER_SOCKET is set and fall back to
+in-process encoding whenever the server is not reachable.
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener, Connection
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import settings
+from embedding_backends import EmbeddingModel, load_embedding_model, embedding_model_key
+from embedding_dispatcher import EmbeddingDispatcher
+
+
+# Requests: ("info",) or ("encode", texts); replies: ("ok", payload) or ("error", message)
+_OP_INFO = "info"
+_OP_ENCODE = "encode"
+
+
+def _authkey() -> Optional[bytes]:
+    return settings.EMBEDDING_SERVER_AUTHKEY.encode() if settings.EMBEDDING_SERVER_AUTHKEY else None
+
+
+# ==================== Server ====================
+
+def _serve_connection(conn: Connection, dispatcher: EmbeddingDispatcher, info: Dict):
+    """Answer requests from one API worker until it disconnects."""
+    with conn:
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if request[0] == _OP_INFO:
+                    conn.send(("ok", info))
+                elif request[0] == _OP_ENCODE:
+                    conn.send(("ok", dispatcher.encode(request[1])))
+                else:
+                    conn.send(("error", f"Unknown operation: {request[0]}"))
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                conn.send(("error", str(e)))
+
+
+def serve(socket_path: Path):
+    """
+    Load the embedding model and serve encode requests until interrupted.
+
+    Args:
+        socket_path: Unix socket to listen on (a stale socket file is replaced)
+    """
+    print(f"Loading embedding model: {settings.EMBEDDING_MODEL} ({settings.EMBEDDING_BACKEND})")
+    model = load_embedding_model()
+    dimension = int(np.asarray(model.encode(["warmup"], show_progress_bar=False)).shape[1])
+    info = {'model_key': embedding_model_key(), 'dimension': dimension, 'pid': os.getpid()}
+    dispatcher = EmbeddingDispatcher(
+        lambda: model,
+        window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE
+    )
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    socket_path.unlink(missing_ok=True)
+    listener = Listener(str(socket_path), family='AF_UNIX', authkey=_authkey())
+    os.chmod(socket_path, 0o600)  # Requests are pickled: only this user may connect
+    print(f"Embedding server listening on {socket_path} ({info['model_key']}, {dimension} dims)")
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # Clean up the socket on stop
+
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError) as e:
+                # Failed handshake (e.g. wrong authkey); keep serving others
+                print(f"Rejected embedding client: {e}")
+                continue
+            threading.Thread(
+                target=_serve_connection, args=(conn, dispatcher, info), daemon=True
+            ).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        socket_path.unlink(missing_ok=True)
+        dispatcher.close()
+        print("Embedding server stopped")
+
+
+# ==================== Client ====================
+
+class RemoteEmbeddingModel:
+    """
+    Embedding model proxy for API workers.
+
+    Encodes through the embedding server; while the server is unreachable
+    (or serves a different model), encodes with an in-process model loaded
+    on first need, and retries the server every EMBEDDING_SERVER_RETRY_SECONDS.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path,
+        load_fallback: Callable[[], EmbeddingModel],
+        model_key: Callable[[], str] = embedding_model_key
+    ):
+        """
+        Args:
+            socket_path: Server socket
+            load_fallback: Loads the in-process model used when the server is down
+            model_key: Key of the vectors callers expect; the server must serve it
+                (a fallback model that fell back to another backend changes it)
+        """
+        self.socket_path = socket_path
+        self._load_fallback = load_fallback
+        self._model_key = model_key
+        self._fallback: Optional[EmbeddingModel] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()  # One connection per thread
+        self._retry_at = 0.0
+        self._stats = {'remote_calls': 0, 'local_calls': 0, 'failures': 0}
+
+    def _connect(self) -> Optional[Connection]:
+        """Connection of the calling thread, or None if the server is unavailable."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        if time.monotonic() < self._retry_at:
+            return None
+        try:
+            conn = Client(str(self.socket_path), family='AF_UNIX', authkey=_authkey())
+            conn.send((_OP_INFO,))
+            reply, info = conn.recv()
+            if reply != "ok" or info['model_key'] != self._model_key():
+                conn.close()
+                print(f"Embedding server at {self.socket_path} serves {info}, "
+                      f"expected {self._model_key()}; encoding in-process")
+                self._mark_down()
+                return None
+        except (OSError, EOFError) as e:
+            self._mark_down(e)
+            return None
+        self._local.conn = conn
+        self._local.model_key = info['model_key']
+        return conn
+
+    def _mark_down(self, error: Optional[Exception] = None):
+        with self._lock:
+            if error is not None:
+                self._stats['failures'] += 1
+                print(f"Embedding server unavailable ({error}); encoding in-process")
+            self._retry_at = time.monotonic() + settings.EMBEDDING_SERVER_RETRY_SECONDS
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def _encode_remote(self, texts: List[str]) -> Optional[np.ndarray]:
+        conn = self._connect()
+        if conn is None:
+            return None
+        if self._local.model_key != self._model_key():
+            self._mark_down()  # The expected vectors changed since this connection was opened
+            return None
+        try:
+            conn.send((_OP_ENCODE, texts))
+            if not conn.poll(settings.EMBEDDING_SERVER_TIMEOUT):
+                raise TimeoutError(f"no reply within {settings.EMBEDDING_SERVER_TIMEOUT}s")
+            reply, payload = conn.recv()
+        except (OSError, EOFError) as e:  # TimeoutError is an OSError
+            self._mark_down(e)
+            return None
+        if reply != "ok":
+            raise RuntimeError(f"Embedding server error: {payload}")
+        with self._lock:
+            self._stats['remote_calls'] += 1
+        return payload
+
+    def _fallback_model(self) -> EmbeddingModel:
+        if self._fallback is None:
+            with self._lock:
+                if self._fallback is None:
+                    self._fallback = self._load_fallback()
+        return self._fallback
+
+    def encode(self, sentences: List[str], batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """Encode like SentenceTransformer.encode (list input, 2-d float32 output)."""
+        texts = list(sentences)
+        if not kwargs and texts:
+            embeddings = self._encode_remote(texts)
+            if embeddings is not None:
+                return embeddings
+        with self._lock:
+            self._stats['local_calls'] += 1
+        return self._fallback_model().encode(
+            texts, batch_size=batch_size, show_progress_bar=show_progress_bar, **kwargs
+        )
+
+    def stats(self) -> Dict:
+        """Calls served remotely vs in-process."""
+        with self._lock:
+            return dict(
+                self._stats,
+                socket=str(self.socket_path),
+                fallback_loaded=self._fallback is not None,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", type=Path, default=settings.EMBEDDING_SERVER_SOCKET,
+                        help="Unix socket path (default EMBEDDING_SERVER_SOCKET)")
+    args = parser.parse_args()
+    if args.socket is None:
+        parser.error("Set EMBEDDING_SERVER_SOCKET or pass --socket")
+    serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Persistent content-addressed store of chunk embeddings.
+Keyed by hash(model, chunk text) so text that was embedded before (split,
+merge, extracted pages, re-uploads) is never sent through the model again.
+Stored in SQLite so all worker processes share it; bounded by entry count
+with least-recently-used eviction. Recency is tracked coarsely (see
+EMBEDDING_STORE_TOUCH_SECONDS) so lookups rarely need a write transaction.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from config import settings
+
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_BATCH = 500
+
+# Upper bound on the entry count, kept from writes instead of a COUNT(*) per
+# write; recounted when it passes the limit and every _RECOUNT_ROWS written
+# rows (to see other processes' writes). None until the first count.
+_RECOUNT_ROWS = 10000
+_count_lock = threading.Lock()
+_estimated_entries = None
+_rows_since_count = 0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key BLOB PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_by_last_used ON embeddings(last_used);
+"""
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Get this thread's store connection (created on first use)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(settings.EMBEDDING_STORE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def _count(name: str, amount: int):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def chunk_key(model_key: str, text: str) -> bytes:
+    """Content address of a chunk embedding: SHA-256 of model key and text."""
+    return hashlib.sha256(f"{model_key}\0{text}".encode('utf-8')).digest()
+
+
+def get_embeddings(keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+    """
+    Look up stored embeddings.
+
+    Args:
+        keys: Chunk keys (see chunk_key)
+
+    Returns:
+        Dict of key -> float32 vector for the keys that were found
+    """
+    if not settings.EMBEDDING_STORE_ENABLED or not keys:
+        return {}
+
+    conn = _get_connection()
+    unique_keys = list(dict.fromkeys(keys))
+    found: Dict[bytes, np.ndarray] = {}
+    stale: List[bytes] = []
+    now = time.time()
+    stale_before = now - settings.EMBEDDING_STORE_TOUCH_SECONDS
+
+    for start in range(0, len(unique_keys), _QUERY_BATCH):
+        batch = unique_keys[start:start + _QUERY_BATCH]
+        placeholders = ','.join('?' * len(batch))
+        rows = conn.execute(
+            f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({placeholders})", batch
+        ).fetchall()
+        for key, blob, last_used in rows:
+            found[key] = np.frombuffer(blob, dtype='float32')
+            if last_used < stale_before:
+                stale.append(key)
+
+    if stale:
+        # Refresh recency so frequently reused chunks survive eviction; entries
+        # touched recently are skipped, keeping repeat lookups read-only
+        with conn:
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in stale]
+            )
+
+    _count('hits', len(found))
+    _count('misses', len(unique_keys) - len(found))
+    return found
+
+
+def put_embeddings(items: List[Tuple[bytes, np.ndarray]]):
+    """
+    Store embeddings and evict the least recently used ones beyond the limit.
+
+    Args:
+        items: List of (chunk key, vector) pairs
+    """
+    if not settings.EMBEDDING_STORE_ENABLED or not items:
+        return
+
+    conn = _get_connection()
+    now = time.time()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            [(key, np.asarray(vector, dtype='float32').tobytes(), now) for key, vector in items]
+        )
+    _count('writes', len(items))
+    _evict_if_needed(conn, len(items))
+
+
+def _evict_if_needed(conn: sqlite3.Connection, written: int):
+    """Trim the store to 90% of its entry limit once the limit is exceeded."""
+    global _estimated_entries, _rows_since_count
+    max_entries = settings.EMBEDDING_STORE_MAX_ENTRIES
+    with _count_lock:
+        if _estimated_entries is not None:
+            # Replaced rows are counted as new, so this never underestimates this process's writes
+            _estimated_entries += written
+            _rows_since_count += written
+            if _estimated_entries <= max_entries and _rows_since_count < _RECOUNT_ROWS:
+                return
+
+        total = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        _estimated_entries, _rows_since_count = total, 0
+        if total <= max_entries:
+            return
+
+        excess = total - int(max_entries * 0.9)
+        with conn:
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+        _estimated_entries = total - excess
+    _count('evictions', excess)
+
+
+def get_store_stats() -> Dict:
+    """Hit ratio and size of the embedding store (counters are per process)."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    stats['enabled'] = settings.EMBEDDING_STORE_ENABLED
+    stats['max_entries'] = settings.EMBEDDING_STORE_MAX_ENTRIES
+    if settings.EMBEDDING_STORE_ENABLED:
+        stats['entries'] = _get_connection().execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()[0]
+    return stats
@@ -0,0 +1,280 @@
+"""
+Global multi-document vector index.
+Holds the chunk vectors of many PDFs in one ID-mapped FAISS index so a
+cross-document question is one encode and one search, restricted to the
+requested documents with an ID selector and ranked globally.
+
+Vector IDs encode (document number << 32) | chunk row, where the chunk row
+indexes the document's chunk metadata. Separate named indexes (e.g. one
+per tenant) can be kept side by side.
+
+On disk each document's vectors are a shard file of their own, listed in a
+small JSON manifest, so adding or removing a document writes only that
+document's shard and the manifest - never the whole index. The in-memory
+index is built from the shards and follows other processes' changes by
+applying the manifest difference.
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import faiss
+
+try:
+    import fcntl  # POSIX file locks keep worker processes from clobbering each other
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from config import settings
+from vector_index import normalize_for_index, similarity_scores
+
+
+_ROW_BITS = 32
+_ROW_MASK = (1 << _ROW_BITS) - 1
+
+# (storage ID, chunk row, similarity score)
+SearchHit = Tuple[str, int, float]
+
+
+class GlobalIndex:
+    """One ID-mapped FAISS index shared by many documents."""
+
+    def __init__(self, name: str = "global"):
+        self.name = name
+        directory = settings.INDEX_DIR / "global"
+        directory.mkdir(parents=True, exist_ok=True)
+        self.legacy_index_path = directory / f"{name}.faiss"  # Whole-index file of earlier versions
+        self.docs_path = directory / f"{name}_docs.json"
+        self.shard_dir = directory / name
+        self.shard_dir.mkdir(exist_ok=True)
+        self.lock_path = directory / f"{name}.lock"
+        self._lock = threading.RLock()
+        self._index: Optional[faiss.Index] = None
+        self._docs: Dict[str, int] = {}  # storage ID -> document number
+        self._next_doc = 0
+        self._signature = None
+        if self.legacy_index_path.exists():
+            with self._lock, self._file_lock():
+                self._migrate_legacy()
+
+    # ---------- persistence ----------
+
+    def _disk_signature(self):
+        try:
+            return self.docs_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _shard_path(self, doc: int) -> Path:
+        return self.shard_dir / f"{doc}.npz"
+
+    def _new_index(self, dimension: int) -> faiss.Index:
+        inner = (
+            faiss.IndexFlatIP(dimension)
+            if settings.INDEX_METRIC.lower() == "cosine"
+            else faiss.IndexFlatL2(dimension)
+        )
+        return faiss.IndexIDMap2(inner)
+
+    def _add_vectors(self, doc: int, vectors: np.ndarray, rows: np.ndarray):
+        """Add already normalized vectors of a document to the in-memory index (call with lock held)."""
+        if self._index is None:
+            self._index = self._new_index(vectors.shape[1])
+        ids = (np.int64(doc) << _ROW_BITS) | np.asarray(rows, dtype='int64')
+        self._index.add_with_ids(np.ascontiguousarray(vectors, dtype='float32'), ids)
+
+    def _remove_vectors(self, doc: int):
+        if self._index is not None:
+            self._index.remove_ids(faiss.IDSelectorRange(doc << _ROW_BITS, (doc + 1) << _ROW_BITS))
+
+    def _reload_if_changed(self):
+        """Apply documents added or removed by another process (call with lock held)."""
+        signature = self._disk_signature()
+        if signature is None or signature == self._signature:
+            return
+        with open(self.docs_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        complete = True
+        for storage_id, doc in list(self._docs.items()):
+            if state['docs'].get(storage_id) != doc:
+                self._remove_vectors(doc)
+                del self._docs[storage_id]
+        for storage_id, doc in state['docs'].items():
+            if self._docs.get(storage_id) == doc:
+                continue
+            try:
+                with np.load(self._shard_path(doc), allow_pickle=False) as shard:
+                    self._add_vectors(doc, shard['vectors'], shard['rows'])
+            except FileNotFoundError:
+                complete = False  # Removed again since the manifest was read; retry next time
+                continue
+            self._docs[storage_id] = doc
+        self._next_doc = max(self._next_doc, state['next_doc'])
+        self._signature = signature if complete else None
+
+    def _save_manifest(self):
+        """Write the document map atomically (call with lock held)."""
+        fd, tmp_name = tempfile.mkstemp(dir=self.docs_path.parent, prefix=f".{self.docs_path.name}.", suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'docs': self._docs, 'next_doc': self._next_doc}, f)
+        os.replace(tmp_name, self.docs_path)
+        self._signature = self._disk_signature()
+
+    def _save_shard(self, doc: int, vectors: np.ndarray, rows: np.ndarray):
+        """Write one document's vectors atomically, before the manifest refers to them."""
+        path = self._shard_path(doc)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, vectors=vectors, rows=np.asarray(rows, dtype='int64'))
+        os.replace(tmp_name, path)
+
+    def _migrate_legacy(self):
+        """Split a whole-index file written by earlier versions into shards (call with locks held)."""
+        if not self.legacy_index_path.exists():
+            return  # Another process migrated it first
+        with open(self.docs_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        index = faiss.read_index(str(self.legacy_index_path))
+        ids = faiss.vector_to_array(index.id_map)
+        vectors = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+        for doc in state['docs'].values():
+            selected = (ids >> _ROW_BITS) == doc
+            self._save_shard(doc, vectors[selected], ids[selected] & _ROW_MASK)
+        self.legacy_index_path.unlink()
+        print(f"Migrated global index '{self.name}' to per-document shards ({len(state['docs'])} documents)")
+
+    @contextmanager
+    def _file_lock(self):
+        """Cross-process lock for read-modify-write updates."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'a+') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _exclusive(self):
+        """Thread lock plus the file lock, with the in-memory state brought up to date."""
+        with self._lock, self._file_lock():
+            self._reload_if_changed()
+            yield
+
+    # ---------- updates ----------
+
+    def add_document(self, storage_id: str, embeddings: np.ndarray, rows: Optional[np.ndarray] = None):
+        """
+        Add (or replace) a document's chunk vectors.
+
+        Args:
+            storage_id: ID the document's chunk metadata is stored under
+            embeddings: float32 array (n, dimension) in chunk-row order
+            rows: Chunk rows of the vectors (default 0..n-1)
+        """
+        if rows is None:
+            rows = np.arange(len(embeddings), dtype='int64')
+        with self._exclusive():
+            if self._index is None:
+                self._index = self._new_index(embeddings.shape[1])
+            vectors = normalize_for_index(self._index, embeddings)
+            doc = self._next_doc
+            self._next_doc += 1
+            self._save_shard(doc, vectors, rows)
+
+            previous = self._docs.get(storage_id)
+            if previous is not None:
+                self._remove_vectors(previous)
+            self._add_vectors(doc, vectors, rows)
+            self._docs[storage_id] = doc
+            self._save_manifest()
+            if previous is not None:
+                self._shard_path(previous).unlink(missing_ok=True)
+
+    def remove_document(self, storage_id: str):
+        """Remove a document's vectors (no-op if it is not in the index)."""
+        with self._exclusive():
+            doc = self._docs.pop(storage_id, None)
+            if doc is None:
+                return
+            self._remove_vectors(doc)
+            self._save_manifest()
+            self._shard_path(doc).unlink(missing_ok=True)
+
+    # ---------- queries ----------
+
+    def contains(self, storage_id: str) -> bool:
+        with self._lock:
+            self._reload_if_changed()
+            return storage_id in self._docs
+
+    def search(self, query_vectors: np.ndarray, storage_ids: List[str], k: int) -> List[List[SearchHit]]:
+        """
+        Search only the given documents and rank hits across all of them.
+
+        Args:
+            query_vectors: float32 array (n_queries, dimension)
+            storage_ids: Documents to search (must all be in the index)
+            k: Hits per query
+
+        Returns:
+            For each query, hits sorted by descending similarity
+        """
+        with self._lock:
+            self._reload_if_changed()
+            docs = [self._docs[sid] for sid in dict.fromkeys(storage_ids) if sid in self._docs]
+            if self._index is None or not docs:
+                return [[] for _ in range(len(query_vectors))]
+            by_doc = {doc: sid for sid, doc in self._docs.items()}
+
+            # OR together one ID range per requested document
+            ranges = [faiss.IDSelectorRange(doc << _ROW_BITS, (doc + 1) << _ROW_BITS) for doc in docs]
+            selector = ranges[0]
+            combined = []  # Keep intermediate selectors alive during the search
+            for id_range in ranges[1:]:
+                selector = faiss.IDSelectorOr(selector, id_range)
+                combined.append(selector)
+
+            params = faiss.SearchParameters(sel=selector)
+            distances, ids = self._index.search(
+                normalize_for_index(self._index, query_vectors), k, params=params
+            )
+            scores = similarity_scores(self._index, distances)
+
+        results = []
+        for query_ids, query_scores in zip(ids, scores):
+            hits = []
+            for vector_id, score in zip(query_ids, query_scores):
+                if vector_id < 0:
+                    continue
+                hits.append((by_doc[int(vector_id) >> _ROW_BITS], int(vector_id) & _ROW_MASK, float(score)))
+            results.append(hits)
+        return results
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._reload_if_changed()
+            return {
+                'name': self.name,
+                'documents': len(self._docs),
+                'vectors': self._index.ntotal if self._index is not None else 0,
+            }
+
+
+_global_indexes: Dict[str, GlobalIndex] = {}
+_global_indexes_lock = threading.Lock()
+
+
+def get_global_index(name: str = "global") -> GlobalIndex:
+    """Get the named global index (one instance per process)."""
+    with _global_indexes_lock:
+        if name not in _global_indexes:
+            _global_indexes[name] = GlobalIndex(name)
+        return _global_indexes[name]
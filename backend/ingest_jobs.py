@@ -0,0 +1,168 @@
+"""
+Background ingestion jobs.
+Runs PDF indexing (text extraction + embeddings) in a bounded worker pool
+so uploads can return immediately while indexes are built.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from config import settings
+from content_registry import resolve_pdf_id
+from rag_utils import create_index_for_pdf, index_exists
+
+
+# Job status values
+STATUS_QUEUED = "queued"
+STATUS_PROCESSING = "processing"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+STATUS_NOT_FOUND = "not_found"
+
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_PROCESSING)
+
+
+class IngestQueueFullError(Exception):
+    """Raised when too many indexing jobs are already pending."""
+
+
+# Worker pool and job registry (created lazily, shared by all requests)
+_executor: Optional[ThreadPoolExecutor] = None
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get or create the indexing worker pool (singleton pattern)."""
+    global _executor
+    if _executor is None:
+        # Jobs take turns for PyMuPDF (doc_pool.fitz_lock); extraction of large
+        # documents runs in the extraction process pool, embedding in parallel
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.INGEST_WORKERS),
+            thread_name_prefix="ingest"
+        )
+    return _executor
+
+
+def _update_job(pdf_id: str, **fields):
+    """Update a job record in place."""
+    with _jobs_lock:
+        job = _jobs.get(pdf_id)
+        if job is not None:
+            job.update(fields)
+            job['updated_at'] = time.time()
+
+
+def _run_index_job(pdf_id: str, pdf_path: Path):
+    """Worker entry point: build the index for one PDF and record the outcome."""
+    _update_job(pdf_id, status=STATUS_PROCESSING, stage="starting")
+
+    def on_progress(stage: str, progress: float):
+        _update_job(pdf_id, stage=stage, progress=round(progress, 3))
+
+    try:
+        create_index_for_pdf(pdf_id, pdf_path, progress_callback=on_progress, raise_errors=True)
+    except Exception as e:
+        # The reason (no text, embedding or FAISS error) is shown by the status endpoint
+        _update_job(pdf_id, status=STATUS_FAILED, error=f"Index could not be created: {e}")
+        return
+
+    _update_job(pdf_id, status=STATUS_READY, stage="done", progress=1.0)
+
+
+def _prune_finished_jobs(now: float):
+    """Forget finished jobs older than the retention window (call with lock held)."""
+    cutoff = now - settings.INGEST_JOB_RETENTION_SECONDS
+    expired = [
+        pdf_id for pdf_id, job in _jobs.items()
+        if job['status'] not in ACTIVE_STATUSES and job['updated_at'] < cutoff
+    ]
+    for pdf_id in expired:
+        del _jobs[pdf_id]
+
+
+def enqueue_index_job(pdf_id: str, pdf_path: Path) -> Dict[str, Any]:
+    """
+    Queue a PDF for background indexing.
+
+    Args:
+        pdf_id: Unique PDF identifier
+        pdf_path: Path to the saved PDF file
+
+    Returns:
+        Snapshot of the job record
+
+    Raises:
+        IngestQueueFullError: If the pending job limit has been reached
+    """
+    now = time.time()
+    with _jobs_lock:
+        _prune_finished_jobs(now)
+        active = sum(1 for job in _jobs.values() if job['status'] in ACTIVE_STATUSES)
+        if active >= settings.INGEST_MAX_PENDING:
+            raise IngestQueueFullError(
+                f"Indexing queue is full ({active} jobs pending). Please retry shortly."
+            )
+
+        existing = _jobs.get(pdf_id)
+        if existing is not None and existing['status'] in ACTIVE_STATUSES:
+            return dict(existing)
+
+        _jobs[pdf_id] = {
+            'pdf_id': pdf_id,
+            'status': STATUS_QUEUED,
+            'stage': "queued",
+            'progress': 0.0,
+            'error': None,
+            'created_at': now,
+            'updated_at': now,
+        }
+        snapshot = dict(_jobs[pdf_id])
+
+    _get_executor().submit(_run_index_job, pdf_id, pdf_path)
+    return snapshot
+
+
+def get_index_status(pdf_id: str) -> Dict[str, Any]:
+    """
+    Get the indexing status of a PDF.
+
+    Aliases of deduplicated uploads report the status of their stored
+    content. Falls back to the on-disk index when no job is tracked in this
+    process (e.g. the index was built before a restart).
+
+    Args:
+        pdf_id: PDF identifier
+
+    Returns:
+        Dict with 'pdf_id', 'status', 'stage', 'progress' and 'error'
+    """
+    storage_id = resolve_pdf_id(pdf_id) or pdf_id
+    with _jobs_lock:
+        job = _jobs.get(storage_id)
+        if job is not None:
+            return dict(job, pdf_id=pdf_id)
+
+    if index_exists(pdf_id):
+        status, progress = STATUS_READY, 1.0
+    else:
+        status, progress = STATUS_NOT_FOUND, 0.0
+
+    return {
+        'pdf_id': pdf_id,
+        'status': status,
+        'stage': None,
+        'progress': progress,
+        'error': None,
+    }
+
+
+def shutdown_workers(wait: bool = False):
+    """Stop the worker pool (used on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,209 @@
+"""
+BM25 lexical index over a document's chunks.
+Catches exact identifiers (clause numbers, SKUs, error codes) that dense
+embeddings blur, and answers keyword queries without the embedding model.
+
+Stored as a compressed-sparse inverted index in an .npz file (plain
+arrays, no pickle; files with a fixed-width "vocab" array are converted
+on load):
+    vocab_text    uint8 UTF-8 terms, sorted and concatenated
+    vocab_offsets int64[V+1] byte offsets of each term in vocab_text
+    term_offsets  int64[V+1] start of each term's postings
+    postings      int32 chunk rows, grouped by term
+    frequencies   uint16 term frequency of each posting
+    chunk_lengths int32 tokens per chunk
+"""
+import math
+import os
+import re
+import tempfile
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from config import settings
+
+
+# Identifiers keep inner separators: "4.2.3", "sku-1003", "e_0x1f", "v2/api"
+_TOKEN_RE = re.compile(r"[0-9a-z]+(?:[._:/\-][0-9a-z]+)*")
+_SPLIT_RE = re.compile(r"[._:/\-]")
+_MAX_TOKEN_LENGTH = 64
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms.
+
+    Compound identifiers are kept whole and also emitted as their parts, so
+    "SKU-1003" matches queries for "SKU-1003", "sku 1003" or "1003".
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(unicodedata.normalize('NFKC', text).casefold()):
+        if len(token) > _MAX_TOKEN_LENGTH:
+            continue
+        tokens.append(token)
+        parts = _SPLIT_RE.split(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class LexicalIndex:
+    """In-memory BM25 index of one document's chunks."""
+
+    def __init__(
+        self,
+        vocab_text: np.ndarray,
+        vocab_offsets: np.ndarray,
+        term_offsets: np.ndarray,
+        postings: np.ndarray,
+        frequencies: np.ndarray,
+        chunk_lengths: np.ndarray
+    ):
+        self.vocab_text = vocab_text
+        self.vocab_offsets = vocab_offsets
+        self.term_offsets = term_offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.chunk_lengths = chunk_lengths
+        self.avg_length = float(chunk_lengths.mean()) if len(chunk_lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.chunk_lengths)
+
+    @property
+    def vocab_size(self) -> int:
+        return len(self.vocab_offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (
+            self.vocab_text, self.vocab_offsets, self.term_offsets,
+            self.postings, self.frequencies, self.chunk_lengths
+        ))
+
+    def term(self, term_id: int) -> bytes:
+        """UTF-8 bytes of a vocabulary term."""
+        start, end = int(self.vocab_offsets[term_id]), int(self.vocab_offsets[term_id + 1])
+        return self.vocab_text[start:end].tobytes()
+
+    def term_id(self, term: str) -> int:
+        """Vocabulary ID of a term, or -1 if no chunk contains it."""
+        # UTF-8 byte order is code point order, the order terms were sorted in
+        key = term.encode('utf-8')
+        low, high = 0, self.vocab_size
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.vocab_size and self.term(low) == key else -1
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank chunks for a query with BM25.
+
+        Args:
+            query: Query text
+            k: Maximum number of chunks to return
+
+        Returns:
+            Tuple of (chunk rows, scores), best first; only chunks sharing
+            at least one term with the query are returned
+        """
+        tokens = tokenize(query)
+        n_chunks = len(self)
+        if not tokens or not n_chunks or not self.vocab_size:
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='float32')
+
+        # Vocabulary IDs of the query terms present in this document
+        positions = [term_id for term_id in map(self.term_id, sorted(set(tokens))) if term_id >= 0]
+
+        k1, b = settings.BM25_K1, settings.BM25_B
+        scores = np.zeros(n_chunks, dtype='float32')
+        length_norm = k1 * (1 - b + b * self.chunk_lengths / max(self.avg_length, 1e-9))
+        for term in positions:
+            start, end = self.term_offsets[term], self.term_offsets[term + 1]
+            rows = self.postings[start:end]
+            tf = self.frequencies[start:end].astype('float32')
+            df = end - start
+            idf = math.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+            # Rows are unique within a posting list, so fancy-index += is safe
+            scores[rows] += idf * tf * (k1 + 1) / (tf + length_norm[rows])
+
+        matched = np.flatnonzero(scores)
+        top = matched[np.argsort(-scores[matched], kind='stable')[:k]]
+        return top, scores[top]
+
+
+def build_lexical_index(chunks: List[str]) -> LexicalIndex:
+    """Build a BM25 index over chunk texts (row i = chunks[i])."""
+    postings_by_term = {}
+    chunk_lengths = np.zeros(len(chunks), dtype='int32')
+    for row, chunk in enumerate(chunks):
+        tokens = tokenize(chunk)
+        chunk_lengths[row] = len(tokens)
+        for term, count in Counter(tokens).items():
+            postings_by_term.setdefault(term, []).append((row, count))
+
+    terms = sorted(postings_by_term)
+    term_offsets = np.zeros(len(terms) + 1, dtype='int64')
+    postings = []
+    frequencies = []
+    for i, term in enumerate(terms):
+        entries = postings_by_term[term]
+        term_offsets[i + 1] = term_offsets[i] + len(entries)
+        postings.extend(row for row, _ in entries)
+        frequencies.extend(min(count, 65535) for _, count in entries)
+
+    encoded = [term.encode('utf-8') for term in terms]
+    vocab_offsets = np.zeros(len(terms) + 1, dtype='int64')
+    vocab_offsets[1:] = np.cumsum([len(term) for term in encoded])
+    return LexicalIndex(
+        vocab_text=np.frombuffer(b"".join(encoded), dtype='uint8'),
+        vocab_offsets=vocab_offsets,
+        term_offsets=term_offsets,
+        postings=np.array(postings, dtype='int32'),
+        frequencies=np.array(frequencies, dtype='uint16'),
+        chunk_lengths=chunk_lengths,
+    )
+
+
+def write_lexical_index(path: Path, index: LexicalIndex):
+    """Write a lexical index atomically (temp file + rename)."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    with os.fdopen(fd, 'wb') as f:
+        np.savez(
+            f,
+            vocab_text=index.vocab_text,
+            vocab_offsets=index.vocab_offsets,
+            term_offsets=index.term_offsets,
+            postings=index.postings,
+            frequencies=index.frequencies,
+            chunk_lengths=index.chunk_lengths,
+        )
+    os.replace(tmp_name, path)
+
+
+def load_lexical_index(path: Path) -> LexicalIndex:
+    """Load a lexical index written by write_lexical_index."""
+    with np.load(path, allow_pickle=False) as data:
+        if 'vocab' in data:
+            # Earlier fixed-width string vocabulary
+            encoded = [str(term).encode('utf-8') for term in data['vocab']]
+            vocab_text = np.frombuffer(b"".join(encoded), dtype='uint8')
+            vocab_offsets = np.concatenate(([0], np.cumsum([len(term) for term in encoded]))).astype('int64')
+        else:
+            vocab_text, vocab_offsets = data['vocab_text'], data['vocab_offsets']
+        return LexicalIndex(
+            vocab_text=vocab_text,
+            vocab_offsets=vocab_offsets,
+            term_offsets=data['term_offsets'],
+            postings=data['postings'],
+            frequencies=data['frequencies'],
+            chunk_lengths=data['chunk_lengths'],
+        )
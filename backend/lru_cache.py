@@ -0,0 +1,123 @@
+"""
+Process-wide LRU caches.
+Used to keep loaded (index, metadata) pairs and query embeddings in memory
+under a byte and/or entry budget.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a memory budget and optional entry limit.
+
+    Each entry carries a signature (e.g. file mtimes); a lookup with a
+    different signature treats the entry as stale, so indexes rewritten
+    on disk - even by another worker process - are reloaded.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, signature: Hashable = None) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key
+            signature: Current signature of the backing files
+
+        Returns:
+            Cached value, or None on a miss or stale entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['signature'] != signature:
+                self._remove(key)
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['value']
+
+    def put(self, key: Hashable, value: Any, size_bytes: int, signature: Hashable = None):
+        """
+        Insert a value, evicting least recently used entries to stay in budget.
+
+        Values larger than the whole budget are not cached.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size_bytes > self.max_bytes:
+                return
+            while self._entries and (
+                self._bytes + size_bytes > self.max_bytes
+                or (self.max_entries is not None and len(self._entries) >= self.max_entries)
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self._entries[key] = {
+                'value': value,
+                'size': size_bytes,
+                'signature': signature,
+            }
+            self._bytes += size_bytes
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Get a value without counting a hit or refreshing its recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry['value'] if entry is not None else None
+
+    def keys(self) -> List[Hashable]:
+        """Snapshot of the cached keys, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def invalidate(self, key: Hashable):
+        """Drop an entry (e.g. after its index was rewritten)."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current memory use."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _remove(self, key: Hashable):
+        """Remove an entry (call with lock held)."""
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
@@ -2,32 +2,90 @@
 FastAPI application for PDF Chat + Editor + Creator.
 Main entry point with all API routes.
 """
+import json
 import uuid
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, status
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 
 from config import settings
 from models import (
     PDFUploadResponse,
+    PDFIndexStatusResponse,
     PDFChatResponse,
+    PDFChatBatchRequest,
+    PDFChatBatchResult,
+    PDFChatBatchResponse,
     Source,
     EditPDFResponse,
     CreatePDFResponse,
     HealthResponse,
+    EditOperationList,
+    PageNumberList,
+    EditSessionResponse,
+    ReadyResponse,
+    AIChatRequest,
+    AIChatResponse,
 )
 from pdf_utils import (
     generate_pdf_id,
-    save_uploaded_pdf,
+    PDFUploadWriter,
+    finalize_upload,
+    delete_uploaded_pdf,
+    shutdown_extract_pool,
     add_text_to_pdf,
     add_image_to_pdf,
+    stamp_pdf,
+    edit_pdf,
     create_custom_pdf,
     get_generated_pdf_path,
+    get_pdf_path,
+)
+from rag_utils import (
+    answer_question_from_pdf,
+    answer_questions_from_pdfs,
+    stream_answer_from_pdf,
+    index_exists,
+    delete_index,
+    get_index_cache_stats,
+    get_index_tier_stats,
+    get_query_cache_stats,
+    get_embedding_dispatcher_stats,
+    get_embedding_server_stats,
+    shutdown_embedding_dispatcher,
+    get_embedding_store_stats,
+    get_global_index_stats,
+    get_lexical_cache_stats,
+    get_metadata_cache_stats,
+    RETRIEVAL_MODES,
+)
+from warmup import start_warmup, get_warmup_status
+from edit_sessions import (
+    open_session,
+    apply_session_edits,
+    checkpoint_session,
+    save_session,
+    get_session_info,
+    delete_session,
+    close_all_sessions,
+    get_session_stats,
+    EditSessionNotFoundError,
+)
+from doc_pool import get_doc_pool_stats, close_all_documents
+from ingest_jobs import (
+    enqueue_index_job,
+    get_index_status,
+    shutdown_workers,
+    IngestQueueFullError,
+    ACTIVE_STATUSES,
+    STATUS_READY,
+    STATUS_FAILED,
+    STATUS_NOT_FOUND,
 )
-from rag_utils import create_index_for_pdf, answer_question_from_pdf
-from ai_orchestrator import chat_with_ai
 
 
 # Initialize FastAPI app
@@ -55,6 +113,48 @@ async def health_check():
     return HealthResponse(status="ok")
 
 
+@app.get("/ready", response_model=ReadyResponse)
+async def readiness_check():
+    """
+    Readiness check.
+    
+    Returns 503 until the startup warmup (WARMUP_ON_STARTUP) has loaded
+    the embedding model; always ready when warmup is disabled.
+    """
+    warmup = get_warmup_status()
+    response = ReadyResponse(
+        ready=warmup['ready'],
+        status=warmup['status'],
+        steps=warmup['steps'],
+        error=warmup['error']
+    )
+    if not response.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=response.model_dump()
+        )
+    return response
+
+
+# ==================== Cache Stats ====================
+@app.get("/api/stats/cache")
+async def cache_stats():
+    """Hit/miss counters and memory use of in-process caches."""
+    return {
+        "index_cache": get_index_cache_stats(),
+        "lexical_cache": get_lexical_cache_stats(),
+        "metadata_cache": get_metadata_cache_stats(),
+        "index_tiers": get_index_tier_stats(),
+        "query_cache": get_query_cache_stats(),
+        "embedding_dispatcher": get_embedding_dispatcher_stats(),
+        "embedding_server": get_embedding_server_stats(),
+        "edit_sessions": get_session_stats(),
+        "doc_pool": get_doc_pool_stats(),
+        "embedding_store": get_embedding_store_stats(),
+        "global_index": get_global_index_stats()
+    }
+
+
 # ==================== PDF Upload ====================
 @app.post("/api/pdf/upload", response_model=List[PDFUploadResponse])
 async def upload_pdfs(files: List[UploadFile] = File(...)):
@@ -63,8 +163,13 @@ async def upload_pdfs(files: List[UploadFile] = File(...)):
     
     For each PDF:
     - Saves to data/uploads/{pdf_id}.pdf
-    - Generates embeddings and creates FAISS index
-    - Returns PDF IDs and filenames
+    - Queues a background job that generates embeddings and the FAISS index
+    - Returns PDF IDs, filenames and index status immediately
+    
+    Re-uploads of identical bytes get a new pdf_id that shares the existing
+    file and index, so no extraction or embedding is redone.
+    
+    Poll GET /api/pdf/{pdf_id}/status until the index is ready.
     """
     if not files:
         raise HTTPException(
@@ -82,23 +187,32 @@ async def upload_pdfs(files: List[UploadFile] = File(...)):
         # Generate PDF ID
         pdf_id = generate_pdf_id()
         
-        # Read file content
-        content = await file.read()
+        # Stream the upload to disk in bounded chunks (never held fully in memory)
+        with PDFUploadWriter(pdf_id) as writer:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            # fsync, rename and registry transaction: keep them off the event loop
+            storage_id, pdf_path = await run_in_threadpool(finalize_upload, writer)
         
-        # Save PDF
-        pdf_path = save_uploaded_pdf(content, pdf_id)
-        
-        # Create index for RAG
+        # Queue index creation for RAG (runs in the background worker pool),
+        # unless this content is already indexed or being indexed
         try:
-            create_index_for_pdf(pdf_id, pdf_path)
-        except Exception as e:
-            print(f"Warning: Failed to create index for {pdf_id}: {e}")
-            # Continue anyway - index can be created later if needed
+            index_status = get_index_status(storage_id)['status']
+            if index_status not in ACTIVE_STATUSES and index_status != STATUS_READY:
+                index_status = enqueue_index_job(storage_id, pdf_path)['status']
+        except IngestQueueFullError as e:
+            print(f"Warning: Failed to queue index for {pdf_id}: {e}")
+            # Continue anyway - the PDF is saved and can be indexed later
+            index_status = STATUS_FAILED
         
         uploaded_pdfs.append(
             PDFUploadResponse(
                 pdf_id=pdf_id,
-                filename=file.filename
+                filename=file.filename,
+                index_status=index_status
             )
         )
     
@@ -113,36 +227,154 @@ async def upload_pdfs(files: List[UploadFile] = File(...)):
     return uploaded_pdfs
 
 
+# ==================== PDF Index Status ====================
+@app.get("/api/pdf/{pdf_id}/status", response_model=PDFIndexStatusResponse)
+async def pdf_index_status(pdf_id: str):
+    """
+    Get the indexing status of an uploaded PDF.
+    
+    Clients poll this after upload until status is 'ready' (or 'failed').
+    """
+    job = get_index_status(pdf_id)
+    
+    if job['status'] == STATUS_NOT_FOUND and not get_pdf_path(pdf_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"PDF {pdf_id} not found"
+        )
+    
+    return PDFIndexStatusResponse(
+        pdf_id=pdf_id,
+        status=job['status'],
+        stage=job.get('stage'),
+        progress=job.get('progress', 0.0),
+        error=job.get('error')
+    )
+
+
+# ==================== Delete PDF ====================
+@app.delete("/api/pdf/{pdf_id}")
+async def delete_pdf(pdf_id: str):
+    """
+    Delete an uploaded PDF and its index.
+    
+    Stored files and indexes shared by identical uploads are only removed
+    once no other pdf_id refers to them.
+    """
+    if not get_pdf_path(pdf_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"PDF {pdf_id} not found"
+        )
+    
+    if get_index_status(pdf_id)['status'] in ACTIVE_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"PDF {pdf_id} is still being indexed. Please retry when indexing finishes."
+        )
+    
+    storage_id = await run_in_threadpool(delete_uploaded_pdf, pdf_id)
+    if storage_id is not None:
+        await run_in_threadpool(delete_index, storage_id)
+    
+    return {
+        "pdf_id": pdf_id,
+        "deleted": True,
+        "artifacts_removed": storage_id is not None
+    }
+
+
 # ==================== PDF Chat (RAG) ====================
+def _validate_retrieval_mode(retrieval_mode: Optional[str]):
+    """Reject unknown retrieval modes with 400."""
+    if retrieval_mode is not None and retrieval_mode.lower() not in RETRIEVAL_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid retrieval_mode. Use one of: {', '.join(RETRIEVAL_MODES)}"
+        )
+
+
+def _index_unavailable(pdf_id: str) -> HTTPException:
+    """409 while a PDF is still being indexed, 404 if it has no index."""
+    if get_index_status(pdf_id)['status'] in ACTIVE_STATUSES:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"PDF {pdf_id} is still being indexed. Please retry when its status is 'ready'."
+        )
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Index not found for PDF {pdf_id}. Please upload the PDF first."
+    )
+
+
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_response(events: Iterator[Tuple[str, Any]], error_prefix: str) -> StreamingResponse:
+    """
+    Stream (event, payload) tuples as Server-Sent Events.
+    
+    The iterator runs in the threadpool, so it may block. Errors after the
+    stream has started are sent as an "error" event; every stream ends
+    with a "done" event.
+    """
+    def generate():
+        done = False
+        try:
+            for event, payload in events:
+                done = done or event == "done"
+                yield _sse_event(event, payload)
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"{error_prefix}: {str(e)}"})
+        if not done:
+            yield _sse_event("done", {})
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/pdf/chat", response_model=PDFChatResponse)
 async def chat_with_pdf(
     pdf_id: str = Form(...),
     query: str = Form(...),
-    max_chunks: int = Form(default=5)
+    max_chunks: int = Form(default=5),
+    retrieval_mode: Optional[str] = Form(default=None)
 ):
     """
     Chat with a PDF using RAG.
     
     Retrieves relevant chunks from the PDF and generates an answer.
+    retrieval_mode is hybrid (BM25 + vectors), vector or lexical
+    (keyword-only, no embedding model); defaults to RETRIEVAL_MODE.
     """
     if not query.strip():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Query cannot be empty"
         )
+    _validate_retrieval_mode(retrieval_mode)
     
     try:
-        answer, sources_data = answer_question_from_pdf(
+        # Off the event loop, so concurrent questions share embedding batches
+        answer, sources_data = await run_in_threadpool(
+            answer_question_from_pdf,
             pdf_id=pdf_id,
             query=query,
-            max_chunks=max_chunks
+            max_chunks=max_chunks,
+            retrieval_mode=retrieval_mode
         )
         
         # Convert sources to Pydantic models
         sources = [
             Source(
                 page_number=src['page_number'],
-                snippet=src['snippet']
+                snippet=src['snippet'],
+                score=src['score']
             )
             for src in sources_data
         ]
@@ -153,14 +385,102 @@ async def chat_with_pdf(
         )
         
     except FileNotFoundError:
+        raise _index_unavailable(pdf_id)
+    except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Index not found for PDF {pdf_id}. Please upload the PDF first."
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing chat request: {str(e)}"
         )
+
+
+@app.post("/api/pdf/chat/stream")
+async def chat_with_pdf_stream(
+    pdf_id: str = Form(...),
+    query: str = Form(...),
+    max_chunks: int = Form(default=5),
+    retrieval_mode: Optional[str] = Form(default=None)
+):
+    """
+    Chat with a PDF, streamed as Server-Sent Events.
+    
+    Same parameters as /api/pdf/chat. Events: "sources" (sent as soon as
+    retrieval finishes), "token" ({"content": text}) for each piece of the
+    answer, then "done"; "error" if answering fails mid-stream.
+    """
+    if not query.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Query cannot be empty"
+        )
+    _validate_retrieval_mode(retrieval_mode)
+    if not index_exists(pdf_id):
+        raise _index_unavailable(pdf_id)
+    
+    def events():
+        for event, payload in stream_answer_from_pdf(
+            pdf_id=pdf_id,
+            query=query,
+            max_chunks=max_chunks,
+            retrieval_mode=retrieval_mode
+        ):
+            if event == "token":
+                yield event, {"content": payload}
+            else:
+                yield event, [Source(**src).model_dump() for src in payload]
+    
+    return _sse_response(events(), "Error processing chat request")
+
+
+@app.post("/api/pdf/chat/batch", response_model=PDFChatBatchResponse)
+async def chat_with_pdfs_batch(request: PDFChatBatchRequest):
+    """
+    Answer many questions against one or more PDFs in one pass.
+    
+    All questions are embedded in a single batch and each index is searched
+    once with the whole query matrix. Each question gets the best
+    max_chunks chunks across all requested PDFs.
+    """
+    if any(not query.strip() for query in request.queries):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Queries cannot be empty"
+        )
+    if len(request.queries) > settings.CHAT_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.CHAT_BATCH_MAX_QUERIES} queries are allowed per request"
+        )
+    _validate_retrieval_mode(request.retrieval_mode)
+    
+    for pdf_id in request.pdf_ids:
+        if index_exists(pdf_id):
+            continue
+        raise _index_unavailable(pdf_id)
+    
+    try:
+        answers = await run_in_threadpool(
+            answer_questions_from_pdfs,
+            pdf_ids=request.pdf_ids,
+            queries=request.queries,
+            max_chunks=request.max_chunks,
+            retrieval_mode=request.retrieval_mode
+        )
+        
+        return PDFChatBatchResponse(
+            results=[
+                PDFChatBatchResult(
+                    query=query,
+                    answer=answer,
+                    sources=[Source(**src) for src in sources_data]
+                )
+                for query, (answer, sources_data) in zip(request.queries, answers)
+            ]
+        )
+        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing chat request: {str(e)}"
+            detail=f"Error processing batch chat request: {str(e)}"
         )
 
 
@@ -184,7 +504,8 @@ async def add_text_to_pdf_endpoint(
         )
     
     try:
-        filename = add_text_to_pdf(
+        filename = await run_in_threadpool(
+            add_text_to_pdf,
             pdf_id=pdf_id,
             page_number=page_number,
             text=text,
@@ -240,7 +561,8 @@ async def add_image_to_pdf_endpoint(
         # Read image data
         image_data = await image.read()
         
-        filename = add_image_to_pdf(
+        filename = await run_in_threadpool(
+            add_image_to_pdf,
             pdf_id=pdf_id,
             page_number=page_number,
             image_data=image_data,
@@ -272,6 +594,292 @@ async def add_image_to_pdf_endpoint(
         )
 
 
+@app.post("/api/pdf/edit/stamp", response_model=EditPDFResponse)
+async def stamp_pdf_endpoint(
+    pdf_id: str = Form(...),
+    pages: Optional[str] = Form(default=None, description="JSON list of page numbers (0-indexed); all pages if omitted"),
+    image: Optional[UploadFile] = File(default=None),
+    text: Optional[str] = Form(default=None),
+    x: float = Form(...),
+    y: float = Form(...),
+    width: float = Form(default=None),
+    height: float = Form(default=None),
+    font_size: int = Form(default=12)
+):
+    """
+    Stamp an image (e.g. a logo) and/or text on many pages of a PDF.
+    
+    The image is embedded once and referenced by every stamped page, so
+    the output grows by one image regardless of the page count.
+    """
+    if image is None and not text:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="An image or text is required"
+        )
+    if image is not None and (not image.content_type or not image.content_type.startswith('image/')):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image"
+        )
+    try:
+        page_numbers = PageNumberList.validate_json(pages) if pages else None
+    except ValidationError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="pages must be a JSON list of page numbers"
+        )
+    
+    try:
+        image_data = await image.read() if image is not None else None
+        
+        filename = await run_in_threadpool(
+            stamp_pdf,
+            pdf_id=pdf_id,
+            page_numbers=page_numbers,
+            x=x,
+            y=y,
+            image_data=image_data,
+            width=width,
+            height=height,
+            text=text or None,
+            font_size=font_size
+        )
+        
+        return EditPDFResponse(
+            filename=filename,
+            message="Stamp added successfully"
+        )
+        
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error stamping PDF: {str(e)}"
+        )
+
+
+# ==================== PDF Editing: Batch ====================
+async def _read_edit_operations(
+    operations: str,
+    images: List[UploadFile]
+) -> Tuple[List[Dict[str, Any]], List[bytes]]:
+    """
+    Validate a JSON list of edit operations and read the referenced images.
+    
+    Returns:
+        Tuple of (operation dicts, image file contents)
+    """
+    try:
+        parsed = EditOperationList.validate_json(operations)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid operations: " + "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+        )
+    if not parsed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one operation is required"
+        )
+    if len(parsed) > settings.EDIT_BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.EDIT_BATCH_MAX_OPERATIONS} operations are allowed per request"
+        )
+    for image in images:
+        if not image.content_type or not image.content_type.startswith('image/'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File {image.filename} must be an image"
+            )
+    
+    return [operation.model_dump() for operation in parsed], [await image.read() for image in images]
+
+
+@app.post("/api/pdf/edit/batch", response_model=EditPDFResponse)
+async def edit_pdf_batch_endpoint(
+    pdf_id: str = Form(...),
+    operations: str = Form(..., description="JSON list of edit operations, applied in order"),
+    images: List[UploadFile] = File(default=[])
+):
+    """
+    Apply many edits to a PDF and save a single output.
+    
+    operations is a JSON list such as
+    [{"op": "add_text", "page_number": 0, "text": "Approved", "x": 72, "y": 72},
+     {"op": "add_image", "page_number": 0, "image_index": 0, "x": 300, "y": 72},
+     {"op": "rotate", "page_number": 1, "angle": 90},
+     {"op": "delete_page", "page_number": 2},
+     {"op": "stamp", "image_index": 0, "x": 500, "y": 20, "width": 60, "height": 30}]
+    add_image and stamp operations refer to the uploaded images by position. All
+    operations are applied to one open document, so every edit is kept.
+    """
+    parsed, image_data = await _read_edit_operations(operations, images)
+    
+    try:
+        filename = await run_in_threadpool(
+            edit_pdf,
+            pdf_id=pdf_id,
+            operations=parsed,
+            images=image_data
+        )
+        
+        return EditPDFResponse(
+            filename=filename,
+            message=f"Applied {len(parsed)} edit(s) successfully"
+        )
+        
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error editing PDF: {str(e)}"
+        )
+
+
+# ==================== PDF Editing: Sessions ====================
+def _session_not_found(e: EditSessionNotFoundError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=str(e)
+    )
+
+
+@app.post("/api/pdf/{pdf_id}/session", response_model=EditSessionResponse)
+async def open_edit_session(pdf_id: str):
+    """
+    Open an editing session on a PDF.
+    
+    The document stays open in memory between requests, so successive
+    edits build on each other without re-reading or re-writing the file.
+    """
+    try:
+        return EditSessionResponse(**await run_in_threadpool(open_session, pdf_id))
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error opening edit session: {str(e)}"
+        )
+
+
+@app.get("/api/pdf/session/{session_id}", response_model=EditSessionResponse)
+async def edit_session_status(session_id: str):
+    """Get the state of an editing session."""
+    try:
+        return EditSessionResponse(**await run_in_threadpool(get_session_info, session_id))
+    except EditSessionNotFoundError as e:
+        raise _session_not_found(e)
+
+
+@app.post("/api/pdf/session/{session_id}/edit", response_model=EditSessionResponse)
+async def edit_session_apply(
+    session_id: str,
+    operations: str = Form(..., description="JSON list of edit operations, applied in order"),
+    images: List[UploadFile] = File(default=[])
+):
+    """
+    Apply edit operations (same format as /api/pdf/edit/batch) to the
+    session's document in memory. Nothing is written until a checkpoint.
+    """
+    parsed, image_data = await _read_edit_operations(operations, images)
+    
+    try:
+        return EditSessionResponse(**await run_in_threadpool(
+            apply_session_edits,
+            session_id,
+            parsed,
+            image_data
+        ))
+    except EditSessionNotFoundError as e:
+        raise _session_not_found(e)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error editing PDF: {str(e)}"
+        )
+
+
+@app.post("/api/pdf/session/{session_id}/checkpoint", response_model=EditSessionResponse)
+async def edit_session_checkpoint(session_id: str):
+    """
+    Write pending edits to the session's working file.
+    
+    Uses an incremental save: only changed objects are appended.
+    """
+    try:
+        return EditSessionResponse(**await run_in_threadpool(checkpoint_session, session_id))
+    except EditSessionNotFoundError as e:
+        raise _session_not_found(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error saving checkpoint: {str(e)}"
+        )
+
+
+@app.post("/api/pdf/session/{session_id}/save", response_model=EditPDFResponse)
+async def edit_session_save(session_id: str):
+    """Checkpoint the session and publish its document as a downloadable PDF."""
+    try:
+        filename = await run_in_threadpool(save_session, session_id)
+        return EditPDFResponse(
+            filename=filename,
+            message="PDF saved successfully"
+        )
+    except EditSessionNotFoundError as e:
+        raise _session_not_found(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error saving PDF: {str(e)}"
+        )
+
+
+@app.delete("/api/pdf/session/{session_id}")
+async def close_edit_session(session_id: str):
+    """Discard an editing session and its unsaved changes."""
+    if not await run_in_threadpool(delete_session, session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Edit session {session_id} not found"
+        )
+    return {
+        "session_id": session_id,
+        "deleted": True
+    }
+
+
 # ==================== Create Custom PDF ====================
 @app.post("/api/pdf/create", response_model=CreatePDFResponse)
 async def create_pdf(
@@ -296,7 +904,8 @@ async def create_pdf(
                 img_data = await img_file.read()
                 image_data_list.append(img_data)
         
-        filename = create_custom_pdf(
+        filename = await run_in_threadpool(
+            create_custom_pdf,
             title=title,
             body_text=body_text,
             images=image_data_list
@@ -330,8 +939,12 @@ async def ai_chat(request: AIChatRequest):
             for msg in request.messages
         ]
         
+        # Imported on first use: pulls in openai and the PDF tool modules
+        from ai_orchestrator import chat_with_ai
+        
         # Call AI orchestrator
-        result = chat_with_ai(
+        result = await run_in_threadpool(
+            chat_with_ai,
             messages=messages,
             context=request.context
         )
@@ -345,6 +958,35 @@ async def ai_chat(request: AIChatRequest):
         )
 
 
+@app.post("/api/ai/chat/stream")
+async def ai_chat_stream(request: AIChatRequest):
+    """
+    AI chat with tool calling, streamed as Server-Sent Events.
+    
+    Events: "token" ({"content": text}) as the model generates text,
+    "tool_call" / "tool_result" around each tool run, "sources" and
+    "files" as tools produce them, then "done" with the same fields as
+    the /api/ai/chat response; "error" if the chat fails mid-stream.
+    """
+    from ai_orchestrator import stream_chat_with_ai
+    
+    messages = [
+        {"role": msg.role, "content": msg.content}
+        for msg in request.messages
+    ]
+    
+    def events():
+        for event, payload in stream_chat_with_ai(messages=messages, context=request.context):
+            if event == "token":
+                yield event, {"content": payload}
+            elif event == "done":
+                yield event, AIChatResponse(**payload).model_dump()
+            else:
+                yield event, payload
+    
+    return _sse_response(events(), "AI chat error")
+
+
 # ==================== Download PDF ====================
 @app.get("/api/pdf/download/{filename}")
 async def download_pdf(filename: str):
@@ -400,9 +1042,22 @@ async def startup_event():
     print(f"Upload directory: {settings.UPLOAD_DIR}")
     print(f"Generated directory: {settings.GENERATED_DIR}")
     print(f"Index directory: {settings.INDEX_DIR}")
+    if settings.WARMUP_ON_STARTUP:
+        # Background thread: the server accepts requests (and /ready reports progress) meanwhile
+        start_warmup()
     print("API ready!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background indexing, extraction and query embedding workers on shutdown."""
+    shutdown_workers(wait=False)
+    shutdown_extract_pool()
+    shutdown_embedding_dispatcher()
+    close_all_sessions()
+    close_all_documents()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,8 +1,8 @@
 """
 Pydantic models for request/response validation.
 """
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional, Dict, Any, Literal, Union
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 # ==================== Health Check ====================
@@ -10,20 +10,38 @@ class HealthResponse(BaseModel):
     status: str = Field(default="ok", description="Health status")
 
 
+class ReadyResponse(BaseModel):
+    ready: bool = Field(..., description="Whether startup warmup is done (or disabled)")
+    status: str = Field(..., description="Warmup status: disabled, pending, running, ready or failed")
+    steps: Dict[str, float] = Field(default_factory=dict, description="Seconds spent per warmup step")
+    error: Optional[str] = Field(None, description="Error of a failed warmup")
+
+
 # ==================== PDF Upload ====================
 class PDFUploadResponse(BaseModel):
     pdf_id: str = Field(..., description="Unique PDF identifier")
     filename: str = Field(..., description="Original filename")
+    index_status: str = Field(default="queued", description="Indexing status: queued, processing, ready or failed")
 
 
 class PDFUploadListResponse(BaseModel):
     pdfs: List[PDFUploadResponse] = Field(..., description="List of uploaded PDFs")
 
 
+class PDFIndexStatusResponse(BaseModel):
+    pdf_id: str = Field(..., description="PDF identifier")
+    status: str = Field(..., description="Indexing status: queued, processing, ready, failed or not_found")
+    stage: Optional[str] = Field(default=None, description="Current indexing stage")
+    progress: float = Field(default=0.0, description="Indexing progress (0.0-1.0)")
+    error: Optional[str] = Field(default=None, description="Error message if indexing failed")
+
+
 # ==================== PDF Chat (RAG) ====================
 class Source(BaseModel):
     page_number: int = Field(..., description="Page number (1-indexed)")
     snippet: str = Field(..., description="Text snippet from the chunk")
+    pdf_id: Optional[str] = Field(default=None, description="PDF the chunk comes from (multi-PDF answers)")
+    score: Optional[float] = Field(default=None, description="Similarity score (higher is more relevant)")
 
 
 class PDFChatResponse(BaseModel):
@@ -31,6 +49,23 @@ class PDFChatResponse(BaseModel):
     sources: List[Source] = Field(default_factory=list, description="Source chunks")
 
 
+class PDFChatBatchRequest(BaseModel):
+    pdf_ids: List[str] = Field(..., min_length=1, description="PDFs to search")
+    queries: List[str] = Field(..., min_length=1, description="Questions to answer")
+    max_chunks: int = Field(default=5, ge=1, description="Chunks retrieved per question")
+    retrieval_mode: Optional[str] = Field(default=None, description="hybrid, vector or lexical (default from settings)")
+
+
+class PDFChatBatchResult(BaseModel):
+    query: str = Field(..., description="Question")
+    answer: str = Field(..., description="AI-generated answer")
+    sources: List[Source] = Field(default_factory=list, description="Source chunks, best first")
+
+
+class PDFChatBatchResponse(BaseModel):
+    results: List[PDFChatBatchResult] = Field(..., description="One result per question, in request order")
+
+
 # ==================== PDF Editing ====================
 class AddTextRequest(BaseModel):
     pdf_id: str
@@ -50,11 +85,73 @@ class AddImageRequest(BaseModel):
     height: Optional[float] = None
 
 
+class AddTextOperation(BaseModel):
+    op: Literal["add_text"]
+    page_number: int = Field(..., description="Page number (0-indexed)")
+    text: str = Field(..., min_length=1)
+    x: float = 50.0
+    y: float = 50.0
+    font_size: int = 12
+
+
+class AddImageOperation(BaseModel):
+    op: Literal["add_image"]
+    page_number: int = Field(..., description="Page number (0-indexed)")
+    image_index: int = Field(..., ge=0, description="Index into the uploaded images")
+    x: float = 50.0
+    y: float = 50.0
+    width: Optional[float] = None
+    height: Optional[float] = None
+
+
+class RotatePageOperation(BaseModel):
+    op: Literal["rotate"]
+    page_number: int = Field(..., description="Page number (0-indexed)")
+    angle: Literal[90, 180, 270] = Field(..., description="Clockwise, added to the current rotation")
+
+
+class DeletePageOperation(BaseModel):
+    op: Literal["delete_page"]
+    page_number: int = Field(..., description="Page number (0-indexed)")
+
+
+class StampOperation(BaseModel):
+    op: Literal["stamp"]
+    pages: Optional[List[int]] = Field(None, description="Page numbers (0-indexed); all pages if omitted")
+    image_index: Optional[int] = Field(None, ge=0, description="Index into the uploaded images")
+    text: Optional[str] = Field(None, min_length=1)
+    x: float = 50.0
+    y: float = 50.0
+    width: Optional[float] = None
+    height: Optional[float] = None
+    font_size: int = 12
+
+
+EditOperation = Annotated[
+    Union[AddTextOperation, AddImageOperation, RotatePageOperation, DeletePageOperation, StampOperation],
+    Field(discriminator="op")
+]
+EditOperationList = TypeAdapter(List[EditOperation])
+PageNumberList = TypeAdapter(List[int])
+
+
 class EditPDFResponse(BaseModel):
     filename: str = Field(..., description="Generated PDF filename")
     message: str = "PDF edited successfully"
 
 
+class EditSessionResponse(BaseModel):
+    session_id: str = Field(..., description="Editing session ID")
+    pdf_id: str = Field(..., description="Source PDF ID")
+    page_count: int = Field(..., description="Pages in the edited document")
+    edits: int = Field(..., description="Operations applied so far")
+    checkpoints: int = Field(..., description="Checkpoints written so far")
+    dirty: bool = Field(..., description="Whether edits are pending since the last checkpoint")
+    size_bytes: int = Field(..., description="Size of the checkpointed working file")
+    in_memory: bool = Field(..., description="Whether the document is currently open in memory")
+    bytes_written: Optional[int] = Field(None, description="Bytes appended by this checkpoint")
+
+
 # ==================== PDF Creation ====================
 class CreatePDFRequest(BaseModel):
     title: str
@@ -2,14 +2,30 @@
 PDF utility functions for loading, saving, editing, and creating PDFs.
 Uses PyMuPDF (fitz) for PDF operations.
 """
+import base64
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional, Iterable
 import fitz  # PyMuPDF
 from PIL import Image
 import io
 
 from config import settings
+from doc_pool import shared_document, evict_document, fitz_locked
+from content_registry import (
+    find_storage_id,
+    register_upload,
+    resolve_pdf_id,
+    release_pdf_id,
+    forget_content,
+)
 
 
 def generate_pdf_id() -> str:
@@ -17,6 +33,154 @@ def generate_pdf_id() -> str:
     return str(uuid.uuid4())
 
 
+class PDFUploadWriter:
+    """
+    Streams an upload to disk chunk by chunk in constant memory.
+    
+    Chunks go to a temporary file inside UPLOAD_DIR while a SHA-256 of the
+    content is computed on the fly. commit() renames the temp file into
+    place atomically, so readers never see a partially written PDF.
+    
+    Usage:
+        with PDFUploadWriter(pdf_id) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+            path = writer.commit()
+    """
+    
+    def __init__(self, pdf_id: str):
+        self.pdf_id = pdf_id
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._committed = False
+        fd, tmp_name = tempfile.mkstemp(
+            dir=settings.UPLOAD_DIR,
+            prefix=f".{pdf_id}.",
+            suffix=".part"
+        )
+        self._tmp_path = Path(tmp_name)
+        self._file = os.fdopen(fd, 'wb', buffering=settings.UPLOAD_CHUNK_SIZE)
+    
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 digest of everything written so far."""
+        return self._hash.hexdigest()
+    
+    def write(self, chunk: bytes):
+        """Append a chunk to the temp file and the running hash."""
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+    
+    def commit(self) -> Path:
+        """
+        Flush the temp file and atomically move it to uploads/{pdf_id}.pdf.
+        
+        Returns:
+            Path to the saved PDF file
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        file_path = settings.UPLOAD_DIR / f"{self.pdf_id}.pdf"
+        os.replace(self._tmp_path, file_path)
+        self._committed = True
+        return file_path
+    
+    def abort(self):
+        """Discard the temp file without saving anything."""
+        if not self._file.closed:
+            self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+    
+    def __enter__(self) -> "PDFUploadWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if not self._committed:
+            self.abort()
+        return False
+
+
+def finalize_upload(writer: PDFUploadWriter) -> Tuple[str, Path]:
+    """
+    Store a fully streamed upload, deduplicating by content hash.
+    
+    If identical bytes were uploaded before, the temp file is discarded and
+    the new pdf_id becomes an alias of the existing stored document, so its
+    file and FAISS index are reused instead of being rebuilt.
+    
+    Args:
+        writer: Writer that has received the whole upload
+        
+    Returns:
+        Tuple of (storage ID, path to the stored PDF file). The storage ID
+        equals writer.pdf_id unless the upload was a duplicate.
+    """
+    sha256 = writer.sha256
+    storage_id = find_storage_id(sha256)
+    if storage_id is not None and not (settings.UPLOAD_DIR / f"{storage_id}.pdf").exists():
+        # Stored file disappeared - drop the stale entry and store this copy
+        forget_content(sha256)
+        storage_id = None
+    
+    committed = storage_id is None
+    if committed:
+        writer.commit()
+    else:
+        writer.abort()
+    
+    storage_id = register_upload(writer.pdf_id, sha256, writer.size)
+    if committed and storage_id != writer.pdf_id:
+        # An identical upload registered first while we were writing
+        (settings.UPLOAD_DIR / f"{writer.pdf_id}.pdf").unlink(missing_ok=True)
+    
+    return storage_id, settings.UPLOAD_DIR / f"{storage_id}.pdf"
+
+
+def save_uploaded_pdf_chunks(chunks: Iterable[bytes], pdf_id: str) -> Tuple[str, Path]:
+    """
+    Stream PDF content to the uploads directory (deduplicated by content).
+    
+    Args:
+        chunks: Iterable of PDF content chunks
+        pdf_id: Unique identifier for the PDF
+        
+    Returns:
+        Tuple of (storage ID, path to the stored PDF file)
+    """
+    with PDFUploadWriter(pdf_id) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+        return finalize_upload(writer)
+
+
+def iter_base64_chunks(data: str, chunk_size: Optional[int] = None) -> Iterable[bytes]:
+    """
+    Decode a base64 string incrementally.
+    
+    Decodes fixed-size slices (a multiple of 4 characters) so the decoded
+    payload never has to be materialized as a single bytes object.
+    
+    Args:
+        data: Base64 encoded content
+        chunk_size: Approximate decoded bytes per chunk (default from settings)
+        
+    Yields:
+        Decoded byte chunks
+    """
+    if chunk_size is None:
+        chunk_size = settings.UPLOAD_CHUNK_SIZE
+    
+    # Slices must align to 4-character groups, so drop any line breaks first
+    if any(ws in data for ws in ('\n', '\r', ' ', '\t')):
+        data = ''.join(data.split())
+    
+    step = max(4, (chunk_size // 3) * 4)
+    for start in range(0, len(data), step):
+        yield base64.b64decode(data[start:start + step])
+
+
 def save_uploaded_pdf(file_content: bytes, pdf_id: str) -> Path:
     """
     Save an uploaded PDF file to the uploads directory.
@@ -28,127 +192,277 @@ def save_uploaded_pdf(file_content: bytes, pdf_id: str) -> Path:
     Returns:
         Path to the saved PDF file
     """
-    file_path = settings.UPLOAD_DIR / f"{pdf_id}.pdf"
-    file_path.write_bytes(file_content)
+    step = settings.UPLOAD_CHUNK_SIZE
+    view = memoryview(file_content)
+    chunks = (view[start:start + step] for start in range(0, len(view), step))
+    _, file_path = save_uploaded_pdf_chunks(chunks, pdf_id)
     return file_path
 
 
-def extract_text_from_pdf(pdf_path: Path) -> List[Tuple[int, str]]:
+# Process pool for parallel text extraction (created lazily)
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_lock = threading.Lock()
+
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    """Get or create the text extraction process pool (singleton pattern)."""
+    global _extract_pool
+    if _extract_pool is None:
+        with _extract_pool_lock:
+            if _extract_pool is None:
+                # spawn: the server process runs threads, which fork does not copy safely
+                _extract_pool = ProcessPoolExecutor(
+                    max_workers=settings.EXTRACT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _extract_pool
+
+
+def shutdown_extract_pool():
+    """Stop the text extraction worker processes."""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is not None:
+            _extract_pool.shutdown(wait=False, cancel_futures=True)
+            _extract_pool = None
+
+
+def _extract_pages(pdf_path: str, page_numbers: List[int]) -> List[Tuple[int, str]]:
+    """
+    Extract text from the given pages (0-indexed) of a PDF.
+    
+    Runs inside a worker process, so it opens its own copy of the document.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        return [(page_num, doc[page_num].get_text()) for page_num in page_numbers]
+    finally:
+        doc.close()
+
+
+def extract_text_from_pdf(
+    pdf_path: Path,
+    parallel: Optional[bool] = None,
+    pages: Optional[List[int]] = None
+) -> List[Tuple[int, str]]:
     """
     Extract text from a PDF, returning a list of (page_number, text) tuples.
     
+    Large documents are split into page ranges that are extracted in
+    parallel by worker processes; small ones are extracted serially since
+    pool overhead would dominate. Serial extraction reads the shared
+    pooled document (see doc_pool).
+    
     Args:
         pdf_path: Path to the PDF file
+        parallel: Force parallel (True) or serial (False) extraction.
+            Default decides by page count (see PARALLEL_EXTRACT_MIN_PAGES).
+        pages: Only extract these pages (0-indexed); default all pages
         
     Returns:
-        List of tuples: (page_number (0-indexed), text_content)
+        List of tuples: (page_number (0-indexed), text_content), in page order
     """
-    doc = fitz.open(pdf_path)
-    pages_text = []
+    with shared_document(pdf_path) as doc:
+        if pages is None:
+            page_numbers = list(range(len(doc)))
+        else:
+            page_numbers = sorted(set(p for p in pages if 0 <= p < len(doc)))
     
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        text = page.get_text()
-        pages_text.append((page_num, text))
+    if parallel is None:
+        parallel = (
+            settings.EXTRACT_WORKERS > 1
+            and len(page_numbers) >= settings.PARALLEL_EXTRACT_MIN_PAGES
+        )
     
-    doc.close()
+    if parallel and len(page_numbers) > 1:
+        try:
+            return _extract_text_parallel(pdf_path, page_numbers)
+        except BrokenProcessPool as e:
+            print(f"Warning: Parallel extraction failed for {pdf_path}, falling back to serial: {e}")
+            shutdown_extract_pool()
+    
+    with shared_document(pdf_path) as doc:
+        return [(page_num, doc[page_num].get_text()) for page_num in page_numbers]
+
+
+def _extract_text_parallel(pdf_path: Path, page_numbers: List[int]) -> List[Tuple[int, str]]:
+    """Split the pages across the extraction pool and reassemble in order."""
+    workers = max(1, settings.EXTRACT_WORKERS)
+    # A few ranges per worker keeps processes busy when pages vary in cost
+    range_size = max(1, -(-len(page_numbers) // (workers * 4)))
+    pool = _get_extract_pool()
+    futures = [
+        pool.submit(_extract_pages, str(pdf_path), page_numbers[start:start + range_size])
+        for start in range(0, len(page_numbers), range_size)
+    ]
+    
+    pages_text = []
+    for future in futures:  # Submitted in page order, so results stay ordered
+        pages_text.extend(future.result())
     return pages_text
 
 
-def add_text_to_pdf(
-    pdf_id: str,
+# ==================== Editing ====================
+
+# Batch edit operation types (see apply_edit_operations)
+OP_ADD_TEXT = "add_text"
+OP_ADD_IMAGE = "add_image"
+OP_ROTATE = "rotate"
+OP_DELETE_PAGE = "delete_page"
+OP_STAMP = "stamp"
+
+
+def _open_source_pdf(pdf_id: str) -> fitz.Document:
+    """Open an uploaded PDF for editing (raises FileNotFoundError if unknown)."""
+    source_path = get_pdf_path(pdf_id)
+    if not source_path:
+        raise FileNotFoundError(f"PDF with id {pdf_id} not found")
+    return fitz.open(source_path)
+
+
+def _save_generated_pdf(doc: fitz.Document, pdf_id: str, kind: str) -> str:
+    """Save an edited document under GENERATED_DIR and return its filename."""
+    output_filename = f"{pdf_id}_{kind}_{uuid.uuid4().hex[:8]}.pdf"
+    # Images PyMuPDF decoded on insert (PNG etc.) are otherwise stored uncompressed
+    doc.save(settings.GENERATED_DIR / output_filename, deflate_images=True)
+    return output_filename
+
+
+def _get_page(doc: fitz.Document, page_number: int) -> fitz.Page:
+    """Get a page by 0-indexed number, raising ValueError if out of range."""
+    if page_number < 0 or page_number >= len(doc):
+        raise ValueError(f"Page number {page_number} is out of range (0-{len(doc)-1})")
+    return doc[page_number]
+
+
+# Image formats PyMuPDF embeds from the file itself (JPEG and JPEG 2000 without re-encoding)
+_NATIVE_IMAGE_FORMATS = {"JPEG", "JPEG2000", "PNG", "GIF", "BMP", "TIFF"}
+
+
+def _downsample_scale(size: Tuple[int, int], width: Optional[float], height: Optional[float]) -> float:
+    """Factor to shrink an image to IMAGE_TARGET_DPI in a width x height point rect (1.0 = keep)."""
+    if settings.IMAGE_TARGET_DPI <= 0 or not width or not height:
+        return 1.0
+    # insert_image keeps the aspect ratio, fitting the image inside the rect
+    dpi = 72 / min(width / size[0], height / size[1])
+    # Slightly oversized images are not worth a re-encode
+    if dpi <= settings.IMAGE_TARGET_DPI * 1.1:
+        return 1.0
+    return settings.IMAGE_TARGET_DPI / dpi
+
+
+def _resample_image(img: Image.Image, scale: float) -> bytes:
+    """Downsample an image, re-encoding JPEGs as JPEG and everything else as PNG."""
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    lossy = img.format in ("JPEG", "JPEG2000")
+    if img.format == "JPEG":
+        img.draft(img.mode, size)  # Let the decoder scale down in the DCT domain
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    if has_alpha:
+        img = img.convert("RGBA")
+    elif img.mode not in ("L", "RGB") and not (lossy and img.mode == "CMYK"):
+        img = img.convert("RGB")
+    img = img.resize(size, Image.LANCZOS)
+    
+    img_bytes = io.BytesIO()
+    if lossy and not has_alpha:
+        img.save(img_bytes, format='JPEG', quality=settings.IMAGE_JPEG_QUALITY)
+    else:
+        img.save(img_bytes, format='PNG')
+    return img_bytes.getvalue()
+
+
+def _image_stream(
+    image_data: bytes,
+    width: Optional[float] = None,
+    height: Optional[float] = None
+) -> bytes:
+    """
+    Image file content in a form PyMuPDF can insert.
+    
+    JPEG and JPEG 2000 files pass through untouched and PyMuPDF keeps PNG
+    transparency as a soft mask, so most images are never decoded here;
+    only formats PyMuPDF cannot read are converted to PNG. With
+    IMAGE_TARGET_DPI set and the placement size known, images with more
+    pixels than that resolution needs are downsampled first.
+    
+    Args:
+        image_data: Image file content as bytes
+        width: Placement width in points
+        height: Placement height in points
+    """
+    img = Image.open(io.BytesIO(image_data))  # Reads the header only
+    scale = _downsample_scale(img.size, width, height)
+    if scale < 1.0:
+        return _resample_image(img, scale)
+    if img.format in _NATIVE_IMAGE_FORMATS:
+        return image_data
+    
+    if img.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='PNG')
+    return img_bytes.getvalue()
+
+
+def insert_text(
+    doc: fitz.Document,
     page_number: int,
     text: str,
     x: float,
     y: float,
     font_size: int = 12
-) -> str:
+):
     """
-    Add text to a PDF at specified coordinates.
+    Insert text into an open document at specified coordinates.
     
     Args:
-        pdf_id: Identifier of the source PDF
+        doc: Open document (modified in place)
         page_number: Page number (0-indexed)
         text: Text to add
         x: X coordinate
         y: Y coordinate
         font_size: Font size (default 12)
-        
-    Returns:
-        Filename of the edited PDF
     """
-    # Load original PDF
-    source_path = settings.UPLOAD_DIR / f"{pdf_id}.pdf"
-    if not source_path.exists():
-        raise FileNotFoundError(f"PDF with id {pdf_id} not found")
-    
-    doc = fitz.open(source_path)
-    
-    # Validate page number
-    if page_number < 0 or page_number >= len(doc):
-        doc.close()
-        raise ValueError(f"Page number {page_number} is out of range (0-{len(doc)-1})")
+    page = _get_page(doc, page_number)
     
-    # Get the page
-    page = doc[page_number]
-    
-    # Insert text
     # Using default font (helv) and color (black)
-    point = fitz.Point(x, y)
     page.insert_text(
-        point,
+        fitz.Point(x, y),
         text,
         fontsize=font_size,
         color=(0, 0, 0)  # Black
     )
-    
-    # Save edited PDF
-    output_filename = f"{pdf_id}_edited_{uuid.uuid4().hex[:8]}.pdf"
-    output_path = settings.GENERATED_DIR / output_filename
-    doc.save(output_path)
-    doc.close()
-    
-    return output_filename
 
 
-def add_image_to_pdf(
-    pdf_id: str,
+def insert_image(
+    doc: fitz.Document,
     page_number: int,
     image_data: bytes,
     x: float,
     y: float,
     width: Optional[float] = None,
-    height: Optional[float] = None
-) -> str:
+    height: Optional[float] = None,
+    xref: int = 0
+) -> int:
     """
-    Add an image to a PDF at specified coordinates.
+    Insert an image into an open document at specified coordinates.
     
     Args:
-        pdf_id: Identifier of the source PDF
+        doc: Open document (modified in place)
         page_number: Page number (0-indexed)
         image_data: Image file content as bytes
         x: X coordinate
         y: Y coordinate
         width: Image width (default 200)
         height: Image height (default 200)
+        xref: Image already embedded in doc (returned by an earlier call)
+            to reference instead of embedding image_data again
         
     Returns:
-        Filename of the edited PDF
+        xref of the image
     """
-    # Load original PDF
-    source_path = settings.UPLOAD_DIR / f"{pdf_id}.pdf"
-    if not source_path.exists():
-        raise FileNotFoundError(f"PDF with id {pdf_id} not found")
-    
-    doc = fitz.open(source_path)
-    
-    # Validate page number
-    if page_number < 0 or page_number >= len(doc):
-        doc.close()
-        raise ValueError(f"Page number {page_number} is out of range (0-{len(doc)-1})")
-    
-    # Get the page
-    page = doc[page_number]
+    page = _get_page(doc, page_number)
     
     # Default dimensions if not provided
     if width is None:
@@ -156,35 +470,294 @@ def add_image_to_pdf(
     if height is None:
         height = 200.0
     
-    # Create image rect
     rect = fitz.Rect(x, y, x + width, y + height)
+    if xref:
+        return page.insert_image(rect, xref=xref)
+    return page.insert_image(rect, stream=_image_stream(image_data, width, height))
+
+
+def stamp_pages(
+    doc: fitz.Document,
+    page_numbers: Optional[List[int]],
+    x: float,
+    y: float,
+    image_data: Optional[bytes] = None,
+    width: Optional[float] = None,
+    height: Optional[float] = None,
+    text: Optional[str] = None,
+    font_size: int = 12,
+    image_xref: int = 0
+) -> int:
+    """
+    Stamp the same image and/or text on many pages of an open document.
     
-    # Insert image
-    # Open image from bytes
-    img = Image.open(io.BytesIO(image_data))
-    # Convert to RGB if necessary (PyMuPDF doesn't support RGBA directly)
-    if img.mode == 'RGBA':
-        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-        rgb_img.paste(img, mask=img.split()[3])
-        img = rgb_img
+    The image is embedded once and every page references that one image
+    object, so the document grows by one image regardless of page count.
+    Text is placed like insert_text (y is the baseline).
     
-    # Convert PIL image to bytes for PyMuPDF
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='PNG')
-    img_bytes.seek(0)
+    Args:
+        doc: Open document (modified in place)
+        page_numbers: Pages to stamp (0-indexed), None for all pages
+        x: X coordinate
+        y: Y coordinate
+        image_data: Image file content as bytes
+        width: Image width (default 200)
+        height: Image height (default 200)
+        text: Text to add
+        font_size: Font size (default 12)
+        image_xref: Image already embedded in doc to reuse for image_data
+        
+    Returns:
+        xref of the stamped image (0 without an image)
+        
+    Raises:
+        ValueError: If there is nothing to stamp or a page is out of range
+    """
+    if image_data is None and not text:
+        raise ValueError("A stamp needs an image or text")
+    if page_numbers is None:
+        page_numbers = range(len(doc))
+    for page_number in page_numbers:
+        _get_page(doc, page_number)  # Validate all pages before changing any
+    
+    for page_number in page_numbers:
+        if image_data is not None:
+            image_xref = insert_image(doc, page_number, image_data, x, y, width, height, xref=image_xref)
+        if text:
+            insert_text(doc, page_number, text, x, y, font_size)
+    return image_xref if image_data is not None else 0
+
+
+def rotate_page(doc: fitz.Document, page_number: int, angle: int):
+    """
+    Rotate a page of an open document clockwise by angle (90, 180 or 270),
+    relative to its current rotation.
+    """
+    if angle not in (90, 180, 270):
+        raise ValueError("Angle must be 90, 180, or 270")
+    page = _get_page(doc, page_number)
+    page.set_rotation((page.rotation + angle) % 360)
+
+
+def delete_page(doc: fitz.Document, page_number: int):
+    """Delete a page of an open document (later pages move up by one)."""
+    _get_page(doc, page_number)
+    if len(doc) == 1:
+        raise ValueError("Cannot delete the only page of a PDF")
+    doc.delete_page(page_number)
+
+
+def _operation_image(operation: Dict[str, Any], images: List[bytes]) -> Tuple[bytes, Tuple]:
+    """
+    Image content of an add_image/stamp operation and the key it is embedded under.
     
-    # Insert image
-    page.insert_image(rect, stream=img_bytes.getvalue())
+    The embedded stream depends on the placed size when downsampling
+    (IMAGE_TARGET_DPI), so the key includes it.
+    """
+    image_index = operation['image_index']
+    if not 0 <= image_index < len(images):
+        raise ValueError(f"image_index {image_index} does not refer to an uploaded image")
+    return images[image_index], (image_index, operation.get('width'), operation.get('height'))
+
+
+def apply_edit_operations(
+    doc: fitz.Document,
+    operations: List[Dict[str, Any]],
+    images: Optional[List[bytes]] = None
+):
+    """
+    Apply an ordered list of edit operations to an open document.
     
-    # Save edited PDF
-    output_filename = f"{pdf_id}_img_{uuid.uuid4().hex[:8]}.pdf"
-    output_path = settings.GENERATED_DIR / output_filename
-    doc.save(output_path)
-    doc.close()
+    Each operation is a dict with an "op" key:
+        add_text     page_number, text, x, y, font_size
+        add_image    page_number, image_index (into images), x, y, width, height
+        rotate       page_number, angle
+        delete_page  page_number
+        stamp        pages (None for all), image_index and/or text, x, y,
+                     width, height, font_size
+    Page numbers are 0-indexed and refer to the document as left by the
+    preceding operations. An image placed several times at the same size
+    is embedded once and shared by all its placements.
     
-    return output_filename
+    Args:
+        doc: Open document (modified in place)
+        operations: Operations, applied in order
+        images: Image file contents referenced by add_image and stamp operations
+        
+    Raises:
+        ValueError: If an operation is invalid (message names its position)
+    """
+    images = images or []
+    image_xrefs: Dict[Tuple, int] = {}  # Images embedded so far, see _operation_image
+    for position, operation in enumerate(operations):
+        op = operation.get('op')
+        try:
+            if op == OP_ADD_TEXT:
+                insert_text(
+                    doc, operation['page_number'], operation['text'],
+                    operation['x'], operation['y'], operation.get('font_size', 12)
+                )
+            elif op == OP_ADD_IMAGE:
+                image_data, key = _operation_image(operation, images)
+                image_xrefs[key] = insert_image(
+                    doc, operation['page_number'], image_data,
+                    operation['x'], operation['y'], operation.get('width'), operation.get('height'),
+                    xref=image_xrefs.get(key, 0)
+                )
+            elif op == OP_STAMP:
+                image_data, key = None, None
+                if operation.get('image_index') is not None:
+                    image_data, key = _operation_image(operation, images)
+                xref = stamp_pages(
+                    doc, operation.get('pages'), operation['x'], operation['y'],
+                    image_data, operation.get('width'), operation.get('height'),
+                    operation.get('text'), operation.get('font_size', 12),
+                    image_xref=image_xrefs.get(key, 0)
+                )
+                if key is not None:
+                    image_xrefs[key] = xref
+            elif op == OP_ROTATE:
+                rotate_page(doc, operation['page_number'], operation['angle'])
+            elif op == OP_DELETE_PAGE:
+                delete_page(doc, operation['page_number'])
+            else:
+                raise ValueError(f"Unknown operation '{op}'")
+        except KeyError as e:
+            raise ValueError(f"Operation {position} ({op}): missing field {e}")
+        except ValueError as e:
+            raise ValueError(f"Operation {position} ({op}): {e}")
+
+
+@fitz_locked
+def edit_pdf(
+    pdf_id: str,
+    operations: List[Dict[str, Any]],
+    images: Optional[List[bytes]] = None
+) -> str:
+    """
+    Apply many edits to a PDF in one open/save cycle.
+    
+    Args:
+        pdf_id: Identifier of the source PDF
+        operations: Ordered edit operations (see apply_edit_operations)
+        images: Image file contents referenced by add_image operations
+        
+    Returns:
+        Filename of the edited PDF
+    """
+    doc = _open_source_pdf(pdf_id)
+    try:
+        apply_edit_operations(doc, operations, images)
+        return _save_generated_pdf(doc, pdf_id, "edited")
+    finally:
+        doc.close()
+
+
+@fitz_locked
+def add_text_to_pdf(
+    pdf_id: str,
+    page_number: int,
+    text: str,
+    x: float,
+    y: float,
+    font_size: int = 12
+) -> str:
+    """
+    Add text to a PDF at specified coordinates.
+    
+    Args:
+        pdf_id: Identifier of the source PDF
+        page_number: Page number (0-indexed)
+        text: Text to add
+        x: X coordinate
+        y: Y coordinate
+        font_size: Font size (default 12)
+        
+    Returns:
+        Filename of the edited PDF
+    """
+    doc = _open_source_pdf(pdf_id)
+    try:
+        insert_text(doc, page_number, text, x, y, font_size)
+        return _save_generated_pdf(doc, pdf_id, "edited")
+    finally:
+        doc.close()
 
 
+@fitz_locked
+def add_image_to_pdf(
+    pdf_id: str,
+    page_number: int,
+    image_data: bytes,
+    x: float,
+    y: float,
+    width: Optional[float] = None,
+    height: Optional[float] = None
+) -> str:
+    """
+    Add an image to a PDF at specified coordinates.
+    
+    Args:
+        pdf_id: Identifier of the source PDF
+        page_number: Page number (0-indexed)
+        image_data: Image file content as bytes
+        x: X coordinate
+        y: Y coordinate
+        width: Image width (default 200)
+        height: Image height (default 200)
+        
+    Returns:
+        Filename of the edited PDF
+    """
+    doc = _open_source_pdf(pdf_id)
+    try:
+        insert_image(doc, page_number, image_data, x, y, width, height)
+        return _save_generated_pdf(doc, pdf_id, "img")
+    finally:
+        doc.close()
+
+
+@fitz_locked
+def stamp_pdf(
+    pdf_id: str,
+    page_numbers: Optional[List[int]],
+    x: float,
+    y: float,
+    image_data: Optional[bytes] = None,
+    width: Optional[float] = None,
+    height: Optional[float] = None,
+    text: Optional[str] = None,
+    font_size: int = 12
+) -> str:
+    """
+    Stamp an image (e.g. a logo) and/or text on many pages of a PDF.
+    
+    The image is embedded once and shared by all pages (see stamp_pages),
+    and the document is saved once.
+    
+    Args:
+        pdf_id: Identifier of the source PDF
+        page_numbers: Pages to stamp (0-indexed), None for all pages
+        x: X coordinate
+        y: Y coordinate
+        image_data: Image file content as bytes
+        width: Image width (default 200)
+        height: Image height (default 200)
+        text: Text to add (y is the baseline)
+        font_size: Font size (default 12)
+        
+    Returns:
+        Filename of the stamped PDF
+    """
+    doc = _open_source_pdf(pdf_id)
+    try:
+        stamp_pages(doc, page_numbers, x, y, image_data, width, height, text, font_size)
+        return _save_generated_pdf(doc, pdf_id, "stamped")
+    finally:
+        doc.close()
+
+
+@fitz_locked
 def create_custom_pdf(
     title: str,
     body_text: str,
@@ -230,12 +803,8 @@ def create_custom_pdf(
     for img_data in images:
         new_page = doc.new_page(width=595, height=842)
         
-        # Open and process image
+        # Image size from the file header (the image itself is not decoded)
         img = Image.open(io.BytesIO(img_data))
-        if img.mode == 'RGBA':
-            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-            rgb_img.paste(img, mask=img.split()[3])
-            img = rgb_img
         
         # Calculate image dimensions to fit page (maintain aspect ratio)
         img_width, img_height = img.size
@@ -255,23 +824,36 @@ def create_custom_pdf(
         y = (page_height - new_height) / 2 + 50
         
         rect = fitz.Rect(x, y, x + new_width, y + new_height)
-        
-        # Convert to bytes
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='PNG')
-        img_bytes.seek(0)
-        
-        new_page.insert_image(rect, stream=img_bytes.getvalue())
+        new_page.insert_image(rect, stream=_image_stream(img_data, new_width, new_height))
     
     # Save PDF
     output_filename = f"custom_{uuid.uuid4().hex[:8]}.pdf"
     output_path = settings.GENERATED_DIR / output_filename
-    doc.save(output_path)
+    doc.save(output_path, deflate_images=True)
     doc.close()
     
     return output_filename
 
 
+def compute_page_fingerprints(pages_text: List[Tuple[int, str]]) -> List[bytes]:
+    """
+    Fingerprint each page by its extracted text.
+    
+    Pages with equal fingerprints produce the same chunks, which lets
+    re-indexing of derived documents (split, merge, reorder, rotate, edit)
+    reuse a base document's chunks and embeddings. Content streams are not
+    a safe key: pages drawn through Form XObjects (show_pdf_page, N-up
+    layouts) share an identical stream whatever text they show.
+    
+    Args:
+        pages_text: (page_number, text) tuples as returned by extract_text_from_pdf
+        
+    Returns:
+        32-byte digest per page, in the order given
+    """
+    return [hashlib.sha256(text.encode('utf-8')).digest() for _, text in pages_text]
+
+
 def get_pdf_path(pdf_id: str) -> Optional[Path]:
     """
     Get the path to an uploaded PDF by ID.
@@ -282,12 +864,37 @@ def get_pdf_path(pdf_id: str) -> Optional[Path]:
     Returns:
         Path to PDF file, or None if not found
     """
-    pdf_path = settings.UPLOAD_DIR / f"{pdf_id}.pdf"
+    storage_id = resolve_pdf_id(pdf_id)
+    if storage_id is None:
+        return None
+    pdf_path = settings.UPLOAD_DIR / f"{storage_id}.pdf"
     if pdf_path.exists():
         return pdf_path
     return None
 
 
+def delete_uploaded_pdf(pdf_id: str) -> Optional[str]:
+    """
+    Delete an uploaded PDF.
+    
+    Identical uploads share one stored file, which is only removed once
+    the last pdf_id referring to it is deleted.
+    
+    Args:
+        pdf_id: PDF identifier
+        
+    Returns:
+        Storage ID whose file was removed (its index should be removed
+        too), or None if other aliases still reference the content
+    """
+    storage_id = release_pdf_id(pdf_id)
+    if storage_id is not None:
+        pdf_path = settings.UPLOAD_DIR / f"{storage_id}.pdf"
+        evict_document(pdf_path)
+        pdf_path.unlink(missing_ok=True)
+    return storage_id
+
+
 def get_generated_pdf_path(filename: str) -> Optional[Path]:
     """
     Get the path to a generated PDF by filename.
@@ -2,36 +2,308 @@
 RAG (Retrieval-Augmented Generation) utilities.
 Handles embeddings, FAISS indexing, and RAG querying.
 """
-import pickle
+import os
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import deque, defaultdict
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Iterator, Tuple, Callable, Optional
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer
 
 from config import settings
-from pdf_utils import extract_text_from_pdf
+from embedding_backends import (
+    EmbeddingModel,
+    BACKEND_TORCH,
+    load_embedding_model,
+    embedding_model_key,
+    validate_backend,
+)
+from chunk_metadata import (
+    ChunkMetadata,
+    write_chunk_metadata,
+    load_chunk_metadata,
+    migrate_pickled_metadata,
+)
+from content_registry import resolve_pdf_id
+from embedding_dispatcher import EmbeddingDispatcher
+from embedding_server import RemoteEmbeddingModel
+from embedding_store import chunk_key, get_embeddings, put_embeddings, get_store_stats
+from global_index import get_global_index
+from lexical_index import (
+    LexicalIndex,
+    build_lexical_index,
+    write_lexical_index,
+    load_lexical_index,
+)
+from lru_cache import LRUCache
+from pdf_utils import extract_text_from_pdf, compute_page_fingerprints
+from vector_index import (
+    build_index,
+    choose_index_type,
+    INDEX_FLAT,
+    apply_search_params,
+    normalize_for_index,
+    similarity_scores,
+    is_lossy,
+    describe_index,
+)
 
 
 # Global embedding model (loaded once for performance)
-_embedding_model: SentenceTransformer = None
+_embedding_model: Optional[EmbeddingModel] = None
+_embedding_model_lock = threading.Lock()
+_embedding_backend: Optional[str] = None  # Backend of the in-process model (after any validation fallback)
 
+# Loaded (index, metadata, tier) entries keyed by storage ID
+_index_cache = LRUCache(settings.INDEX_CACHE_MAX_BYTES)
 
-def get_embedding_model() -> SentenceTransformer:
+# Loaded BM25 indexes keyed by storage ID
+_lexical_cache = LRUCache(settings.LEXICAL_CACHE_MAX_BYTES)
+
+# Memory-mapped chunk metadata for result lookup (global-index and lexical hits)
+_metadata_cache = LRUCache(settings.METADATA_CACHE_MAX_BYTES)
+
+# Residency tiers of loaded indexes
+TIER_HOT = "hot"  # Index and metadata read into RAM
+TIER_WARM = "warm"  # Index and metadata memory-mapped
+_tier_lock = threading.Lock()
+_index_access: Dict[str, deque] = {}  # storage ID -> recent query timestamps
+_tier_stats = {'promotions': 0, 'demotions': 0, 'unloads': 0}
+_last_tier_sweep = 0.0
+
+# Query embeddings keyed by (model name, normalized query text)
+_query_cache = LRUCache(
+    max_bytes=sys.maxsize,
+    max_entries=settings.QUERY_CACHE_MAX_ENTRIES
+)
+
+# Progress callback signature: (stage, fraction complete 0.0-1.0)
+ProgressCallback = Callable[[str, float], None]
+
+# Retrieval modes
+RETRIEVAL_HYBRID = "hybrid"  # BM25 and vector rankings fused with reciprocal rank fusion
+RETRIEVAL_VECTOR = "vector"
+RETRIEVAL_LEXICAL = "lexical"  # BM25 only; never loads the embedding model
+RETRIEVAL_MODES = (RETRIEVAL_HYBRID, RETRIEVAL_VECTOR, RETRIEVAL_LEXICAL)
+
+# Ranked retrieval hit: (score, storage ID, chunk row)
+Hit = Tuple[float, str, int]
+
+
+def get_embedding_model() -> EmbeddingModel:
     """
     Get or load the embedding model (singleton pattern).
+
+    The runtime is chosen by EMBEDDING_BACKEND (torch, onnx, onnx-int8).
+    With EMBEDDING_SERVER_SOCKET set, returns a proxy to the shared
+    embedding server that loads the model in-process only while the
+    server is unreachable.
     
     Returns:
-        SentenceTransformer model instance
+        SentenceTransformer-compatible model instance
     """
     global _embedding_model
     if _embedding_model is None:
-        print(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
-        _embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
-        print("Embedding model loaded successfully")
+        # Indexing jobs run on worker threads; load the model only once
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                if settings.EMBEDDING_SERVER_SOCKET is not None:
+                    _embedding_model = RemoteEmbeddingModel(
+                        settings.EMBEDDING_SERVER_SOCKET, _load_local_embedding_model, get_embedding_model_key
+                    )
+                else:
+                    _embedding_model = _load_local_embedding_model()
     return _embedding_model
 
 
+def _load_local_embedding_model() -> EmbeddingModel:
+    """Load the embedding model into this process and record its backend."""
+    global _embedding_backend
+    backend = settings.EMBEDDING_BACKEND
+    print(f"Loading embedding model: {settings.EMBEDDING_MODEL} ({backend})")
+    model = load_embedding_model(backend)
+    if settings.EMBEDDING_BACKEND_VALIDATE and not validate_backend(model, backend):
+        print("Falling back to the torch embedding backend")
+        backend = BACKEND_TORCH
+        model = load_embedding_model(backend)
+    _embedding_backend = backend
+    print("Embedding model loaded successfully")
+    return model
+
+
+def get_embedding_server_stats() -> Dict:
+    """Calls served by the shared embedding server vs in-process."""
+    if not isinstance(_embedding_model, RemoteEmbeddingModel):
+        return {'enabled': settings.EMBEDDING_SERVER_SOCKET is not None}
+    return dict(_embedding_model.stats(), enabled=True)
+
+
+def get_embedding_model_key() -> str:
+    """
+    Identifier of the embedding model and backend, used to key cached embeddings.
+    
+    Reflects the backend actually loaded. While EMBEDDING_BACKEND_VALIDATE
+    may still fall back to torch, the model is loaded first to find out.
+    """
+    if (
+        _embedding_backend is None
+        and settings.EMBEDDING_BACKEND_VALIDATE
+        and settings.EMBEDDING_BACKEND != BACKEND_TORCH
+    ):
+        get_embedding_model()
+    return embedding_model_key(_embedding_backend)
+
+
+# Coalesces query embeddings of concurrent requests into shared model calls
+_embedding_dispatcher = EmbeddingDispatcher(
+    get_embedding_model,
+    window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+    max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE
+)
+
+
+def get_embedding_dispatcher_stats() -> Dict:
+    """Batch size and queueing delay metrics of query embedding."""
+    return _embedding_dispatcher.stats()
+
+
+def shutdown_embedding_dispatcher():
+    """Stop the query embedding worker."""
+    _embedding_dispatcher.close()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize query text for embedding-cache lookups.
+    
+    Applies Unicode NFKC normalization, collapses whitespace and (when
+    QUERY_CACHE_CASEFOLD is set) ignores case.
+    """
+    normalized = ' '.join(unicodedata.normalize('NFKC', query).split())
+    if settings.QUERY_CACHE_CASEFOLD:
+        normalized = normalized.casefold()
+    return normalized
+
+
+def encode_queries(queries: List[str]) -> np.ndarray:
+    """
+    Embed queries, reusing cached embeddings for repeated questions.
+    
+    Only queries missing from the cache are encoded, in one batch; with
+    EMBEDDING_BATCH_WINDOW_MS set, that batch is shared with queries of
+    other concurrent requests.
+    
+    Args:
+        queries: Query strings
+        
+    Returns:
+        float32 array of shape (len(queries), dimension)
+    """
+    keys = [(get_embedding_model_key(), normalize_query(q)) for q in queries]
+    vectors: Dict[Tuple[str, str], np.ndarray] = {}
+    missing = []
+    
+    for key in dict.fromkeys(keys):  # Unique keys, in order
+        cached = _query_cache.get(key) if settings.QUERY_CACHE_MAX_ENTRIES > 0 else None
+        if cached is not None:
+            vectors[key] = cached
+        else:
+            missing.append(key)
+    
+    if missing:
+        texts = [text for _, text in missing]
+        if settings.EMBEDDING_BATCH_WINDOW_MS > 0:
+            embeddings = _embedding_dispatcher.encode(texts)
+        else:
+            embeddings = np.array(get_embedding_model().encode(texts)).astype('float32')
+        for key, embedding in zip(missing, embeddings):
+            vectors[key] = embedding
+            if settings.QUERY_CACHE_MAX_ENTRIES > 0:
+                _query_cache.put(key, embedding, embedding.nbytes)
+    
+    return np.vstack([vectors[key] for key in keys])
+
+
+def encode_query(query: str) -> np.ndarray:
+    """
+    Embed a single query (cached, see encode_queries).
+    
+    Returns:
+        float32 array of shape (1, dimension)
+    """
+    return encode_queries([query])
+
+
+def get_query_cache_stats() -> Dict:
+    """Hit/miss counters of the query-embedding cache."""
+    return _query_cache.stats()
+
+
+def embed_chunks(
+    chunks: List[str],
+    progress_callback: Optional[ProgressCallback] = None
+) -> np.ndarray:
+    """
+    Embed text chunks, reusing vectors from the persistent embedding store.
+    
+    Only chunks never embedded before (with the current model) are sent to
+    the model, so derived documents (split, merge, extracted pages) cost
+    almost no model time. The model is not even loaded when every chunk
+    is already stored.
+    
+    Args:
+        chunks: Text chunks
+        progress_callback: Optional callable receiving ("embedding", progress)
+        
+    Returns:
+        float32 array of shape (len(chunks), dimension)
+    """
+    def report(progress: float):
+        if progress_callback is not None:
+            progress_callback("embedding", progress)
+    
+    model_key = get_embedding_model_key()
+    keys = [chunk_key(model_key, chunk) for chunk in chunks]
+    vectors = get_embeddings(keys)
+    
+    # Positions of chunks that still need embedding (repeated chunks only once)
+    missing = []
+    pending = set()
+    for i, key in enumerate(keys):
+        if key not in vectors and key not in pending:
+            pending.add(key)
+            missing.append(i)
+    
+    if missing:
+        print(f"Generating embeddings for {len(missing)} of {len(chunks)} chunks "
+              f"({len(chunks) - len(missing)} reused)...")
+        model = get_embedding_model()
+        step = max(1, settings.EMBEDDING_PROGRESS_BATCH)
+        for start in range(0, len(missing), step):
+            batch = missing[start:start + step]
+            embeddings = np.array(
+                model.encode([chunks[i] for i in batch], show_progress_bar=False)
+            ).astype('float32')
+            new_items = [(keys[i], embedding) for i, embedding in zip(batch, embeddings)]
+            put_embeddings(new_items)
+            vectors.update(new_items)
+            report(min(start + step, len(missing)) / len(missing))
+    else:
+        print(f"Reused stored embeddings for all {len(chunks)} chunks")
+    
+    report(1.0)
+    return np.vstack([vectors[key] for key in keys]).astype('float32')
+
+
+def get_embedding_store_stats() -> Dict:
+    """Hit ratio and size of the persistent chunk embedding store."""
+    return get_store_stats()
+
+
 def chunk_text(text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
     """
     Split text into chunks with optional overlap.
@@ -77,114 +349,830 @@ def chunk_text(text: str, chunk_size: int = None, overlap: int = None) -> List[s
     return chunks
 
 
-def create_index_for_pdf(pdf_id: str, pdf_path: Path) -> bool:
+def get_index_paths(pdf_id: str) -> Tuple[Path, Path]:
+    """
+    Get the on-disk paths of the FAISS index and metadata for a PDF.
+    
+    Args:
+        pdf_id: PDF identifier
+        
+    Returns:
+        Tuple of (index path, metadata path)
+    """
+    index_path = settings.INDEX_DIR / f"{pdf_id}_index.faiss"
+    meta_path = settings.INDEX_DIR / f"{pdf_id}_meta.chunks"
+    return index_path, meta_path
+
+
+def get_page_fingerprints_path(pdf_id: str) -> Path:
+    """Get the on-disk path of the page fingerprints of an indexed PDF."""
+    return settings.INDEX_DIR / f"{pdf_id}_pages.npy"
+
+
+def get_vectors_path(pdf_id: str) -> Path:
+    """Get the on-disk path of the full-precision vectors kept for quantized indexes."""
+    return settings.INDEX_DIR / f"{pdf_id}_vectors.npy"
+
+
+def get_lexical_index_path(pdf_id: str) -> Path:
+    """Get the on-disk path of the BM25 index for a PDF."""
+    return settings.INDEX_DIR / f"{pdf_id}_bm25.npz"
+
+
+def _legacy_meta_path(pdf_id: str) -> Path:
+    """Path of the pickled metadata written by older versions."""
+    return settings.INDEX_DIR / f"{pdf_id}_meta.pkl"
+
+
+def index_exists(pdf_id: str) -> bool:
+    """Check whether a FAISS index has been built for a PDF (or its stored content)."""
+    storage_id = resolve_pdf_id(pdf_id)
+    if storage_id is None:
+        return False
+    index_path, meta_path = get_index_paths(storage_id)
+    return index_path.exists() and (meta_path.exists() or _legacy_meta_path(storage_id).exists())
+
+
+def delete_index(storage_id: str):
+    """
+    Delete the FAISS index and metadata stored under an ID.
+    
+    Args:
+        storage_id: ID the index was created under (see content_registry)
+    """
+    for path in (
+        *get_index_paths(storage_id),
+        get_lexical_index_path(storage_id),
+        get_page_fingerprints_path(storage_id),
+        get_vectors_path(storage_id),
+        _legacy_meta_path(storage_id),
+    ):
+        path.unlink(missing_ok=True)
+    _index_cache.invalidate(storage_id)
+    _lexical_cache.invalidate(storage_id)
+    _metadata_cache.invalidate(storage_id)
+    if settings.GLOBAL_INDEX_ENABLED:
+        get_global_index(settings.GLOBAL_INDEX_NAME).remove_document(storage_id)
+
+
+def create_index_for_pdf(
+    pdf_id: str,
+    pdf_path: Path,
+    progress_callback: Optional[ProgressCallback] = None,
+    base_pdf_ids: Optional[List[str]] = None,
+    raise_errors: bool = False
+) -> bool:
     """
     Create a FAISS index for a PDF.
     
+    Page fingerprints (see compute_page_fingerprints) are stored with the
+    index. When base_pdf_ids name indexed documents this PDF was derived
+    from (split, merge, reorder, rotate, edit - or an earlier version of
+    itself), pages whose fingerprint matches a base page reuse that page's
+    chunks, so only new or changed pages are chunked and embedded. The
+    first base's ID-mapped index is copied and updated with remove_ids /
+    add_with_ids rather than rebuilt.
+    
     Args:
         pdf_id: Unique PDF identifier
         pdf_path: Path to the PDF file
+        progress_callback: Optional callable receiving (stage, progress)
+            updates while the index is built
+        base_pdf_ids: PDFs whose unchanged pages can be reused
+        raise_errors: Raise the failure instead of returning False (so
+            callers can report why indexing failed)
         
     Returns:
         True if successful, False otherwise
+        
+    Raises:
+        ValueError: If raise_errors is set and the PDF has no extractable text
+        Exception: If raise_errors is set, whatever made extraction,
+            embedding or indexing fail
     """
+    def report(stage: str, progress: float):
+        if progress_callback is not None:
+            progress_callback(stage, progress)
+    
     try:
-        # Extract text from PDF
+        report("extracting", 0.0)
         pages_text = extract_text_from_pdf(pdf_path)
+        fingerprints = compute_page_fingerprints(pages_text)
+        bases = _load_reuse_sources(base_pdf_ids or [])
         
-        # Prepare chunks and metadata
-        chunks = []
-        metadata = []
+        # Pages found in a base document: fingerprint -> (base number, metadata rows)
+        page_sources: Dict[bytes, Tuple[int, List[int]]] = {}
+        for base_num, (_, base_metadata, base_fingerprints) in enumerate(bases):
+            rows_by_page = defaultdict(list)
+            for row, page in enumerate(base_metadata.page_numbers):
+                rows_by_page[int(page)].append(row)
+            for page_index, fingerprint in enumerate(base_fingerprints):
+                page_sources.setdefault(bytes(fingerprint), (base_num, rows_by_page.get(page_index + 1, [])))
+        
+        # (page number, chunk text, vector ID kept from the first base or None)
+        entries = []
+        kept_ids = set()
+        changed_pages = []
+        for page_index, fingerprint in enumerate(fingerprints):
+            source = page_sources.get(fingerprint)
+            if source is None:
+                changed_pages.append(page_index)
+                continue
+            base_num, rows = source
+            base_metadata = bases[base_num][1]
+            for row in rows:
+                chunk_id = int(base_metadata.chunk_ids[row]) if base_num == 0 else None
+                if chunk_id in kept_ids:
+                    chunk_id = None  # Page repeated in this document
+                elif chunk_id is not None:
+                    kept_ids.add(chunk_id)
+                entries.append((page_index + 1, base_metadata.text(row), chunk_id))
         
-        for page_num, page_text in pages_text:
+        # Chunk only new or changed pages
+        for page_index in changed_pages:
+            page_num, page_text = pages_text[page_index]
             if not page_text.strip():
                 continue
-            
-            # Chunk the page text
-            page_chunks = chunk_text(page_text)
-            
-            for chunk in page_chunks:
+            for chunk in chunk_text(page_text):
                 if chunk.strip():  # Only add non-empty chunks
-                    chunks.append(chunk)
-                    metadata.append({
-                        'page_number': page_num + 1,  # 1-indexed for display
-                        'text_chunk': chunk
-                    })
+                    entries.append((page_num + 1, chunk, None))  # 1-indexed for display
         
-        if not chunks:
-            print(f"Warning: No text chunks found for PDF {pdf_id}")
-            return False
+        if not entries:
+            raise ValueError("No extractable text found in the PDF")
         
-        # Get embedding model
-        model = get_embedding_model()
+        # New chunks get IDs after the first base's; metadata rows are ordered by ID
+        entries.sort(key=lambda entry: entry[0])
+        next_id = int(bases[0][1].chunk_ids.max()) + 1 if bases and len(bases[0][1]) else 0
+        numbered = []
+        for page_number, chunk, chunk_id in entries:
+            if chunk_id is None:
+                chunk_id = next_id
+                next_id += 1
+            numbered.append((chunk_id, page_number, chunk))
+        numbered.sort(key=lambda entry: entry[0])
+        chunk_ids = np.array([entry[0] for entry in numbered], dtype='int64')
+        page_numbers = [entry[1] for entry in numbered]
+        chunks = [entry[2] for entry in numbered]
         
-        # Generate embeddings for all chunks
-        print(f"Generating embeddings for {len(chunks)} chunks...")
-        embeddings = model.encode(chunks, show_progress_bar=True)
-        embeddings = np.array(embeddings).astype('float32')
+        if bases:
+            print(f"Reusing {len(fingerprints) - len(changed_pages)} of {len(fingerprints)} pages "
+                  f"for PDF {pdf_id} ({len(kept_ids)} vectors kept in place)")
         
-        # Create FAISS index
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dimension)  # L2 distance
-        index.add(embeddings)
+        # Update a copy of the first base's index, or build a new one
+        report("embedding", 0.1)
+        on_embedding = lambda stage, progress: report(stage, 0.1 + 0.8 * progress)
+        embeddings = None
+        index = _updatable_base_index(bases[0][0], bases[0][1], len(chunks)) if kept_ids else None
+        if index is not None:
+            try:
+                index.remove_ids(np.setdiff1d(bases[0][1].chunk_ids, chunk_ids))
+                new_rows = [row for row, chunk_id in enumerate(chunk_ids) if int(chunk_id) not in kept_ids]
+                if new_rows:
+                    new_embeddings = embed_chunks([chunks[row] for row in new_rows], progress_callback=on_embedding)
+                    index.add_with_ids(normalize_for_index(index, new_embeddings), chunk_ids[new_rows])
+                apply_search_params(index)
+            except RuntimeError as e:
+                print(f"Warning: could not update index of {bases[0][0]} in place, rebuilding: {e}")
+                index = None
+        
+        if index is None:
+            # Generate embeddings (only for chunks not already in the embedding store)
+            embeddings = embed_chunks(chunks, progress_callback=on_embedding)
+            
+            # Create FAISS index (type chosen by corpus size, see vector_index)
+            report("indexing", 0.9)
+            index = build_index(embeddings, ids=chunk_ids)
         
         # Save index and metadata
-        index_path = settings.INDEX_DIR / f"{pdf_id}_index.faiss"
-        meta_path = settings.INDEX_DIR / f"{pdf_id}_meta.pkl"
+        report("writing", 0.95)
+        index_path, meta_path = get_index_paths(pdf_id)
+        
+        # Lossy (quantized) indexes keep full-precision vectors on disk for exact re-ranking
+        lossy = is_lossy(index)
+        if embeddings is None and (lossy or settings.GLOBAL_INDEX_ENABLED):
+            embeddings = embed_chunks(chunks) if lossy else _vectors_by_row(index, chunk_ids)
+        vectors_path = get_vectors_path(pdf_id)
+        if lossy:
+            _save_array(vectors_path, normalize_for_index(index, embeddings))
+        else:
+            vectors_path.unlink(missing_ok=True)
         
         faiss.write_index(index, str(index_path))
         
-        with open(meta_path, 'wb') as f:
-            pickle.dump(metadata, f)
+        write_chunk_metadata(meta_path, page_numbers, chunks, chunk_ids)
+        write_lexical_index(get_lexical_index_path(pdf_id), build_lexical_index(chunks))
+        _save_array(
+            get_page_fingerprints_path(pdf_id),
+            np.frombuffer(b"".join(fingerprints), dtype='uint8').reshape(len(fingerprints), 32)
+        )
+        _index_cache.invalidate(pdf_id)
+        _lexical_cache.invalidate(pdf_id)
+        _metadata_cache.invalidate(pdf_id)
         
-        print(f"Index created successfully for PDF {pdf_id}: {len(chunks)} chunks")
+        if settings.GLOBAL_INDEX_ENABLED:
+            try:
+                get_global_index(settings.GLOBAL_INDEX_NAME).add_document(pdf_id, embeddings)
+            except Exception as e:
+                # Cross-document queries fall back to this PDF's own index
+                print(f"Warning: could not add PDF {pdf_id} to the global index: {e}")
+        
+        print(f"Index created successfully for PDF {pdf_id}: {len(chunks)} chunks, {describe_index(index)}")
+        report("done", 1.0)
         return True
         
     except Exception as e:
         print(f"Error creating index for PDF {pdf_id}: {e}")
+        if raise_errors:
+            raise
         return False
 
 
-def load_index(pdf_id: str) -> Tuple[faiss.Index, List[Dict]]:
+def _save_array(path: Path, array: np.ndarray):
+    """Write an array as .npy atomically (temp file + rename)."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, array, allow_pickle=False)
+    os.replace(tmp_name, path)
+
+
+def _load_reuse_sources(base_pdf_ids: List[str]) -> List[Tuple[str, ChunkMetadata, np.ndarray]]:
+    """
+    Load (storage ID, chunk metadata, page fingerprints) of indexed base PDFs.
+    
+    Bases indexed before fingerprints were stored are skipped.
+    """
+    bases = []
+    seen = set()
+    for base_pdf_id in base_pdf_ids:
+        storage_id = resolve_pdf_id(base_pdf_id)
+        if storage_id is None or storage_id in seen or not index_exists(storage_id):
+            continue
+        fingerprints_path = get_page_fingerprints_path(storage_id)
+        if not fingerprints_path.exists():
+            continue
+        seen.add(storage_id)
+        _ensure_columnar_metadata(storage_id)
+        metadata = load_chunk_metadata(get_index_paths(storage_id)[1])
+        bases.append((storage_id, metadata, np.load(fingerprints_path, allow_pickle=False)))
+    return bases
+
+
+def _updatable_base_index(storage_id: str, metadata: ChunkMetadata, n_chunks: int) -> Optional[faiss.Index]:
+    """
+    Read a base document's index as an ID-mapped index to update in place.
+    
+    Returns None when the new document should get a fresh index instead:
+    HNSW indexes (FAISS cannot remove from them), legacy IVF-PQ indexes
+    without an ID map, or flat indexes that have grown past the size where
+    the factory picks another type. Legacy flat indexes are converted to
+    an ID map over the same vectors.
+    """
+    index = faiss.read_index(str(get_index_paths(storage_id)[0]))
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if hasattr(inner, 'hnsw'):
+        return None
+    if isinstance(inner, faiss.IndexFlat) and choose_index_type(n_chunks) != INDEX_FLAT:
+        return None
+    if hasattr(index, 'id_map'):
+        return index
+    if isinstance(index, faiss.IndexFlat):
+        mapped = faiss.IndexIDMap2(faiss.IndexFlat(index.d, index.metric_type))
+        mapped.add_with_ids(index.reconstruct_n(0, index.ntotal), metadata.chunk_ids)
+        return mapped
+    return None
+
+
+def _vectors_by_row(index: faiss.Index, chunk_ids: np.ndarray) -> np.ndarray:
+    """Stored vectors of an ID-mapped index in chunk metadata row order."""
+    inner = faiss.downcast_index(index.index)
+    vectors = inner.reconstruct_n(0, inner.ntotal)
+    rows = np.searchsorted(chunk_ids, faiss.vector_to_array(index.id_map))
+    ordered = np.empty_like(vectors)
+    ordered[rows] = vectors
+    return ordered
+
+
+def load_index(pdf_id: str) -> Tuple[faiss.Index, ChunkMetadata]:
     """
     Load FAISS index and metadata for a PDF.
     
+    Aliases of deduplicated uploads load the index of their stored content.
+    Loaded indexes are kept in a process-wide LRU cache and reloaded when
+    the files on disk change. Large indexes are memory-mapped (warm) so
+    worker processes share OS page-cache pages; indexes queried often are
+    read fully into RAM (hot), and idle ones are unloaded (cold).
+    
     Args:
         pdf_id: PDF identifier
         
     Returns:
-        Tuple of (FAISS index, metadata list)
+        Tuple of (FAISS index, chunk metadata). Metadata rows are
+        {'page_number', 'text_chunk'} dicts decoded on access.
         
     Raises:
         FileNotFoundError: If index files don't exist
     """
-    index_path = settings.INDEX_DIR / f"{pdf_id}_index.faiss"
-    meta_path = settings.INDEX_DIR / f"{pdf_id}_meta.pkl"
+    storage_id = resolve_pdf_id(pdf_id)
+    if storage_id is None:
+        raise FileNotFoundError(f"Index not found for PDF {pdf_id}")
+    index_path, meta_path = get_index_paths(storage_id)
+    _ensure_columnar_metadata(storage_id)
     
-    if not index_path.exists() or not meta_path.exists():
+    try:
+        index_stat = index_path.stat()
+        meta_stat = meta_path.stat()
+    except FileNotFoundError:
         raise FileNotFoundError(f"Index not found for PDF {pdf_id}")
     
-    index = faiss.read_index(str(index_path))
+    signature = (index_stat.st_mtime_ns, meta_stat.st_mtime_ns)
+    _sweep_index_tiers()
+    hot = _record_index_access(storage_id)
+    
+    cached = _index_cache.get(storage_id, signature)
+    if cached is not None and not (hot and cached[2] == TIER_WARM):
+        return cached[0], cached[1]
+    
+    if cached is not None:
+        tier = TIER_HOT  # Warm index queried often enough to be promoted
+        with _tier_lock:
+            _tier_stats['promotions'] += 1
+    elif hot or not settings.INDEX_MMAP_ENABLED or index_stat.st_size < settings.INDEX_MMAP_MIN_BYTES:
+        tier = TIER_HOT
+    else:
+        tier = TIER_WARM
+    
+    entry = _load_index_entry(index_path, meta_path, tier)
+    _index_cache.put(storage_id, entry, _index_entry_bytes(entry, index_stat.st_size), signature)
+    return entry[0], entry[1]
+
+
+def get_lexical_index(storage_id: str) -> LexicalIndex:
+    """
+    Load the BM25 index of a stored document (cached, reloaded on change).
+    
+    Documents indexed before lexical search existed get their BM25 index
+    built from the chunk metadata on first use - no model needed.
+    
+    Raises:
+        FileNotFoundError: If the document has no chunk metadata
+    """
+    path = get_lexical_index_path(storage_id)
+    if not path.exists():
+        _ensure_columnar_metadata(storage_id)
+        metadata = load_chunk_metadata(get_index_paths(storage_id)[1])
+        write_lexical_index(path, build_lexical_index([metadata.text(i) for i in range(len(metadata))]))
+    
+    signature = path.stat().st_mtime_ns
+    cached = _lexical_cache.get(storage_id, signature)
+    if cached is not None:
+        return cached
+    lexical_index = load_lexical_index(path)
+    _lexical_cache.put(storage_id, lexical_index, lexical_index.nbytes, signature)
+    return lexical_index
+
+
+def get_chunk_metadata(storage_id: str) -> ChunkMetadata:
+    """
+    Load the chunk metadata of a stored document (cached, reloaded on change).
+    
+    Used to look up hits that did not come from a loaded per-document index.
+    
+    Raises:
+        FileNotFoundError: If the document has no chunk metadata
+    """
+    meta_path = get_index_paths(storage_id)[1]
+    try:
+        signature = meta_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        _ensure_columnar_metadata(storage_id)
+        signature = meta_path.stat().st_mtime_ns
+    
+    cached = _metadata_cache.get(storage_id, signature)
+    if cached is not None:
+        return cached
+    metadata = load_chunk_metadata(meta_path, mmap=True)
+    _metadata_cache.put(storage_id, metadata, metadata.memory_bytes, signature)
+    return metadata
+
+
+def _ensure_columnar_metadata(storage_id: str):
+    """Convert metadata of indexes built before the columnar format on first use."""
+    _, meta_path = get_index_paths(storage_id)
+    legacy_path = _legacy_meta_path(storage_id)
+    if not meta_path.exists() and legacy_path.exists():
+        try:
+            count = migrate_pickled_metadata(legacy_path, meta_path)
+            print(f"Migrated pickled metadata for {storage_id} ({count} chunks)")
+        except FileNotFoundError:
+            pass  # Another worker migrated it first
+
+
+def _read_faiss_index(index_path: Path, mmap: bool) -> faiss.Index:
+    """Read a FAISS index, memory-mapped when requested and supported."""
+    if mmap:
+        # IO_FLAG_MMAP_IFC maps flat codes too (newer FAISS); IO_FLAG_MMAP covers IVF lists
+        flags = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+        try:
+            return faiss.read_index(str(index_path), flags)
+        except RuntimeError as e:
+            print(f"Warning: mmap load failed for {index_path.name}, reading into RAM: {e}")
+    return faiss.read_index(str(index_path))
+
+
+def _load_index_entry(index_path: Path, meta_path: Path, tier: str) -> Tuple[faiss.Index, ChunkMetadata, str]:
+    """Load an index and its metadata for the given residency tier."""
+    mmap = tier == TIER_WARM
+    index = _read_faiss_index(index_path, mmap=mmap)
+    apply_search_params(index)
+    metadata = load_chunk_metadata(meta_path, mmap=mmap)
+    return index, metadata, tier
+
+
+def _index_entry_bytes(entry: Tuple[faiss.Index, ChunkMetadata, str], index_file_size: int) -> int:
+    """Private memory charged to the cache budget (mmapped pages are shared page cache)."""
+    index, metadata, tier = entry
+    if tier == TIER_WARM:
+        return metadata.memory_bytes
+    return index_file_size + metadata.memory_bytes + metadata.text_bytes
+
+
+def _record_index_access(storage_id: str) -> bool:
+    """
+    Record a query against an index.
+    
+    Returns:
+        True if the index is hot (queried at least INDEX_HOT_MIN_HITS times
+        within INDEX_HOT_WINDOW_SECONDS)
+    """
+    now = time.time()
+    cutoff = now - settings.INDEX_HOT_WINDOW_SECONDS
+    with _tier_lock:
+        accesses = _index_access.setdefault(storage_id, deque())
+        accesses.append(now)
+        while accesses and accesses[0] < cutoff:
+            accesses.popleft()
+        while len(accesses) > settings.INDEX_HOT_MIN_HITS:
+            accesses.popleft()
+        return len(accesses) >= settings.INDEX_HOT_MIN_HITS
+
+
+def _sweep_index_tiers():
+    """
+    Demote idle indexes: hot -> warm (memory-mapped), warm -> cold (unloaded).
+    
+    Runs at most once every INDEX_TIER_SWEEP_SECONDS.
+    """
+    global _last_tier_sweep
+    now = time.time()
+    with _tier_lock:
+        if now - _last_tier_sweep < settings.INDEX_TIER_SWEEP_SECONDS:
+            return
+        _last_tier_sweep = now
+        last_access = {key: accesses[-1] for key, accesses in _index_access.items() if accesses}
+    
+    for storage_id in _index_cache.keys():
+        entry = _index_cache.peek(storage_id)
+        if entry is None:
+            continue
+        idle = now - last_access.get(storage_id, 0.0)
+        tier = entry[2]
+        
+        index_path, meta_path = get_index_paths(storage_id)
+        try:
+            index_stat, meta_stat = index_path.stat(), meta_path.stat()
+        except FileNotFoundError:
+            _index_cache.invalidate(storage_id)
+            continue
+        # Small indexes are never memory-mapped; they go straight from hot to cold
+        mappable = settings.INDEX_MMAP_ENABLED and index_stat.st_size >= settings.INDEX_MMAP_MIN_BYTES
+        
+        if idle > settings.INDEX_WARM_IDLE_SECONDS and (tier == TIER_WARM or not mappable):
+            _index_cache.invalidate(storage_id)
+            with _tier_lock:
+                _index_access.pop(storage_id, None)
+                _tier_stats['unloads'] += 1
+        elif tier == TIER_HOT and idle > settings.INDEX_HOT_IDLE_SECONDS and mappable:
+            try:
+                warm_entry = _load_index_entry(index_path, meta_path, TIER_WARM)
+            except (FileNotFoundError, RuntimeError):
+                _index_cache.invalidate(storage_id)
+                continue
+            signature = (index_stat.st_mtime_ns, meta_stat.st_mtime_ns)
+            _index_cache.put(
+                storage_id, warm_entry, _index_entry_bytes(warm_entry, index_stat.st_size), signature
+            )
+            with _tier_lock:
+                _tier_stats['demotions'] += 1
+    
+    # Forget access history of indexes that are no longer loaded
+    loaded = set(_index_cache.keys())
+    with _tier_lock:
+        for storage_id in [k for k in _index_access if k not in loaded]:
+            accesses = _index_access[storage_id]
+            if not accesses or now - accesses[-1] > settings.INDEX_HOT_WINDOW_SECONDS:
+                del _index_access[storage_id]
+
+
+def get_index_tier_stats() -> Dict:
+    """Number of hot/warm indexes and tier transition counters."""
+    tiers = {TIER_HOT: 0, TIER_WARM: 0}
+    for storage_id in _index_cache.keys():
+        entry = _index_cache.peek(storage_id)
+        if entry is not None:
+            tiers[entry[2]] += 1
+    with _tier_lock:
+        return dict(tiers, **_tier_stats)
+
+
+def migrate_legacy_metadata() -> int:
+    """
+    Convert every pickled metadata file in INDEX_DIR to the columnar format.
+    
+    load_index migrates lazily; this converts everything up front.
+    
+    Returns:
+        Number of indexes migrated
+    """
+    migrated = 0
+    for legacy_path in settings.INDEX_DIR.glob("*_meta.pkl"):
+        storage_id = legacy_path.name[:-len("_meta.pkl")]
+        _, meta_path = get_index_paths(storage_id)
+        if not meta_path.exists():
+            migrate_pickled_metadata(legacy_path, meta_path)
+            migrated += 1
+    return migrated
+
+
+def sync_global_index() -> int:
+    """
+    Add every indexed document missing from the global index.
     
-    with open(meta_path, 'rb') as f:
-        metadata = pickle.load(f)
+    Documents indexed before GLOBAL_INDEX_ENABLED was turned on are still
+    answered from their own indexes; this backfills them. Vectors come from
+    the embedding store, so the model only runs for evicted chunks.
     
-    return index, metadata
+    Returns:
+        Number of documents added
+    """
+    global_index = get_global_index(settings.GLOBAL_INDEX_NAME)
+    added = 0
+    for index_path in settings.INDEX_DIR.glob("*_index.faiss"):
+        storage_id = index_path.name[:-len("_index.faiss")]
+        if global_index.contains(storage_id) or not index_exists(storage_id):
+            continue
+        _ensure_columnar_metadata(storage_id)
+        metadata = load_chunk_metadata(get_index_paths(storage_id)[1])
+        embeddings = embed_chunks([metadata.text(i) for i in range(len(metadata))])
+        global_index.add_document(storage_id, embeddings)
+        added += 1
+    return added
+
+
+def get_global_index_stats() -> Dict:
+    """Documents and vectors in the global index."""
+    stats = get_global_index(settings.GLOBAL_INDEX_NAME).stats()
+    stats['enabled'] = settings.GLOBAL_INDEX_ENABLED
+    return stats
+
+
+def get_index_cache_stats() -> Dict:
+    """Hit/miss counters and memory use of the loaded-index cache."""
+    return _index_cache.stats()
+
+
+def get_lexical_cache_stats() -> Dict:
+    """Hit/miss counters and memory use of the loaded BM25 index cache."""
+    return _lexical_cache.stats()
+
+
+def get_metadata_cache_stats() -> Dict:
+    """Hit/miss counters and memory use of the chunk metadata cache."""
+    return _metadata_cache.stats()
+
+
+def _resolve_documents(pdf_ids: List[str]) -> Dict[str, List[str]]:
+    """Map storage IDs of indexed PDFs to the requested PDF IDs that share them."""
+    aliases: Dict[str, List[str]] = defaultdict(list)
+    for pdf_id in pdf_ids:
+        storage_id = resolve_pdf_id(pdf_id)
+        if storage_id is not None and index_exists(storage_id):
+            aliases[storage_id].append(pdf_id)
+    return aliases
+
+
+def _vector_rankings(
+    storage_ids: List[str],
+    queries: List[str],
+    k: int,
+    metadata_by_id: Dict[str, ChunkMetadata]
+) -> List[List[Hit]]:
+    """
+    Rank chunks of the given documents by embedding similarity.
+    
+    All queries are embedded in one batch. Documents in the global index
+    share one filtered search; the rest are searched in their own indexes,
+    each once with the whole query matrix.
+    """
+    query_embeddings = encode_queries(queries)
+    rankings: List[List[Hit]] = [[] for _ in queries]
+    
+    in_global = set()
+    if settings.GLOBAL_INDEX_ENABLED and storage_ids:
+        global_index = get_global_index(settings.GLOBAL_INDEX_NAME)
+        in_global = {storage_id for storage_id in storage_ids if global_index.contains(storage_id)}
+        if in_global:
+            results = global_index.search(query_embeddings, list(in_global), k)
+            for ranking, result in zip(rankings, results):
+                ranking.extend((score, storage_id, row) for storage_id, row, score in result)
+    
+    # Documents indexed before the global index was enabled
+    for storage_id in storage_ids:
+        if storage_id in in_global:
+            continue
+        index, metadata = load_index(storage_id)
+        metadata_by_id[storage_id] = metadata
+        
+        # Quantized indexes: over-fetch candidates, then re-rank them exactly
+        vectors = _load_full_vectors(storage_id) if is_lossy(index) else None
+        depth = k * max(1, settings.INDEX_RERANK_FACTOR) if vectors is not None else k
+        index_queries = normalize_for_index(index, query_embeddings)
+        distances, indices = index.search(index_queries, min(depth, len(metadata)))
+        rows_by_query = metadata.rows_for_ids(indices)  # Vector IDs -> metadata rows
+        if vectors is not None:
+            scores_by_query, rows_by_query = _rerank_exact(index, index_queries, vectors, rows_by_query, k)
+        else:
+            scores_by_query = similarity_scores(index, distances)
+        
+        for ranking, scores, rows in zip(rankings, scores_by_query, rows_by_query):
+            ranking.extend(
+                (float(score), storage_id, int(row)) for score, row in zip(scores, rows) if row >= 0
+            )
+    
+    for ranking in rankings:
+        ranking.sort(key=lambda hit: hit[0], reverse=True)
+    return rankings
+
+
+def _load_full_vectors(storage_id: str) -> Optional[np.ndarray]:
+    """Memory-map the full-precision vectors of a quantized index (None if absent)."""
+    try:
+        return np.load(get_vectors_path(storage_id), mmap_mode='r', allow_pickle=False)
+    except FileNotFoundError:
+        return None
+
+
+def _rerank_exact(
+    index: faiss.Index,
+    queries: np.ndarray,
+    vectors: np.ndarray,
+    rows_by_query: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Re-score candidate rows against full-precision vectors and keep the best k.
+    
+    Only the candidate rows are read from the memory-mapped vectors.
+    
+    Returns:
+        Tuple of (scores, rows) arrays of shape (n_queries, k); missing
+        results have row -1
+    """
+    top_scores = np.full((len(queries), k), -np.inf, dtype='float32')
+    top_rows = np.full((len(queries), k), -1, dtype='int64')
+    for i, (query, rows) in enumerate(zip(queries, rows_by_query)):
+        candidates = np.unique(rows[rows >= 0])  # Sorted, so reads are sequential
+        if not len(candidates):
+            continue
+        exact = np.asarray(vectors[candidates], dtype='float32')
+        if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            scores = exact @ query
+        else:
+            scores = 1.0 - ((exact - query) ** 2).sum(axis=1) / 2.0  # See similarity_scores
+        best = np.argsort(-scores, kind='stable')[:k]
+        top_scores[i, :len(best)] = scores[best]
+        top_rows[i, :len(best)] = candidates[best]
+    return top_scores, top_rows
+
+
+def _lexical_rankings(storage_ids: List[str], queries: List[str], k: int) -> List[List[Hit]]:
+    """Rank chunks of the given documents by BM25 score (no embedding model needed)."""
+    rankings: List[List[Hit]] = [[] for _ in queries]
+    for storage_id in storage_ids:
+        lexical_index = get_lexical_index(storage_id)
+        for ranking, query in zip(rankings, queries):
+            rows, scores = lexical_index.search(query, k)
+            ranking.extend((float(score), storage_id, int(row)) for row, score in zip(rows, scores))
+    
+    for ranking in rankings:
+        ranking.sort(key=lambda hit: hit[0], reverse=True)
+    return rankings
+
+
+def _fuse_rankings(rankings: List[List[Hit]]) -> List[Hit]:
+    """
+    Reciprocal rank fusion: each chunk scores sum(1 / (RRF_K + rank)) over
+    the rankings it appears in, so raw BM25 and cosine scores never have
+    to be put on one scale.
+    """
+    fused: Dict[Tuple[str, int], float] = {}
+    for ranking in rankings:
+        for rank, (_, storage_id, row) in enumerate(ranking, 1):
+            key = (storage_id, row)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (settings.RRF_K + rank)
+    return sorted(
+        ((score, storage_id, row) for (storage_id, row), score in fused.items()),
+        key=lambda hit: hit[0],
+        reverse=True
+    )
+
+
+def retrieve_chunks(
+    pdf_ids: List[str],
+    queries: List[str],
+    max_chunks: int = 5,
+    retrieval_mode: Optional[str] = None
+) -> List[List[Dict]]:
+    """
+    Retrieve the most relevant chunks for each query across one or more PDFs.
+    
+    Args:
+        pdf_ids: PDF identifiers (unindexed ones are skipped)
+        queries: User questions
+        max_chunks: Maximum number of chunks per query
+        retrieval_mode: hybrid, vector or lexical (default RETRIEVAL_MODE)
+        
+    Returns:
+        Per query, chunks best first as dicts with pdf_id, page_number,
+        text_chunk and score (cosine similarity, BM25 or fused RRF score)
+        
+    Raises:
+        ValueError: If the retrieval mode is unknown
+    """
+    mode = (retrieval_mode or settings.RETRIEVAL_MODE).lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}' (expected {', '.join(RETRIEVAL_MODES)})")
+    if not queries:
+        return []
+    
+    aliases = _resolve_documents(pdf_ids)
+    storage_ids = list(aliases)
+    metadata_by_id: Dict[str, ChunkMetadata] = {}
+    
+    if mode == RETRIEVAL_VECTOR:
+        rankings = _vector_rankings(storage_ids, queries, max_chunks, metadata_by_id)
+    elif mode == RETRIEVAL_LEXICAL:
+        rankings = _lexical_rankings(storage_ids, queries, max_chunks)
+    else:
+        depth = max_chunks * settings.HYBRID_CANDIDATE_FACTOR
+        vector_rankings = _vector_rankings(storage_ids, queries, depth, metadata_by_id)
+        lexical_rankings = _lexical_rankings(storage_ids, queries, depth)
+        rankings = [
+            _fuse_rankings([vector_ranking, lexical_ranking])
+            for vector_ranking, lexical_ranking in zip(vector_rankings, lexical_rankings)
+        ]
+    
+    results = []
+    for ranking in rankings:
+        chunks = []
+        for score, storage_id, row in ranking[:max_chunks]:
+            metadata = metadata_by_id.get(storage_id)
+            if metadata is None:
+                try:
+                    metadata = get_chunk_metadata(storage_id)
+                except FileNotFoundError:
+                    continue  # Deleted since it was searched
+                metadata_by_id[storage_id] = metadata
+            if not 0 <= row < len(metadata):
+                continue
+            chunk_meta = metadata[row]
+            chunks.append({
+                'pdf_id': aliases[storage_id][0],
+                'page_number': chunk_meta['page_number'],
+                'text_chunk': chunk_meta['text_chunk'],
+                'score': round(score, 4)
+            })
+        results.append(chunks)
+    return results
+
+
+def _snippet(text: str) -> str:
+    """Shorten a chunk for display in a source list."""
+    return text[:200] + '...' if len(text) > 200 else text
 
 
 def answer_question_from_pdf(
     pdf_id: str,
     query: str,
-    max_chunks: int = 5
+    max_chunks: int = 5,
+    retrieval_mode: Optional[str] = None
 ) -> Tuple[str, List[Dict]]:
     """
     Answer a question about a PDF using RAG.
     
     This function:
-    1. Loads the FAISS index for the PDF
-    2. Embeds the query
-    3. Retrieves top-k relevant chunks
-    4. Generates an answer (placeholder implementation)
+    1. Ranks chunks by BM25 and/or embedding similarity (see retrieve_chunks)
+    2. Keeps the top-k relevant chunks
+    3. Generates an answer (placeholder implementation)
     
     TODO: Replace the placeholder answer generation with a real LLM call
     (OpenAI, Anthropic, etc.) when ready.
@@ -193,50 +1181,154 @@ def answer_question_from_pdf(
         pdf_id: PDF identifier
         query: User's question
         max_chunks: Maximum number of chunks to retrieve
+        retrieval_mode: hybrid, vector or lexical (default RETRIEVAL_MODE)
         
     Returns:
         Tuple of (answer string, list of source dictionaries)
         
     Raises:
         FileNotFoundError: If index doesn't exist
+        ValueError: If the retrieval mode is unknown
     """
-    # Load index and metadata
-    index, metadata = load_index(pdf_id)
+    if not index_exists(pdf_id):
+        raise FileNotFoundError(f"Index not found for PDF {pdf_id}")
     
-    # Get embedding model
-    model = get_embedding_model()
+    retrieved = retrieve_chunks([pdf_id], [query], max_chunks, retrieval_mode)[0]
+    return "".join(_generate_answer(retrieved)), _pdf_sources(retrieved)
+
+
+def _pdf_sources(retrieved: List[Dict]) -> List[Dict]:
+    """Source dictionaries (page_number, snippet, score) of retrieved chunks."""
+    return [
+        {
+            'page_number': chunk['page_number'],
+            'snippet': _snippet(chunk['text_chunk']),
+            'score': chunk['score']
+        }
+        for chunk in retrieved
+    ]
+
+
+def _generate_answer(retrieved: List[Dict], cite_documents: bool = False) -> Iterator[str]:
+    """
+    Generate an answer from retrieved chunks, piece by piece.
     
-    # Embed the query
-    query_embedding = model.encode([query])
-    query_embedding = np.array(query_embedding).astype('float32')
+    Yields answer text incrementally so it can be streamed; joined, the
+    pieces are the full answer.
     
-    # Search for similar chunks
-    k = min(max_chunks, len(metadata))
-    distances, indices = index.search(query_embedding, k)
+    Args:
+        retrieved: Chunks from retrieve_chunks
+        cite_documents: Prefix each chunk with its [pdf_id, page] (multi-PDF answers)
+    """
+    # Generate answer (placeholder implementation)
+    # TODO: Replace this with a real LLM call (OpenAI, Anthropic, etc.)
+    if not retrieved:
+        if cite_documents:
+            yield "I couldn't find relevant information in the provided PDFs."
+        else:
+            yield "I couldn't find relevant information in the PDF to answer your question."
+        return
     
-    # Retrieve relevant chunks
-    retrieved_chunks = []
-    sources = []
+    # Simple concatenation-based answer (placeholder)
+    yield "Based on the PDF content:\n\n"
+    for chunk in retrieved:
+        citation = f"[{chunk['pdf_id']}, page {chunk['page_number']}] " if cite_documents else ""
+        yield f"{citation}{chunk['text_chunk']}\n\n"
+    yield "\n[Note: This is a placeholder answer. Real LLM integration coming soon.]"
+
+
+def stream_answer_from_pdf(
+    pdf_id: str,
+    query: str,
+    max_chunks: int = 5,
+    retrieval_mode: Optional[str] = None
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Answer a question about a PDF, streaming the result.
     
-    for idx in indices[0]:
-        if idx < len(metadata):
-            chunk_meta = metadata[idx]
-            retrieved_chunks.append(chunk_meta['text_chunk'])
-            sources.append({
-                'page_number': chunk_meta['page_number'],
-                'snippet': chunk_meta['text_chunk'][:200] + '...' if len(chunk_meta['text_chunk']) > 200 else chunk_meta['text_chunk']
-            })
+    Sources are yielded as soon as retrieval finishes, before any answer
+    text is generated:
+        ("sources", [...])   source dictionaries, as in answer_question_from_pdf
+        ("token", text)      answer text as it is generated
     
-    # Generate answer (placeholder implementation)
-    # TODO: Replace this with a real LLM call (OpenAI, Anthropic, etc.)
-    if not retrieved_chunks:
-        answer = "I couldn't find relevant information in the PDF to answer your question."
-    else:
-        # Simple concatenation-based answer (placeholder)
-        answer = f"Based on the PDF content:\n\n"
-        for i, chunk in enumerate(retrieved_chunks, 1):
-            answer += f"{chunk}\n\n"
-        answer += "\n[Note: This is a placeholder answer. Real LLM integration coming soon.]"
+    Args:
+        pdf_id: PDF identifier
+        query: User's question
+        max_chunks: Maximum number of chunks to retrieve
+        retrieval_mode: hybrid, vector or lexical (default RETRIEVAL_MODE)
+        
+    Yields:
+        (event name, payload) tuples
+        
+    Raises:
+        FileNotFoundError: If index doesn't exist
+        ValueError: If the retrieval mode is unknown
+    """
+    if not index_exists(pdf_id):
+        raise FileNotFoundError(f"Index not found for PDF {pdf_id}")
+    
+    retrieved = retrieve_chunks([pdf_id], [query], max_chunks, retrieval_mode)[0]
+    yield "sources", _pdf_sources(retrieved)
+    for piece in _generate_answer(retrieved):
+        yield "token", piece
+
+
+def answer_question_from_pdfs(
+    pdf_ids: List[str],
+    query: str,
+    max_chunks: int = 5,
+    retrieval_mode: Optional[str] = None
+) -> Tuple[str, List[Dict]]:
+    """
+    Answer a question over several PDFs with globally ranked chunks.
     
-    return answer, sources
+    Args:
+        pdf_ids: PDF identifiers (unindexed ones are skipped)
+        query: User's question
+        max_chunks: Maximum number of chunks to retrieve in total
+        retrieval_mode: hybrid, vector or lexical (default RETRIEVAL_MODE)
+        
+    Returns:
+        Tuple of (answer string, list of source dictionaries with
+        pdf_id, page_number, snippet and score)
+    """
+    return answer_questions_from_pdfs(pdf_ids, [query], max_chunks, retrieval_mode)[0]
 
+
+def answer_questions_from_pdfs(
+    pdf_ids: List[str],
+    queries: List[str],
+    max_chunks: int = 5,
+    retrieval_mode: Optional[str] = None
+) -> List[Tuple[str, List[Dict]]]:
+    """
+    Answer many questions over one or more PDFs in a single pass.
+    
+    All queries are embedded in one batch and every index is searched once
+    with the whole (n_queries x dimension) matrix. Each query gets the best
+    max_chunks chunks across all documents.
+    
+    Args:
+        pdf_ids: PDF identifiers (unindexed ones are skipped)
+        queries: User questions
+        max_chunks: Maximum number of chunks to retrieve per query
+        retrieval_mode: hybrid, vector or lexical (default RETRIEVAL_MODE)
+        
+    Returns:
+        One (answer string, list of source dictionaries with pdf_id,
+        page_number, snippet and score) tuple per query, in query order
+    """
+    results = []
+    for retrieved in retrieve_chunks(pdf_ids, queries, max_chunks, retrieval_mode):
+        sources = [
+            {
+                'pdf_id': chunk['pdf_id'],
+                'page_number': chunk['page_number'],
+                'snippet': _snippet(chunk['text_chunk']),
+                'score': chunk['score']
+            }
+            for chunk in retrieved
+        ]
+        results.append(("".join(_generate_answer(retrieved, cite_documents=True)), sources))
+    
+    return results
@@ -0,0 +1,20 @@
+"""
+Test setup: import backend modules from the parent folder and keep all
+data (uploads, indexes, registry, embedding store) in a temporary folder.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_DATA_DIR = Path(tempfile.mkdtemp(prefix="pdf-genie-tests-"))
+os.environ.update({
+    'UPLOAD_DIR': str(_DATA_DIR / "uploads"),
+    'GENERATED_DIR': str(_DATA_DIR / "generated"),
+    'INDEX_DIR': str(_DATA_DIR / "indexes"),
+    'EDIT_SESSION_DIR': str(_DATA_DIR / "sessions"),
+    'REGISTRY_DB_PATH': str(_DATA_DIR / "registry.sqlite3"),
+    'EMBEDDING_STORE_PATH': str(_DATA_DIR / "embeddings.sqlite3"),
+})
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
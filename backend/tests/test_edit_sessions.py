@@ -0,0 +1,36 @@
+"""
+Published session output must not carry the working file's earlier revisions.
+"""
+import fitz  # PyMuPDF
+
+import edit_sessions
+from config import settings
+from pdf_utils import generate_pdf_id, save_uploaded_pdf
+
+
+def _upload(texts):
+    doc = fitz.open()
+    for text in texts:
+        doc.new_page().insert_text((72, 72), text)
+    pdf_id = generate_pdf_id()
+    save_uploaded_pdf(doc.tobytes(), pdf_id)
+    doc.close()
+    return pdf_id
+
+
+def test_saved_session_drops_deleted_pages_from_earlier_revisions():
+    session_id = edit_sessions.open_session(_upload(["public page", "CONFIDENTIAL-SSN-123"]))['session_id']
+    try:
+        edit_sessions.apply_session_edits(session_id, [{'op': 'add_text', 'page_number': 0, 'text': "x", 'x': 72, 'y': 100}])
+        edit_sessions.checkpoint_session(session_id)
+        edit_sessions.apply_session_edits(session_id, [{'op': 'delete_page', 'page_number': 1}])
+        output = settings.GENERATED_DIR / edit_sessions.save_session(session_id)
+
+        data = output.read_bytes()
+        assert data.count(b"%%EOF") == 1
+        doc = fitz.open(output)
+        assert len(doc) == 1
+        assert "CONFIDENTIAL" not in "".join(page.get_text() for page in doc)
+        doc.close()
+    finally:
+        edit_sessions.delete_session(session_id)
@@ -0,0 +1,38 @@
+"""
+Cached embeddings are keyed by the backend actually loaded, so a backend
+that fails validation and falls back to torch never stores torch vectors
+under its own key.
+"""
+import numpy as np
+
+import rag_utils
+from config import settings
+from embedding_backends import BACKEND_ONNX, BACKEND_TORCH, embedding_model_key
+from embedding_store import chunk_key, get_embeddings
+
+
+class _FakeModel:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def encode(self, sentences, **kwargs):
+        return np.ones((len(sentences), 4), dtype='float32')
+
+
+def test_validation_fallback_keys_embeddings_as_torch(monkeypatch):
+    monkeypatch.setattr(settings, 'EMBEDDING_BACKEND', BACKEND_ONNX)
+    monkeypatch.setattr(settings, 'EMBEDDING_BACKEND_VALIDATE', True)
+    monkeypatch.setattr(settings, 'EMBEDDING_SERVER_SOCKET', None)
+    monkeypatch.setattr(rag_utils, '_embedding_model', None)
+    monkeypatch.setattr(rag_utils, '_embedding_backend', None)
+    monkeypatch.setattr(rag_utils, 'load_embedding_model', lambda backend=None: _FakeModel(backend))
+    monkeypatch.setattr(rag_utils, 'validate_backend', lambda model, backend: False)
+
+    rag_utils.embed_chunks(["a chunk embedded after the fallback"])
+
+    assert settings.EMBEDDING_BACKEND == BACKEND_ONNX
+    assert rag_utils._embedding_model.backend == BACKEND_TORCH
+    assert rag_utils.get_embedding_model_key() == embedding_model_key(BACKEND_TORCH)
+    torch_key = chunk_key(embedding_model_key(BACKEND_TORCH), "a chunk embedded after the fallback")
+    onnx_key = chunk_key(embedding_model_key(BACKEND_ONNX), "a chunk embedded after the fallback")
+    assert list(get_embeddings([torch_key, onnx_key])) == [torch_key]
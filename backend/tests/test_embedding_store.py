@@ -0,0 +1,65 @@
+"""
+The embedding store stays within its entry limit without counting its rows
+on every write, and lookups only write when an entry's recency is stale.
+"""
+import numpy as np
+
+import embedding_store
+from config import settings
+
+
+def _put_batches(batches, rows=7):
+    for batch in range(batches):
+        embedding_store.put_embeddings([
+            (embedding_store.chunk_key("test-model", f"{batch}-{row}"), np.ones(4, dtype='float32'))
+            for row in range(rows)
+        ])
+
+
+def test_writes_below_the_limit_do_not_count_rows(monkeypatch):
+    monkeypatch.setattr(settings, 'EMBEDDING_STORE_MAX_ENTRIES', 100000)
+    _put_batches(1)
+    statements = []
+    embedding_store._get_connection().set_trace_callback(statements.append)
+    try:
+        _put_batches(50)
+    finally:
+        embedding_store._get_connection().set_trace_callback(None)
+
+    assert not [sql for sql in statements if "COUNT(*)" in sql]
+
+
+def test_store_is_trimmed_once_over_the_limit(monkeypatch):
+    monkeypatch.setattr(settings, 'EMBEDDING_STORE_MAX_ENTRIES', 100)
+    _put_batches(50)
+    assert embedding_store.get_store_stats()['entries'] <= 100
+
+
+def _traced(call):
+    statements = []
+    embedding_store._get_connection().set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        embedding_store._get_connection().set_trace_callback(None)
+    return statements
+
+
+def test_lookups_of_recently_used_entries_do_not_write():
+    keys = [embedding_store.chunk_key("test-model", f"lookup-{row}") for row in range(5)]
+    embedding_store.put_embeddings([(key, np.ones(4, dtype='float32')) for key in keys])
+
+    statements = _traced(lambda: embedding_store.get_embeddings(keys))
+    assert not [sql for sql in statements if sql.startswith("UPDATE")]
+
+
+def test_lookups_refresh_stale_recency():
+    key = embedding_store.chunk_key("test-model", "stale lookup")
+    embedding_store.put_embeddings([(key, np.ones(4, dtype='float32'))])
+    conn = embedding_store._get_connection()
+    with conn:
+        conn.execute("UPDATE embeddings SET last_used = 0 WHERE key = ?", (key,))
+
+    assert key in embedding_store.get_embeddings([key])
+    last_used = conn.execute("SELECT last_used FROM embeddings WHERE key = ?", (key,)).fetchone()[0]
+    assert last_used > 0
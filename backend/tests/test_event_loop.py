@@ -0,0 +1,101 @@
+"""
+Blocking work of the endpoints (waiting for the PyMuPDF lock, finishing
+an upload) runs in worker threads, so the event loop keeps serving other
+requests meanwhile.
+"""
+import threading
+import time
+
+import anyio
+import fitz  # PyMuPDF
+import httpx
+
+import main
+from doc_pool import fitz_lock
+from pdf_utils import generate_pdf_id, save_uploaded_pdf
+
+HOLD_SECONDS = 1.0
+
+
+def _pdf_bytes():
+    doc = fitz.open()
+    doc.new_page()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _longest_stall(send_request):
+    """
+    Send one request and measure the longest time the event loop was blocked.
+
+    Returns:
+        Tuple of (response status code, longest stall in seconds)
+    """
+    async def run():
+        result = {}
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def request():
+                result['status'] = (await send_request(client)).status_code
+
+            async def ticker():
+                result['stall'] = 0.0
+                last = time.monotonic()
+                while True:
+                    await anyio.sleep(0.01)
+                    now = time.monotonic()
+                    result['stall'] = max(result['stall'], now - last)
+                    last = now
+                    if 'status' in result:
+                        break
+
+            async with anyio.create_task_group() as tasks:
+                tasks.start_soon(ticker)
+                tasks.start_soon(request)
+        return result['status'], result['stall']
+
+    return anyio.run(run)
+
+
+def test_event_loop_keeps_running_while_an_edit_waits_for_the_fitz_lock():
+    pdf_id = generate_pdf_id()
+    save_uploaded_pdf(_pdf_bytes(), pdf_id)
+    locked = threading.Event()
+
+    def hold_lock():
+        with fitz_lock:
+            locked.set()
+            time.sleep(HOLD_SECONDS)
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait()
+    try:
+        status, stall = _longest_stall(lambda client: client.post(
+            "/api/pdf/edit/add-text",
+            data={'pdf_id': pdf_id, 'page_number': 0, 'text': "hello", 'x': 72, 'y': 72},
+        ))
+    finally:
+        holder.join()
+
+    assert status == 200
+    assert stall < HOLD_SECONDS / 2
+
+
+def test_event_loop_keeps_running_while_an_upload_is_finalized(monkeypatch):
+    finalize_upload = main.finalize_upload
+
+    def slow_finalize_upload(writer):
+        time.sleep(HOLD_SECONDS)  # A slow disk (fsync) or busy registry
+        return finalize_upload(writer)
+
+    monkeypatch.setattr(main, 'finalize_upload', slow_finalize_upload)
+    monkeypatch.setattr(main, 'enqueue_index_job', lambda pdf_id, path: {'status': "queued"})
+    status, stall = _longest_stall(lambda client: client.post(
+        "/api/pdf/upload",
+        files={'files': ("slow.pdf", _pdf_bytes(), "application/pdf")},
+    ))
+
+    assert status == 200
+    assert stall < HOLD_SECONDS / 2
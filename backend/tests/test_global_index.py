@@ -0,0 +1,56 @@
+"""
+The global index persists one shard per document: updates write only that
+document's shard and the manifest, and other instances follow them.
+"""
+import faiss
+import numpy as np
+
+from global_index import GlobalIndex
+
+
+def _vectors(seed, n=4, dimension=8):
+    return np.random.default_rng(seed).random((n, dimension), dtype='float32')
+
+
+def test_updates_write_only_the_changed_document():
+    index = GlobalIndex("shards")
+    index.add_document("a", _vectors(1))
+    shard_a = index._shard_path(index._docs["a"])
+    written_a = shard_a.stat().st_mtime_ns
+
+    index.add_document("b", _vectors(2))
+    assert shard_a.stat().st_mtime_ns == written_a
+    assert sorted(path.name for path in index.shard_dir.glob("*.npz")) == ["0.npz", "1.npz"]
+
+    index.remove_document("a")
+    assert not shard_a.exists()
+    assert index.stats()['vectors'] == 4
+
+
+def test_other_instances_follow_adds_replacements_and_removals():
+    writer, reader = GlobalIndex("follow"), GlobalIndex("follow")
+    writer.add_document("a", _vectors(1))
+    writer.add_document("b", _vectors(2))
+    query = _vectors(2)[:1]
+    assert reader.search(query, ["a", "b"], 1)[0][0][:2] == ("b", 0)
+
+    writer.add_document("b", _vectors(3, n=2))
+    writer.remove_document("a")
+    assert reader.stats()['documents'] == 1
+    assert reader.stats()['vectors'] == 2
+    assert not reader.contains("a")
+
+
+def test_legacy_whole_index_file_is_split_into_shards():
+    old = GlobalIndex("legacy")
+    old.add_document("a", _vectors(1))
+    old.add_document("b", _vectors(2, n=3))
+    # Rebuild the file layout of earlier versions: one FAISS file for all documents
+    faiss.write_index(old._index, str(old.legacy_index_path))
+    for path in old.shard_dir.glob("*.npz"):
+        path.unlink()
+
+    migrated = GlobalIndex("legacy")
+    assert not migrated.legacy_index_path.exists()
+    assert migrated.stats() == {'name': "legacy", 'documents': 2, 'vectors': 7}
+    assert migrated.search(_vectors(2)[1:2], ["a", "b"], 1)[0][0][:2] == ("b", 1)
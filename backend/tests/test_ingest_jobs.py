@@ -0,0 +1,48 @@
+"""
+Failed indexing jobs report why they failed.
+"""
+import time
+
+import fitz  # PyMuPDF
+
+import rag_utils
+from config import settings
+from ingest_jobs import STATUS_FAILED, ACTIVE_STATUSES, enqueue_index_job, get_index_status
+
+
+def _write_pdf(name, text=None):
+    settings.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    path = settings.UPLOAD_DIR / f"{name}.pdf"
+    doc = fitz.open()
+    page = doc.new_page()
+    if text:
+        page.insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _finished_job(pdf_id, path):
+    enqueue_index_job(pdf_id, path)
+    deadline = time.monotonic() + 30
+    job = get_index_status(pdf_id)
+    while job['status'] in ACTIVE_STATUSES and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = get_index_status(pdf_id)
+    return job
+
+
+def test_job_without_text_reports_no_text():
+    job = _finished_job("job-blank", _write_pdf("job-blank"))
+    assert job['status'] == STATUS_FAILED
+    assert "No extractable text" in job['error']
+
+
+def test_job_reports_the_embedding_error(monkeypatch):
+    def broken_embed_chunks(chunks, progress_callback=None):
+        raise RuntimeError("embedding model unavailable")
+
+    monkeypatch.setattr(rag_utils, 'embed_chunks', broken_embed_chunks)
+    job = _finished_job("job-broken", _write_pdf("job-broken", "some text"))
+    assert job['status'] == STATUS_FAILED
+    assert "embedding model unavailable" in job['error']
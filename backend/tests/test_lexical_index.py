@@ -0,0 +1,53 @@
+"""
+BM25 index storage: the vocabulary is stored as UTF-8 bytes plus offsets,
+and files written with the earlier fixed-width vocabulary still load.
+"""
+import numpy as np
+
+from lexical_index import build_lexical_index, load_lexical_index, write_lexical_index
+
+CHUNKS = [
+    "Clause 4.2.3 covers the SKU-1003 warranty",
+    "Error E_0x1F is raised by the v2/api client",
+    "Die Größe der Straße wird in Metern angegeben",
+    "warranty terms for sku-2000 " + "x" * 60,
+]
+
+
+def test_round_trip_keeps_rankings(tmp_path):
+    index = build_lexical_index(CHUNKS)
+    path = tmp_path / "lexical.npz"
+    write_lexical_index(path, index)
+    loaded = load_lexical_index(path)
+
+    for query in ["sku-1003", "warranty", "straße", "E_0x1F", "missing"]:
+        expected_rows, expected_scores = index.search(query, 3)
+        rows, scores = loaded.search(query, 3)
+        assert rows.tolist() == expected_rows.tolist()
+        assert np.allclose(scores, expected_scores)
+    assert loaded.search("straße", 3)[0].tolist() == [2]
+    assert loaded.search("missing", 3)[0].tolist() == []
+
+
+def test_vocabulary_is_not_padded_to_the_longest_term():
+    index = build_lexical_index(CHUNKS)
+    # One 64-character term must not make every entry 256 bytes wide
+    assert index.vocab_text.nbytes == sum(len(index.term(i)) for i in range(index.vocab_size))
+    assert index.vocab_text.nbytes < 64 * index.vocab_size
+
+
+def test_fixed_width_vocabulary_files_still_load(tmp_path):
+    index = build_lexical_index(CHUNKS)
+    terms = [index.term(i).decode('utf-8') for i in range(index.vocab_size)]
+    path = tmp_path / "legacy.npz"
+    np.savez(
+        path,
+        vocab=np.array(terms),
+        term_offsets=index.term_offsets,
+        postings=index.postings,
+        frequencies=index.frequencies,
+        chunk_lengths=index.chunk_lengths,
+    )
+
+    loaded = load_lexical_index(path)
+    assert loaded.search("sku 1003", 2)[0].tolist() == index.search("sku 1003", 2)[0].tolist()
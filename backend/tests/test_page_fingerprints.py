@@ -0,0 +1,92 @@
+"""
+Page fingerprints must tell pages apart by what they say, so re-indexing a
+derived document never reuses another page's chunks.
+"""
+import hashlib
+
+import fitz  # PyMuPDF
+import numpy as np
+
+import rag_utils
+from chunk_metadata import load_chunk_metadata
+from pdf_utils import compute_page_fingerprints, extract_text_from_pdf
+
+
+def _fake_embed_chunks(chunks, progress_callback=None):
+    """Deterministic unit vectors, so no embedding model is needed."""
+    vectors = np.array([
+        np.frombuffer(hashlib.sha256(chunk.encode('utf-8')).digest(), dtype='uint8')
+        for chunk in chunks
+    ], dtype='float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _write_pdf(path, texts):
+    doc = fitz.open()
+    for text in texts:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+
+
+def _write_xobject_pdf(path, texts):
+    """Each page shows a page of another document through a Form XObject (like N-up output)."""
+    source = fitz.open()
+    for text in texts:
+        source.new_page().insert_text((72, 72), text)
+    doc = fitz.open()
+    for page_index in range(len(texts)):
+        page = doc.new_page()
+        page.show_pdf_page(page.rect, source, page_index)
+    doc.save(path)
+    doc.close()
+    source.close()
+
+
+def test_xobject_pages_with_different_text_differ(tmp_path):
+    path = tmp_path / "nup.pdf"
+    _write_xobject_pdf(path, ["alpha secret content", "beta totally different"])
+
+    doc = fitz.open(path)
+    # The premise: both pages have the same content stream
+    assert doc[0].read_contents() == doc[1].read_contents()
+    doc.close()
+
+    first, second = compute_page_fingerprints(extract_text_from_pdf(path))
+    assert first != second
+
+
+def test_derived_document_does_not_reuse_other_pages_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_utils, "embed_chunks", _fake_embed_chunks)
+    base_path = tmp_path / "base.pdf"
+    derived_path = tmp_path / "derived.pdf"
+    _write_xobject_pdf(base_path, ["alpha secret content"])
+    _write_xobject_pdf(derived_path, ["beta totally different"])
+
+    assert rag_utils.create_index_for_pdf("fingerprint-base", base_path)
+    assert rag_utils.create_index_for_pdf("fingerprint-derived", derived_path, base_pdf_ids=["fingerprint-base"])
+
+    metadata = load_chunk_metadata(rag_utils.get_index_paths("fingerprint-derived")[1])
+    texts = [metadata.text(i) for i in range(len(metadata))]
+    assert any("beta totally different" in text for text in texts)
+    assert not any("alpha" in text for text in texts)
+
+
+def test_unchanged_pages_are_reused(tmp_path, monkeypatch):
+    embedded = []
+
+    def embed(chunks, progress_callback=None):
+        embedded.extend(chunks)
+        return _fake_embed_chunks(chunks)
+
+    monkeypatch.setattr(rag_utils, "embed_chunks", embed)
+    base_path = tmp_path / "base.pdf"
+    derived_path = tmp_path / "derived.pdf"
+    _write_pdf(base_path, ["first page text", "second page text"])
+    _write_pdf(derived_path, ["second page text", "new page text"])
+
+    assert rag_utils.create_index_for_pdf("reuse-base", base_path)
+    embedded.clear()
+    assert rag_utils.create_index_for_pdf("reuse-derived", derived_path, base_pdf_ids=["reuse-base"])
+
+    assert [chunk.strip() for chunk in embedded] == ["new page text"]
@@ -0,0 +1,221 @@
+"""
+FAISS index factory.
+Chooses the index type by corpus size (exact Flat for small documents,
+HNSW or IVF-PQ above configurable thresholds) and the vector storage
+(float32, or float16 / int8 / PQ codes), handles training and applies
+search-time parameters.
+"""
+import math
+from typing import Optional
+
+import numpy as np
+import faiss
+
+from config import settings
+
+
+INDEX_FLAT = "flat"
+INDEX_HNSW = "hnsw"
+INDEX_IVFPQ = "ivfpq"
+INDEX_TYPES = (INDEX_FLAT, INDEX_HNSW, INDEX_IVFPQ)
+
+# Vector storage of flat and HNSW indexes (IVF-PQ always stores PQ codes)
+QUANTIZATION_NONE = "none"  # float32, 4 bytes per dimension
+QUANTIZATION_FP16 = "fp16"  # 2 bytes per dimension
+QUANTIZATION_SQ8 = "sq8"  # int8 scalar quantization, 1 byte per dimension
+QUANTIZATION_PQ = "pq"  # Product quantization, 1 byte per sub-quantizer
+QUANTIZATIONS = (QUANTIZATION_NONE, QUANTIZATION_FP16, QUANTIZATION_SQ8, QUANTIZATION_PQ)
+
+# FAISS recommends at least this many training points per IVF centroid
+_MIN_POINTS_PER_CENTROID = 39
+
+# Below this many vectors the 256-centroid PQ codebooks can't be trained well
+_MIN_PQ_TRAINING_VECTORS = 1000
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """
+    Pick the index type for a corpus of n_vectors.
+
+    Uses INDEX_TYPE when it names a type; 'auto' picks by the
+    INDEX_HNSW_MIN_VECTORS / INDEX_IVFPQ_MIN_VECTORS thresholds.
+    """
+    index_type = settings.INDEX_TYPE.lower()
+    if index_type != "auto":
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown INDEX_TYPE '{settings.INDEX_TYPE}' (expected auto, {', '.join(INDEX_TYPES)})")
+        return index_type
+    if n_vectors >= settings.INDEX_IVFPQ_MIN_VECTORS:
+        return INDEX_IVFPQ
+    if n_vectors >= settings.INDEX_HNSW_MIN_VECTORS:
+        return INDEX_HNSW
+    return INDEX_FLAT
+
+
+def _quantization(n_vectors: int, quantization: Optional[str] = None) -> str:
+    """Vector storage for a new index: the requested/configured mode (PQ needs enough data)."""
+    quantization = (quantization or settings.INDEX_QUANTIZATION).lower()
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown INDEX_QUANTIZATION '{quantization}' (expected {', '.join(QUANTIZATIONS)})")
+    if quantization == QUANTIZATION_PQ and n_vectors < _MIN_PQ_TRAINING_VECTORS:
+        return QUANTIZATION_SQ8
+    return quantization
+
+
+def _metric() -> int:
+    """FAISS metric for new indexes: inner product on normalized vectors for cosine."""
+    metric = settings.INDEX_METRIC.lower()
+    if metric == "cosine":
+        return faiss.METRIC_INNER_PRODUCT
+    if metric == "l2":
+        return faiss.METRIC_L2
+    raise ValueError(f"Unknown INDEX_METRIC '{settings.INDEX_METRIC}' (expected cosine or l2)")
+
+
+def _ivf_nlist(n_vectors: int) -> int:
+    """Number of IVF lists: INDEX_IVF_NLIST, or ~4*sqrt(n) capped by available training data."""
+    nlist = settings.INDEX_IVF_NLIST or int(4 * math.sqrt(n_vectors))
+    return max(1, min(nlist, n_vectors // _MIN_POINTS_PER_CENTROID))
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    """Largest divisor of the dimension not above INDEX_PQ_M (PQ needs d % m == 0)."""
+    for m in range(min(settings.INDEX_PQ_M, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def normalize_for_index(index: faiss.Index, vectors: np.ndarray) -> np.ndarray:
+    """
+    Prepare vectors for adding to or searching an index.
+
+    Inner-product indexes hold L2-normalized vectors so scores are cosine
+    similarities; L2 indexes (including ones built before cosine support)
+    take vectors unchanged.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        vectors = vectors.copy()
+        faiss.normalize_L2(vectors)
+    return vectors
+
+
+def similarity_scores(index: faiss.Index, distances: np.ndarray) -> np.ndarray:
+    """
+    Convert search distances to similarities (higher is better).
+
+    Inner-product scores are cosine similarities already; squared L2
+    distances between unit vectors map to cosine as 1 - d / 2, so hits
+    from both kinds of index can be ranked together.
+    """
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        return distances
+    return 1.0 - distances / 2.0
+
+
+def build_index(
+    embeddings: np.ndarray,
+    index_type: Optional[str] = None,
+    ids: Optional[np.ndarray] = None,
+    quantization: Optional[str] = None
+) -> faiss.Index:
+    """
+    Build and fill a FAISS index for the given embeddings.
+
+    Args:
+        embeddings: float32 array of shape (n, dimension)
+        index_type: Override the configured/auto-selected type
+        ids: int64 vector IDs; wraps the index in an IndexIDMap2 so vectors
+            can later be removed and added by ID
+        quantization: Override INDEX_QUANTIZATION (none, fp16, sq8 or pq)
+
+    Returns:
+        Trained FAISS index containing all embeddings
+    """
+    n_vectors, dimension = embeddings.shape
+    index_type = index_type or choose_index_type(n_vectors)
+    quantization = _quantization(n_vectors, quantization)
+    metric = _metric()
+
+    if index_type == INDEX_IVFPQ and (_ivf_nlist(n_vectors) < 2 or n_vectors < 1000):
+        index_type = INDEX_HNSW  # Too little data to train IVF/PQ codebooks
+
+    sq_types = {
+        QUANTIZATION_FP16: faiss.ScalarQuantizer.QT_fp16,
+        QUANTIZATION_SQ8: faiss.ScalarQuantizer.QT_8bit,
+    }
+
+    if index_type == INDEX_FLAT:
+        if quantization in sq_types:
+            index = faiss.IndexScalarQuantizer(dimension, sq_types[quantization], metric)
+        elif quantization == QUANTIZATION_PQ:
+            index = faiss.IndexPQ(dimension, _pq_subquantizers(dimension), 8, metric)
+        else:
+            index = faiss.IndexFlatIP(dimension) if metric == faiss.METRIC_INNER_PRODUCT else faiss.IndexFlatL2(dimension)
+    elif index_type == INDEX_HNSW:
+        if quantization in sq_types:
+            index = faiss.IndexHNSWSQ(dimension, sq_types[quantization], settings.INDEX_HNSW_M, metric)
+        elif quantization == QUANTIZATION_PQ:
+            index = faiss.IndexHNSWPQ(dimension, _pq_subquantizers(dimension), settings.INDEX_HNSW_M, 8, metric)
+        else:
+            index = faiss.IndexHNSWFlat(dimension, settings.INDEX_HNSW_M, metric)
+        index.hnsw.efConstruction = settings.INDEX_HNSW_EF_CONSTRUCTION
+    elif index_type == INDEX_IVFPQ:
+        nlist = _ivf_nlist(n_vectors)
+        quantizer = faiss.IndexFlatIP(dimension) if metric == faiss.METRIC_INNER_PRODUCT else faiss.IndexFlatL2(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, _pq_subquantizers(dimension), 8, metric)
+    else:
+        raise ValueError(f"Unknown index type '{index_type}'")
+
+    vectors = normalize_for_index(index, embeddings)
+    if not index.is_trained:
+        sample = vectors
+        max_train = settings.INDEX_MAX_TRAINING_VECTORS
+        if len(sample) > max_train:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(len(vectors), max_train, replace=False)]
+        index.train(sample)
+
+    if ids is not None:
+        index = faiss.IndexIDMap2(index)
+        index.add_with_ids(vectors, np.ascontiguousarray(ids, dtype='int64'))
+    else:
+        index.add(vectors)
+
+    apply_search_params(index)
+    return index
+
+
+def apply_search_params(index: faiss.Index):
+    """
+    Apply the configured search-time knobs to an index.
+
+    Sets efSearch on HNSW indexes and nprobe on IVF indexes (looking
+    through ID-map wrappers); other index types are left unchanged.
+    """
+    inner = index
+    if hasattr(inner, 'id_map'):
+        inner = faiss.downcast_index(inner.index)
+
+    if hasattr(inner, 'hnsw'):
+        inner.hnsw.efSearch = settings.INDEX_HNSW_EF_SEARCH
+    try:
+        faiss.extract_index_ivf(inner).nprobe = settings.INDEX_IVF_NPROBE
+    except RuntimeError:
+        pass  # Not an IVF index
+
+
+def is_lossy(index: faiss.Index) -> bool:
+    """True if the index stores compressed vectors (scores are approximate)."""
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if hasattr(inner, 'hnsw'):
+        inner = faiss.downcast_index(inner.storage)
+    return not isinstance(inner, faiss.IndexFlat)
+
+
+def describe_index(index: faiss.Index) -> str:
+    """Short human-readable description (type, metric, size) for logs."""
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    metric = "ip" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2"
+    return f"{type(inner).__name__}[{metric}, n={index.ntotal}, d={index.d}]"
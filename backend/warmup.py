@@ -0,0 +1,103 @@
+"""
+Startup warmup.
+Loads and exercises the embedding model (and the AI chat modules) on a
+background thread right after startup, so the first request after a deploy
+does not pay for model download, loading and first-inference setup.
+Readiness is reported by GET /ready.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import settings
+
+
+# Warmup states
+WARMUP_DISABLED = "disabled"
+WARMUP_PENDING = "pending"
+WARMUP_RUNNING = "running"
+WARMUP_READY = "ready"
+WARMUP_FAILED = "failed"
+
+# Sentences encoded once so lazy kernels/sessions are initialized
+_WARMUP_TEXTS = [
+    "What is this document about?",
+    "Summarize the termination clause in section 4.2 of the agreement.",
+]
+
+_state: Dict[str, Any] = {
+    'status': WARMUP_DISABLED if not settings.WARMUP_ON_STARTUP else WARMUP_PENDING,
+    'started_at': None,
+    'finished_at': None,
+    'steps': {},  # step name -> seconds
+    'error': None,
+}
+_state_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+
+def _timed(name: str, func):
+    start = time.perf_counter()
+    func()
+    with _state_lock:
+        _state['steps'][name] = round(time.perf_counter() - start, 3)
+
+
+def _load_embedding_model():
+    from rag_utils import get_embedding_model
+    get_embedding_model()
+
+
+def _encode():
+    # Straight through the model: warmup queries stay out of the query cache
+    from rag_utils import get_embedding_model
+    get_embedding_model().encode(_WARMUP_TEXTS, show_progress_bar=False)
+
+
+def _load_ai_chat():
+    from ai_orchestrator import get_client
+    get_client()
+
+
+def run_warmup():
+    """Run all warmup steps in the calling thread and record the outcome."""
+    with _state_lock:
+        _state.update(status=WARMUP_RUNNING, started_at=time.time(), finished_at=None, error=None)
+        _state['steps'] = {}
+    try:
+        _timed("embedding_model", _load_embedding_model)
+        _timed("encode", _encode)
+        if settings.OPENAI_API_KEY:
+            _timed("ai_chat", _load_ai_chat)
+    except Exception as e:
+        print(f"Warmup failed: {e}")
+        with _state_lock:
+            _state.update(status=WARMUP_FAILED, finished_at=time.time(), error=str(e))
+        return
+    with _state_lock:
+        _state.update(status=WARMUP_READY, finished_at=time.time())
+        print(f"Warmup finished in {_state['finished_at'] - _state['started_at']:.1f}s: {_state['steps']}")
+
+
+def start_warmup():
+    """Start warmup on a background thread (no-op if already started)."""
+    global _thread
+    with _state_lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=run_warmup, name="warmup", daemon=True)
+    _thread.start()
+
+
+def get_warmup_status() -> Dict[str, Any]:
+    """
+    Current warmup state.
+
+    Returns:
+        Dict with status (disabled, pending, running, ready or failed),
+        ready flag, per-step seconds and the error of a failed warmup
+    """
+    with _state_lock:
+        state = dict(_state, steps=dict(_state['steps']))
+    state['ready'] = state['status'] in (WARMUP_DISABLED, WARMUP_READY)
+    return state